@@ -0,0 +1,275 @@
+"""
+Multi-job batch matching.
+
+Scores one pass over the resume pool against several jobs. Resumes are
+streamed from the database once. Where the model handles it, several jobs are
+packed into a single structured-output prompt per resume; otherwise
+(resume, job) pairs are scheduled individually. Either way, all prompts share
+one concurrency and rate-limit budget and results are written in bulk:
+
+    python batch_match.py <job_id> <job_id> ...
+    python batch_match.py --open-jobs
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List
+
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field
+
+import db
+import metrics
+import resume_scanner
+import text_compaction
+
+# How many jobs each model can reliably score in one prompt; unlisted models get one job per prompt
+PACKED_PROMPT_MODELS = {
+    "llama-3.1-8b-instant": 4,
+    "llama-3.3-70b-versatile": 6,
+}
+BATCH_SAVE_SIZE = int(os.getenv("BATCH_MATCH_SAVE_SIZE", "200"))
+
+
+class JobFit(BaseModel):
+    """Match analysis for one of the jobs in a packed prompt."""
+    job_number: int = Field(description="Number of the job as listed in the prompt (1-based)")
+    summary: str = Field(description="5-6 sentence summary of how well the candidate matches this job")
+    match_percentage: float = Field(description="A percentage (0-100) indicating how well the candidate matches this job")
+
+
+class MultiJobMatch(BaseModel):
+    """Model for candidate analysis against several jobs."""
+    matches: List[JobFit] = Field(description="One entry per job, in any order")
+
+
+PACKED_MATCH_PROMPT = ChatPromptTemplate.from_template("""
+    As a Talent Acquisition AI, analyze how well this candidate matches each of the job descriptions below.
+
+    **Candidate Resume:**
+    {resume_text}
+
+    {jobs}
+
+    For every job, based on the candidate's skills, experience, and qualifications compared to the job
+    requirements, provide a concise summary (3-5 sentences) and calculate a match percentage (0-100%).
+    Judge each job independently and return exactly one entry per job, identified by its number.
+
+    {format_instructions}
+    """)
+
+
+class PackedJobScorer:
+    """Scores one resume against several jobs with a single LLM call."""
+
+    def __init__(self, groq_api_key=None, model_name=resume_scanner.MODEL_NAME, temperature=0.2, model=None,
+                 http_client=None):
+        self.model_name = model_name
+        self.parser = PydanticOutputParser(pydantic_object=MultiJobMatch)
+        if model is None:
+            model = ChatGroq(temperature=temperature, api_key=groq_api_key, model_name=model_name,
+                             http_client=http_client)
+        prompt = PACKED_MATCH_PROMPT.partial(format_instructions=self.parser.get_format_instructions())
+        self.chain = prompt | model
+
+    def score(self, resume_text, job_descriptions, compact=True):
+        """
+        Returns a list aligned with job_descriptions holding a CandidateMatch per
+        job, or None where the model skipped a job. Pass compact=False when the
+        resume is already compacted; job descriptions are never compacted here.
+        """
+        if compact:
+            with metrics.span("compact"):
+                resume_text = text_compaction.compact_resume(resume_text, self.model_name)
+        jobs = "\n\n".join(
+            f"**Job {number}:**  \n{job_description}" for number, job_description in enumerate(job_descriptions, 1)
+        )
+        with metrics.span("llm_call"):
+            message = self.chain.invoke({
+                "resume_text": resume_text,
+                "jobs": jobs,
+            }, config={"callbacks": resume_scanner.llm_callbacks()})
+        result = resume_scanner.parse_llm_output(self.parser, message)
+
+        scored = [None] * len(job_descriptions)
+        for fit in result.matches:
+            if 1 <= fit.job_number <= len(job_descriptions):
+                scored[fit.job_number - 1] = resume_scanner.CandidateMatch(
+                    summary=fit.summary, match_percentage=fit.match_percentage
+                )
+        return scored
+
+
+class BatchReport:
+    def __init__(self, jobs, jobs_per_prompt):
+        self.jobs = jobs
+        self.jobs_per_prompt = jobs_per_prompt
+        self.resumes = 0
+        self.prompts = 0
+        self.pairs = 0
+        self.failed_pairs = 0
+        self.seconds = 0.0
+
+    def pairs_per_second(self):
+        return self.pairs / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.jobs} jobs x {self.resumes} resumes: {self.pairs} pairs scored, {self.failed_pairs} failed, "
+            f"{self.prompts} prompts ({self.jobs_per_prompt} jobs/prompt) in {self.seconds:.1f}s "
+            f"= {self.pairs_per_second():.1f} pairs/s"
+        )
+
+
+def get_open_job_ids():
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT job_id FROM job_descriptions WHERE NOT position_fulfilled ORDER BY created_at DESC")
+            return [row[0] for row in cursor.fetchall()]
+
+
+def match_jobs(job_ids, groq_api_key=None, jobs_per_prompt=None, max_concurrency=None, on_progress=None, model=None):
+    """
+    Scores every stored resume against each job in job_ids and saves the results.
+
+    Args:
+        job_ids: jobs to match
+        jobs_per_prompt: jobs packed into one prompt (defaults to what the model supports)
+        on_progress: optional callback(pairs_done, pairs_total)
+        model: optional pre-built chat model (e.g. a fake model for benchmarks)
+
+    Returns:
+        BatchReport
+    """
+    start = time.perf_counter()
+    with metrics.run():
+        jobs = resume_scanner.get_job_descriptions(job_ids)
+        if not jobs:
+            raise ValueError("None of the given job IDs were found.")
+        model_name = resume_scanner.MODEL_NAME
+        if jobs_per_prompt is None:
+            jobs_per_prompt = PACKED_PROMPT_MODELS.get(model_name, 1)
+        jobs_per_prompt = max(1, min(jobs_per_prompt, len(jobs)))
+        max_concurrency = max_concurrency or resume_scanner.SCORING_MAX_CONCURRENCY
+
+        # Compact each job once up front; every prompt for that job reuses the result
+        compacted = {job_id: text_compaction.compact_job_description(text, model_name)
+                     for job_id, text in jobs.items()}
+        job_list = list(compacted)
+        groups = [job_list[i:i + jobs_per_prompt] for i in range(0, len(job_list), jobs_per_prompt)]
+
+        if model is None:
+            groq_api_key = resume_scanner._resolve_api_key(groq_api_key)
+            single = resume_scanner.get_scorer(groq_api_key)
+        else:
+            single = resume_scanner.CandidateScorer(model=model)
+        # Packed prompts share the single-job scorer's keep-alive connections
+        packed = (PackedJobScorer(groq_api_key=groq_api_key, model=model, http_client=single.http_client)
+                  if jobs_per_prompt > 1 else None)
+        rate_limiter = resume_scanner.get_rate_limiter(model_name)
+        resume_budget = text_compaction.token_budget(model_name, "resume")
+        job_budget = text_compaction.token_budget(model_name, "job")
+
+        # Both the resume and the jobs arrive compacted, so the scorers must not compact them again
+        def score_group(resume_text, group):
+            if len(group) == 1:
+                return [single.score(resume_text, compacted[group[0]], compact=False)]
+            results = packed.score(resume_text, [compacted[job_id] for job_id in group], compact=False)
+            # Fill in any job the model skipped with a single-job prompt
+            return [result or single.score(resume_text, compacted[job_id], compact=False)
+                    for job_id, result in zip(group, results)]
+
+        report = BatchReport(len(jobs), jobs_per_prompt)
+        pairs_total = resume_scanner.count_candidates() * len(jobs)
+
+        def tasks():
+            # One pass over the resume pool for all jobs
+            for candidate_id, resume_text in resume_scanner.iter_candidates():
+                report.resumes += 1
+                # Compact each resume once, however many prompts it goes into
+                with metrics.span("compact"):
+                    resume_text = text_compaction.compact_resume(resume_text, model_name)
+                for group in groups:
+                    yield candidate_id, resume_text, group
+
+        pending_results = defaultdict(list)
+
+        def flush(job_id):
+            if pending_results[job_id] and not resume_scanner.save_match_results(job_id, pending_results[job_id]):
+                raise RuntimeError(f"Failed to save match results for job {job_id}")
+            pending_results[job_id] = []
+
+        task_iter = tasks()
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch-matcher") as executor:
+            def submit_next():
+                for candidate_id, resume_text, group in task_iter:
+                    tokens = (min(resume_scanner.estimate_tokens(resume_text), resume_budget)
+                              + job_budget * len(group))
+                    future = executor.submit(metrics.propagate(resume_scanner._score_with_retry), score_group,
+                                             resume_text, group, rate_limiter, resume_scanner.SCORING_MAX_RETRIES,
+                                             tokens)
+                    in_flight[future] = (candidate_id, group)
+                    return True
+                return False
+
+            while len(in_flight) < max_concurrency and submit_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate_id, group = in_flight.pop(future)
+                    submit_next()
+                    report.prompts += 1
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        print(f"Error analyzing candidate {candidate_id}: {str(e)}")
+                        report.failed_pairs += len(group)
+                        continue
+                    for job_id, result in zip(group, results):
+                        pending_results[job_id].append({
+                            "candidate_id": candidate_id,
+                            "match_percentage": result.match_percentage,
+                            "summary": result.summary,
+                        })
+                        report.pairs += 1
+                        if len(pending_results[job_id]) >= BATCH_SAVE_SIZE:
+                            flush(job_id)
+                    if on_progress:
+                        on_progress(report.pairs + report.failed_pairs, pairs_total)
+
+        for job_id in job_list:
+            flush(job_id)
+        report.seconds = time.perf_counter() - start
+        metrics.write_jsonl({"event": "batch_match", "jobs": job_list, "pairs": report.pairs,
+                             "failed_pairs": report.failed_pairs, **metrics.summary()})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match the resume pool against several jobs in one pass.")
+    parser.add_argument("job_ids", nargs="*", help="job IDs to match")
+    parser.add_argument("--open-jobs", action="store_true", help="match every job whose position isn't fulfilled")
+    parser.add_argument("--jobs-per-prompt", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    job_ids = list(args.job_ids)
+    if args.open_jobs:
+        job_ids += get_open_job_ids()
+    if not job_ids:
+        parser.error("give at least one job ID or --open-jobs")
+
+    report = match_jobs(job_ids, jobs_per_prompt=args.jobs_per_prompt, max_concurrency=args.concurrency,
+                        on_progress=lambda done, total: print(f"\r{done}/{total} pairs", end="", flush=True))
+    print()
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Micro-benchmark for PDF/DOCX text extraction.
+
+Generates a corpus of synthetic resumes (text PDFs of increasing page count,
+including a 300-page outlier and image-only pages, plus DOCX files) and times
+the previous concatenating extractors against text_extraction with its caps
+disabled, so both produce the same text. The effect of the MAX_PDF_PAGES /
+MAX_RESUME_CHARS caps, which truncate the output, is reported separately:
+
+    python benchmarks/bench_extraction.py --copies 5
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+import text_extraction
+
+LINE = "Senior software engineer with Python, Kafka and PostgreSQL experience building data platforms."
+
+
+def legacy_extract_text_from_pdf(file):
+    pdf_reader = PdfReader(file)
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text()
+    return text
+
+
+def legacy_extract_text_from_docx(file):
+    doc = docx.Document(file)
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text
+
+
+def make_pdf(num_pages, image_only_every=0, lines_per_page=45):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    body = " Tj T* ".join(f"({LINE} {i})" for i in range(lines_per_page))
+    text_stream = f"BT /F1 9 Tf 12 TL 40 760 Td {body} Tj ET".encode("latin-1")
+
+    for page_number in range(num_pages):
+        page = writer.add_blank_page(612, 792)
+        if image_only_every and page_number % image_only_every == image_only_every - 1:
+            # Scanned page: no fonts, nothing for the text extractor to find
+            page[NameObject("/Resources")] = DictionaryObject()
+            continue
+        content = DecodedStreamObject()
+        content.set_data(text_stream)
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def make_docx(num_paragraphs):
+    document = docx.Document()
+    for i in range(num_paragraphs):
+        document.add_paragraph(f"{LINE} {i}")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def build_corpus(copies):
+    corpus = []
+    for _ in range(copies):
+        corpus += [("pdf", make_pdf(pages, image_only_every=4)) for pages in (1, 2, 5)]
+        corpus.append(("pdf", make_pdf(300)))
+        corpus += [("docx", make_docx(paragraphs)) for paragraphs in (50, 500, 5000)]
+    return corpus
+
+
+def uncapped_pdf(file):
+    return text_extraction.extract_text_from_pdf(file, max_pages=0, max_chars=0, max_bytes=0)
+
+
+def uncapped_docx(file):
+    return text_extraction.extract_text_from_docx(file, max_chars=0, max_bytes=0)
+
+
+def run(corpus, pdf_extractor, docx_extractor):
+    start = time.perf_counter()
+    texts = []
+    for kind, data in corpus:
+        extractor = pdf_extractor if kind == "pdf" else docx_extractor
+        texts.append(extractor(io.BytesIO(data)))
+    return time.perf_counter() - start, texts
+
+
+def same_text(legacy_texts, new_texts):
+    """The new PDF extractor separates pages with a newline; apart from that the output must match."""
+    return all(legacy.replace("\n", "") == new.replace("\n", "") for legacy, new in zip(legacy_texts, new_texts))
+
+
+def report(name, seconds, texts, baseline=None):
+    chars = sum(len(text) for text in texts)
+    line = f"{name:<16} {seconds:8.2f}s  {chars:>12,} chars"
+    if baseline:
+        line += f"  ({baseline / seconds:.2f}x)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=3, help="copies of the base corpus to generate")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.copies)
+    print(f"corpus: {len(corpus)} files, {sum(len(data) for _, data in corpus) / 1e6:.1f} MB")
+
+    legacy_seconds, legacy_texts = run(corpus, legacy_extract_text_from_pdf, legacy_extract_text_from_docx)
+    uncapped_seconds, uncapped_texts = run(corpus, uncapped_pdf, uncapped_docx)
+    capped_seconds, capped_texts = run(corpus, text_extraction.extract_text_from_pdf,
+                                       text_extraction.extract_text_from_docx)
+
+    print("Same output, legacy vs current extractor without caps:")
+    report("legacy", legacy_seconds, legacy_texts)
+    report("current", uncapped_seconds, uncapped_texts, baseline=legacy_seconds)
+    print(f"  text matches: {'yes' if same_text(legacy_texts, uncapped_texts) else 'NO'}")
+    print(f"Cap effect (MAX_PDF_PAGES={text_extraction.MAX_PDF_PAGES}, "
+          f"MAX_RESUME_CHARS={text_extraction.MAX_RESUME_CHARS:,}), truncated output:")
+    report("current, capped", capped_seconds, capped_texts, baseline=uncapped_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+End-to-end pipeline benchmark on a synthetic corpus.
+
+Starts a throwaway Postgres cluster (see pg_cluster.py), then for each scale
+ingests that many synthetic PDF/DOCX resumes (see corpus.py) and times every
+stage of a match run:
+
+- ingest: ingest.ingest_files over the generated files
+- get_all_candidates: streaming the whole pool out of Postgres
+- scoring: score_candidates with the fake LLM backend (latency, jitter and
+  error rates are configurable; at most --score-limit candidates)
+- save_match_results: upserting one match per resume for a job
+- ranking: the first and the tenth page of get_ranked_matches
+- list_jobs / get_job_description: the jobs page queries, uncached
+
+Each stage records p50/p95 latency over its repetitions, rows/sec and the
+peak RSS of this process while it ran. Results go to JSON and can be compared
+against an earlier run:
+
+    python benchmarks/bench_pipeline.py --scales 1000 10000 100000 --output pipeline.json
+    python benchmarks/bench_pipeline.py --scales 1000 10000 --baseline pipeline.json --threshold 20
+
+With --threshold the script exits non-zero when any p95 grows, or any
+rows/sec drops, by more than that percentage.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import corpus
+from pg_cluster import TempCluster
+
+import db
+import dedup
+import ingest
+import jobs
+import resume_scanner
+import scoring_backends
+
+RANKING_PAGE_SIZE = 20
+
+
+class PeakRSS:
+    """Samples this process's resident set size on a background thread while the block runs."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+
+    @staticmethod
+    def current_bytes():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            # No procfs (macOS): fall back to the lifetime peak, reported in bytes there
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_bytes = self.current_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+
+class TimedBackend(scoring_backends.ScoringBackend):
+    """Wraps a backend and records the latency of every score call."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name, self.model_name = backend.name, backend.model_name
+        self.cacheable, self.rate_limited = backend.cacheable, backend.rate_limited
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def score(self, resume_text, job_description):
+        start = time.perf_counter()
+        try:
+            return self.backend.score(resume_text, job_description)
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def stage_result(latencies, rows, seconds, peak_rss_bytes, **extra):
+    return {
+        "runs": len(latencies),
+        "seconds": seconds,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "rows": rows,
+        "rows_per_s": rows / seconds if seconds else None,
+        "peak_rss_mb": peak_rss_bytes / 2**20,
+        **extra,
+    }
+
+
+def measure(fn, repeat, rows):
+    """Runs fn `repeat` times; rows/sec is based on the median run."""
+    latencies = []
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - start)
+    return stage_result(latencies, rows, percentile(latencies, 50), rss.peak_bytes)
+
+
+def seed_jobs(count, seed):
+    """Inserts count synthetic job descriptions. Returns their ids, newest first."""
+    now = datetime.now()
+    rows = []
+    for index in range(count):
+        text = corpus.make_job_description(index, seed)
+        content_hash, simhash, simhash_bands = dedup.fingerprint(text)
+        rows.append((uuid.uuid4(), text, jobs.make_snippet(text), content_hash, simhash, simhash_bands,
+                     index % 3 == 0, now - timedelta(minutes=index)))
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany("""
+            INSERT INTO job_descriptions
+            (job_id, job_description, description_snippet, content_hash, simhash, simhash_bands,
+             position_fulfilled, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+            """, rows)
+        conn.commit()
+    return [row[0] for row in rows]
+
+
+def run_scale(scale, corpus_dir, args):
+    results = {}
+    job_ids = seed_jobs(args.jobs, args.seed)
+    job_id = job_ids[0]
+    job_description = resume_scanner.get_job_descriptions([job_id])[job_id]
+
+    report = ingest.IngestReport()
+    files = itertools.islice(ingest.iter_source_files(corpus_dir), scale)
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        ingest.ingest_files(files, workers=args.workers, report=report)
+        seconds = time.perf_counter() - start
+    results["ingest"] = stage_result([seconds], report.inserted, seconds, rss.peak_bytes,
+                                     stage_seconds=report.seconds, failed=len(report.failed))
+
+    results["get_all_candidates"] = measure(resume_scanner.get_all_candidates, args.repeat, scale)
+
+    backend = TimedBackend(scoring_backends.FakeBackend(latency=args.latency, jitter=args.jitter,
+                                                        error_rate=args.error_rate,
+                                                        rate_limit_rate=args.rate_limit_rate, seed=args.seed))
+    candidates = list(itertools.islice(resume_scanner.iter_candidates(), args.score_limit))
+    matches = []
+    errors = 0
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        for candidate_id, _, match_result, error in resume_scanner.score_candidates(
+                candidates, job_description, max_concurrency=args.concurrency, backend=backend):
+            if error is not None:
+                errors += 1
+                continue
+            matches.append(candidate_id)
+        seconds = time.perf_counter() - start
+    results["scoring"] = stage_result(backend.latencies or [0.0], len(matches), seconds, rss.peak_bytes,
+                                      errors=errors, concurrency=args.concurrency)
+
+    # One match per resume, so the write and the ranking queries run at full scale
+    with db.connection() as conn:
+        candidate_ids = [row[0] for row in conn.execute("SELECT candidate_id FROM candidate_resumes").fetchall()]
+    candidate_matches = [
+        {"candidate_id": candidate_id, "match_percentage": (i * 7919) % 10000 / 100,
+         "summary": "Synthetic match summary for benchmarking."}
+        for i, candidate_id in enumerate(candidate_ids)
+    ]
+    results["save_match_results"] = measure(lambda: resume_scanner.save_match_results(job_id, candidate_matches),
+                                            args.repeat, len(candidate_matches))
+
+    results["ranking_first_page"] = measure(lambda: resume_scanner.get_ranked_matches(job_id, RANKING_PAGE_SIZE),
+                                            args.query_repeat, RANKING_PAGE_SIZE)
+    cursor = None
+    for _ in range(9):
+        page = resume_scanner.get_ranked_matches(job_id, RANKING_PAGE_SIZE, after=cursor)
+        cursor = page[-1]["page_cursor"] if page else cursor
+    results["ranking_page_10"] = measure(
+        lambda: resume_scanner.get_ranked_matches(job_id, RANKING_PAGE_SIZE, after=cursor),
+        args.query_repeat, RANKING_PAGE_SIZE,
+    )
+
+    def list_jobs_uncached():
+        jobs.list_jobs.clear()
+        jobs.list_jobs(RANKING_PAGE_SIZE, fulfilled=False)
+
+    results["list_jobs"] = measure(list_jobs_uncached, args.query_repeat, RANKING_PAGE_SIZE)
+    results["get_job_description"] = measure(lambda: jobs.get_job_description(job_ids[-1]), args.query_repeat, 1)
+    return results
+
+
+def print_results(scale, results):
+    print(f"\n{scale:,} resumes")
+    print(f"  {'stage':<22} {'p50 ms':>10} {'p95 ms':>10} {'rows/s':>12} {'peak RSS':>10}")
+    for stage, result in results.items():
+        rate = f"{result['rows_per_s']:,.0f}" if result["rows_per_s"] else "-"
+        print(f"  {stage:<22} {result['p50_ms']:10.1f} {result['p95_ms']:10.1f} {rate:>12} "
+              f"{result['peak_rss_mb']:8.0f}MB")
+
+
+def compare(results, baseline, threshold=None):
+    """Prints changes against a baseline run. Returns the regressions beyond threshold percent."""
+    regressions = []
+    print("\nchange vs baseline:")
+    for scale, stages in results["scales"].items():
+        for stage, result in stages.items():
+            previous = baseline.get("scales", {}).get(scale, {}).get(stage)
+            if not previous:
+                continue
+            changes = {}
+            for key, worse_when_higher in (("p50_ms", True), ("p95_ms", True), ("rows_per_s", False)):
+                if previous.get(key) and result.get(key) is not None:
+                    changes[key] = (result[key] - previous[key]) / previous[key] * 100
+            print(f"  {scale:>7} {stage:<22} " + "  ".join(f"{key} {change:+.0f}%" for key, change in changes.items()))
+            if threshold is not None:
+                if changes.get("p95_ms", 0) > threshold or changes.get("rows_per_s", 0) < -threshold:
+                    regressions.append(f"{scale} {stage}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="resumes per run")
+    parser.add_argument("--jobs", type=int, default=200, help="job descriptions per run")
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx"], choices=["pdf", "docx"])
+    parser.add_argument("--workers", type=int, default=None, help="ingestion processes (default: CPU count)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the bulk stages")
+    parser.add_argument("--query-repeat", type=int, default=50, help="runs of the single-query stages")
+    parser.add_argument("--score-limit", type=int, default=2000, help="candidates scored per run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--partitions", type=int, default=None, help="hash-partition job_candidate_match")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="with --baseline, fail on regressions larger than this percentage")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {"started_at": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "args": vars(args)},
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="tm-corpus-") as corpus_dir, TempCluster() as cluster:
+        # Generated once at the largest scale; smaller runs ingest a prefix
+        start = time.perf_counter()
+        corpus.write_corpus(corpus_dir, max(args.scales), 0, args.formats, args.seed)
+        print(f"generated {max(args.scales):,} resumes in {time.perf_counter() - start:.1f}s")
+        cluster.load_schema(partitions=args.partitions)
+        cluster.configure_app()
+        for scale in sorted(args.scales):
+            cluster.truncate()
+            resume_scanner.match_cache.clear()
+            results["scales"][str(scale)] = run_scale(scale, corpus_dir, args)
+            print_results(scale, results["scales"][str(scale)])
+        db.get_pool().close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit("regressions beyond threshold: " + ", ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
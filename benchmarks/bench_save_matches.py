@@ -0,0 +1,100 @@
+"""
+Benchmark save_match_results against the previous one-statement-per-row loop.
+
+Needs a reachable Postgres configured through the usual DB_* environment
+variables, with the schema from migrate.py. Matches reference a placeholder
+job and placeholder resumes (the tables have foreign keys), which are all
+deleted afterwards.
+
+    python benchmarks/bench_save_matches.py --rows 1000 5000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import db
+import resume_scanner
+
+
+def save_match_results_row_by_row(job_id, candidate_matches):
+    """The original implementation: one INSERT ... ON CONFLICT round trip per match."""
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            for match in candidate_matches:
+                cursor.execute("""
+                INSERT INTO job_candidate_match
+                (job_id, candidate_id, match_score, match_summary, created_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (job_id, candidate_id)
+                DO UPDATE SET
+                    match_score = EXCLUDED.match_score,
+                    match_summary = EXCLUDED.match_summary,
+                    created_at = EXCLUDED.created_at;
+                """, (job_id, match['candidate_id'], match['match_percentage'], match['summary'], datetime.now()))
+            conn.commit()
+
+
+def create_fixture(num_rows):
+    """Inserts a placeholder job and num_rows placeholder resumes. Returns (job_id, candidate_ids)."""
+    job_id = uuid.uuid4()
+    candidate_ids = [uuid.uuid4() for _ in range(num_rows)]
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO job_descriptions (job_id, job_description) VALUES (%s, %s)",
+                           (job_id, "Benchmark job"))
+            with cursor.copy("COPY candidate_resumes (candidate_id, resume_text) FROM STDIN") as copy:
+                for candidate_id in candidate_ids:
+                    copy.write_row((candidate_id, "Benchmark resume"))
+        conn.commit()
+    return job_id, candidate_ids
+
+
+def drop_fixture(job_id, candidate_ids):
+    # Matches go with them through ON DELETE CASCADE
+    with db.connection() as conn:
+        conn.execute("DELETE FROM job_descriptions WHERE job_id = %s", (job_id,))
+        conn.execute("DELETE FROM candidate_resumes WHERE candidate_id = ANY(%s)", (candidate_ids,))
+
+
+def delete_job_rows(job_id):
+    with db.connection() as conn:
+        conn.execute("DELETE FROM job_candidate_match WHERE job_id = %s", (job_id,))
+
+
+def timed(fn, job_id, matches):
+    start = time.perf_counter()
+    fn(job_id, matches)
+    elapsed = time.perf_counter() - start
+    delete_job_rows(job_id)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'loop rows/s':>12} {'bulk rows/s':>12} {'speedup':>8}")
+    for num_rows in args.rows:
+        job_id, candidate_ids = create_fixture(num_rows)
+        matches = [
+            {"candidate_id": candidate_id, "match_percentage": i % 100, "summary": f"Synthetic summary {i}"}
+            for i, candidate_id in enumerate(candidate_ids)
+        ]
+        try:
+            loop_seconds = timed(save_match_results_row_by_row, job_id, matches)
+            bulk_seconds = timed(resume_scanner.save_match_results, job_id, matches)
+        finally:
+            drop_fixture(job_id, candidate_ids)
+        print(f"{num_rows:>8} {num_rows / loop_seconds:>12.0f} {num_rows / bulk_seconds:>12.0f} "
+              f"{loop_seconds / bulk_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
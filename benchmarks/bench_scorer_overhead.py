@@ -0,0 +1,69 @@
+"""
+Benchmark per-call overhead of building the scoring chain per candidate versus
+reusing a CandidateScorer.
+
+The chat model is a local stub with no latency, so the timings show only the
+setup cost: parser and prompt construction, format instructions and Groq
+client creation (the client is created but never called).
+
+    python benchmarks/bench_scorer_overhead.py --calls 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
+
+import resume_scanner
+
+STUB_RESPONSE = json.dumps({"summary": "Relevant experience.", "match_percentage": 64.0})
+RESUME = "Jane Doe\nBackend engineer, 6 years of Python, Django and PostgreSQL."
+JOB = "Senior Python engineer to build data APIs on PostgreSQL."
+
+
+def per_call_setup(stub_model):
+    """Mirrors the previous summarize_candidate: everything is rebuilt for each candidate."""
+    parser = PydanticOutputParser(pydantic_object=resume_scanner.CandidateMatch)
+    prompt = ChatPromptTemplate.from_template(resume_scanner.MATCH_PROMPT.messages[0].prompt.template)
+    ChatGroq(temperature=0.2, api_key="benchmark", model_name=resume_scanner.MODEL_NAME)
+    chain = prompt | stub_model | parser
+    return chain.invoke({
+        "resume_text": RESUME,
+        "job_description": JOB,
+        "format_instructions": parser.get_format_instructions(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    stub_model = FakeListChatModel(responses=[STUB_RESPONSE])
+    scorer = resume_scanner.CandidateScorer(model=stub_model)
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        per_call_setup(stub_model)
+    before = (time.perf_counter() - start) / args.calls
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        scorer.score(RESUME, JOB, compact=False)
+    after = (time.perf_counter() - start) / args.calls
+
+    print(f"per-call setup:   {before * 1000:8.3f} ms/call")
+    print(f"reused scorer:    {after * 1000:8.3f} ms/call")
+    print(f"overhead removed: {(before - after) * 1000:8.3f} ms/call ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
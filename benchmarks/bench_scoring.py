@@ -0,0 +1,84 @@
+"""
+Benchmark candidate scoring throughput against concurrency.
+
+Uses a local fake chat model with injected latency (and optional simulated 429
+responses) so no Groq calls are made:
+
+    python benchmarks/bench_scoring.py --candidates 200 --latency 0.5 --concurrency 1 4 8 16 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import resume_scanner
+
+FAKE_RESPONSE = json.dumps({
+    "summary": "The candidate has relevant experience with the required stack.",
+    "match_percentage": 72.5,
+})
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class SlowFakeChatModel(FakeListChatModel):
+    """Fake chat model that sleeps to emulate network + inference latency."""
+    latency: float = 0.5
+    jitter: float = 0.1
+    rate_limit_probability: float = 0.0
+
+    def _call(self, *args, **kwargs):
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        if random.random() < self.rate_limit_probability:
+            raise FakeRateLimitError("429 Too Many Requests (simulated)")
+        return super()._call(*args, **kwargs)
+
+
+def run(num_candidates, concurrency, model):
+    candidates = [(i, f"Candidate {i}\nPython developer with {i % 10} years experience.") for i in range(num_candidates)]
+
+    score_fn = resume_scanner.CandidateScorer(model=model).score
+
+    errors = 0
+    start = time.perf_counter()
+    for _, _, _, error in resume_scanner.score_candidates(
+        candidates, "Senior Python developer", max_concurrency=concurrency, score_fn=score_fn
+    ):
+        errors += error is not None
+    elapsed = time.perf_counter() - start
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean fake LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    model = SlowFakeChatModel(
+        responses=[FAKE_RESPONSE],
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_probability=args.rate_limit_probability,
+    )
+
+    print(f"{'concurrency':>12} {'seconds':>10} {'cand/sec':>10} {'errors':>8}")
+    for concurrency in args.concurrency:
+        elapsed, errors = run(args.candidates, concurrency, model)
+        print(f"{concurrency:>12} {elapsed:>10.2f} {args.candidates / elapsed:>10.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark the job description scraper against a local HTTP stub server.
+
+The stub serves job posting pages padded with navigation and footer
+boilerplate, adds a configurable latency per response and honours
+If-None-Match. The previous approach (sequential requests, one connection
+per page, full-page html.parser get_text) is timed against scraper.scrape_many
+with a cold cache, with cache revalidation (304s) and with fresh cache hits:
+
+    python benchmarks/bench_scraper.py --pages 40 --latency 0.2
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from bs4 import BeautifulSoup
+
+import scraper
+
+NAV = "".join(f"<li><a href='/section/{i}'>Section {i} of the careers site</a></li>" for i in range(400))
+FOOTER = "".join(f"<p>Footer link {i}: privacy, terms, cookies and accessibility.</p>" for i in range(300))
+DESCRIPTION = "".join(
+    f"<p>Responsibility {i}: build and operate Python services on PostgreSQL and Kafka.</p>" for i in range(40)
+)
+
+
+def make_page(number):
+    return (
+        f"<html><head><title>Job {number}</title><style>{'.x{color:red}' * 500}</style></head><body>"
+        f"<header><nav><ul>{NAV}</ul></nav></header>"
+        f"<main><h1>Senior Engineer #{number}</h1><div class='job-description'>{DESCRIPTION}</div></main>"
+        f"<footer>{FOOTER}</footer><script>{'var a=1;' * 2000}</script></body></html>"
+    ).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.requests_served += 1
+        time.sleep(self.latency)
+        body = make_page(self.path.rsplit("/", 1)[-1])
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def legacy_scrape(url):
+    """Mirrors the previous scrape_job_description: new connection, whole-page text."""
+    response = httpx.get(url, headers={"User-Agent": scraper.USER_AGENT})
+    soup = BeautifulSoup(response.text, "html.parser")
+    return soup.get_text(separator="\n", strip=True)
+
+
+def timed(label, fn, urls):
+    StubHandler.requests_served = 0
+    start = time.perf_counter()
+    texts = fn(urls)
+    seconds = time.perf_counter() - start
+    average_chars = sum(len(text) for text in texts) / len(texts)
+    print(f"{label:<28} {seconds:8.2f}s  {len(urls) / seconds:8.1f} pages/s  "
+          f"{average_chars:9,.0f} chars/page  {StubHandler.requests_served:4d} requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the stub waits before each response")
+    parser.add_argument("--per-host", type=int, default=None, help="override SCRAPER_PER_HOST_LIMIT")
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/jobs/{number}" for number in range(args.pages)]
+    if args.per_host:
+        scraper.SCRAPER_PER_HOST_LIMIT = args.per_host
+
+    def scrape_all(urls):
+        results = scraper.scrape_many(urls)
+        failed = [error for _, _, error in results if error]
+        if failed:
+            raise RuntimeError(failed[0])
+        return [text for _, text, _ in results]
+
+    print(f"parser: {scraper.HTML_PARSER}, per-host limit: {scraper.SCRAPER_PER_HOST_LIMIT}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        scraper.SCRAPER_CACHE_DIR = cache_dir
+        timed("sequential, full page", lambda urls: [legacy_scrape(url) for url in urls], urls)
+        timed("scrape_many, cold cache", scrape_all, urls)
+        scraper.SCRAPER_CACHE_TTL = 0
+        timed("scrape_many, revalidate", scrape_all, urls)
+        scraper.SCRAPER_CACHE_TTL = 3600
+        timed("scrape_many, fresh cache", scrape_all, urls)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
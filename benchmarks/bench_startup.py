@@ -0,0 +1,143 @@
+"""
+Benchmark app cold start.
+
+Three measurements, each in a fresh interpreter so nothing is already imported:
+
+- import time of each app module, from `python -X importtime`
+- first paint: one run of main.py through Streamlit's AppTest harness (the
+  home page, as a new browser session would see it) and a rerun
+- optionally (--server) the time until `streamlit run main.py` answers its
+  health endpoint
+
+Results can be written to JSON and compared against an earlier run:
+
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["db", "resume_upload_streamlit", "resume_scanner", "scoring_backends", "job_queue", "batch_match"]
+
+FIRST_PAINT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=120)
+app.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+print(json.dumps({"first_paint_s": first, "rerun_s": time.perf_counter() - start,
+                  "exceptions": [str(e.value) for e in app.exception]}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    return env
+
+
+def import_times(module, top):
+    """Returns (total seconds, [(self seconds, name)] heaviest imports) for importing module."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total = 0.0
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((int(self_us) / 1e6, name.strip()))
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    return total, sorted(imports, reverse=True)[:top]
+
+
+def first_paint():
+    result = subprocess.run([sys.executable, "-c", FIRST_PAINT_SCRIPT], cwd=ROOT, env=_env(),
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"AppTest run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def server_health(timeout=60):
+    """Seconds from launching `streamlit run` until /_stcore/health responds."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "main.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("streamlit did not become healthy in time")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per module")
+    parser.add_argument("--server", action="store_true", help="also time `streamlit run` until healthy")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file from an earlier run")
+    args = parser.parse_args()
+
+    results = {"imports_s": {}}
+    for module in MODULES:
+        total, heaviest = import_times(module, args.top)
+        results["imports_s"][module] = total
+        print(f"import {module:<24} {total * 1000:8.1f} ms")
+        for seconds, name in heaviest:
+            print(f"    {name:<40} {seconds * 1000:8.1f} ms self")
+
+    results.update(first_paint())
+    print(f"first paint (AppTest)         {results['first_paint_s'] * 1000:8.1f} ms")
+    print(f"rerun (AppTest)               {results['rerun_s'] * 1000:8.1f} ms")
+    for error in results["exceptions"]:
+        print(f"    exception: {error}")
+    if args.server:
+        results["server_health_s"] = server_health()
+        print(f"streamlit run -> healthy      {results['server_health_s'] * 1000:8.1f} ms")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print("\nchange vs baseline:")
+        flat = {**{f"import {k}": v for k, v in results["imports_s"].items()},
+                **{k: v for k, v in results.items() if k.endswith("_s")}}
+        flat_baseline = {**{f"import {k}": v for k, v in baseline.get("imports_s", {}).items()},
+                         **{k: v for k, v in baseline.items() if k.endswith("_s")}}
+        for name, value in flat.items():
+            if name in flat_baseline and flat_baseline[name]:
+                change = (value - flat_baseline[name]) / flat_baseline[name] * 100
+                print(f"  {name:<30} {flat_baseline[name] * 1000:8.1f} -> {value * 1000:8.1f} ms ({change:+.0f}%)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
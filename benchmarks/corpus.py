@@ -0,0 +1,174 @@
+"""
+Synthetic resume and job description corpus.
+
+Resumes have the usual sections (contact block, summary, dated work history,
+education, skills) drawn from a fixed vocabulary, so keyword search, profiles
+and the local scorer behave as they would on real data. Every document is a
+pure function of its index and the seed.
+
+Writes a corpus to disk for ingest.py or other tools:
+
+    python benchmarks/corpus.py /tmp/corpus --resumes 1000 --jobs 50 --formats pdf docx txt
+"""
+import argparse
+import io
+import os
+import random
+
+FIRST_NAMES = ("Aisha", "Ben", "Chen", "Diego", "Elena", "Farah", "Grace", "Hiro", "Ines", "Jonas", "Kavya", "Liam",
+               "Maya", "Noah", "Olga", "Priya", "Quinn", "Rosa", "Sami", "Tara", "Umar", "Vera", "Wei", "Yusuf")
+LAST_NAMES = ("Adeyemi", "Brown", "Costa", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad", "Ito", "Jensen",
+              "Kowalski", "Lopez", "Mehta", "Nguyen", "Okafor", "Petrov", "Rossi", "Schmidt", "Tanaka", "Walsh")
+TITLES = ("Software Engineer", "Senior Software Engineer", "Data Engineer", "Data Scientist", "Backend Developer",
+          "Frontend Developer", "DevOps Engineer", "Machine Learning Engineer", "Platform Engineer", "Data Analyst",
+          "Engineering Manager", "Site Reliability Engineer")
+COMPANIES = ("Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Analytics",
+             "Soylent Systems", "Vandelay Tech", "Pied Piper")
+SKILLS = ("python", "java", "go", "typescript", "react", "node.js", "c++", "c#", "sql", "postgresql", "mysql",
+          "mongodb", "redis", "kafka", "spark", "airflow", "dbt", "snowflake", "aws", "gcp", "azure", "docker",
+          "kubernetes", "terraform", "pandas", "pytorch", "tensorflow", "scikit-learn", "fastapi", "django",
+          "graphql", "ci/cd", "linux", "machine learning", "elasticsearch", "rabbitmq")
+VERBS = ("Built", "Designed", "Led", "Migrated", "Optimized", "Maintained", "Scaled", "Automated", "Shipped")
+OBJECTS = ("a real-time ingestion pipeline", "the billing service", "an internal analytics platform",
+           "customer-facing APIs", "the recommendation engine", "batch ETL jobs", "the search backend",
+           "observability dashboards", "a feature store", "the mobile app backend")
+OUTCOMES = ("cutting latency by {n}%", "serving {n}k requests per second", "reducing costs by {n}%",
+            "for {n} million users", "with {n}% fewer incidents")
+DEGREES = ("B.S. Computer Science", "M.S. Computer Science", "B.Tech Information Technology",
+           "M.S. Data Science", "B.E. Electrical Engineering", "Ph.D. Statistics")
+UNIVERSITIES = ("State University", "Institute of Technology", "University of Somewhere", "Polytechnic University")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def make_resume(index, seed=0):
+    rng = random.Random(f"resume-{seed}-{index}")
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, rng.randint(5, 12))
+    lines = [
+        f"{first} {last}",
+        rng.choice(TITLES),
+        f"{first.lower()}.{last.lower()}{index}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 20)} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Work Experience",
+    ]
+    year = 2025
+    for _ in range(rng.randint(1, 4)):
+        start_year = year - rng.randint(1, 4)
+        end = "Present" if year == 2025 else f"{rng.choice(MONTHS)} {year}"
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}, {rng.choice(MONTHS)} {start_year} - {end}")
+        for _ in range(rng.randint(2, 5)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)} and "
+                         f"{rng.choice(skills)}, {outcome}")
+        year = start_year
+    lines += [
+        "",
+        "Education",
+        f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)}, {year - 4} - {year}",
+        "",
+        "Skills",
+        ", ".join(skills),
+    ]
+    return "\n".join(lines)
+
+
+def make_job_description(index, seed=0):
+    rng = random.Random(f"job-{seed}-{index}")
+    skills = rng.sample(SKILLS, rng.randint(4, 8))
+    lines = [
+        f"{rng.choice(TITLES)} (#{index})",
+        f"{rng.choice(COMPANIES)} is hiring.",
+        "",
+        "Responsibilities",
+    ]
+    lines += [f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)}" for _ in range(rng.randint(3, 6))]
+    lines += ["", "Requirements", f"- {rng.randint(2, 10)}+ years of professional experience"]
+    lines += [f"- Strong experience with {skill}" for skill in skills]
+    lines += ["", "Equal opportunity employer. Privacy policy."]
+    return "\n".join(lines)
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def to_pdf(text, lines_per_page=50):
+    """A minimal text PDF (Helvetica, one Tj per line) that pypdf can extract again."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    lines = text.splitlines() or [""]
+    for start in range(0, len(lines), lines_per_page):
+        body = " Tj T* ".join(f"({_pdf_escape(line)})" for line in lines[start:start + lines_per_page])
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 9 Tf 12 TL 40 760 Td {body} Tj ET".encode("latin-1", errors="replace"))
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def to_docx(text):
+    import docx
+
+    document = docx.Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+ENCODERS = {
+    "pdf": to_pdf,
+    "docx": to_docx,
+    "txt": lambda text: text.encode("utf-8"),
+}
+
+
+def iter_resume_files(count, formats=("pdf", "docx"), seed=0):
+    """Yields (file_name, file_bytes), cycling through formats, as ingest.ingest_files expects."""
+    for index in range(count):
+        file_format = formats[index % len(formats)]
+        yield f"resume_{index:07d}.{file_format}", ENCODERS[file_format](make_resume(index, seed))
+
+
+def write_corpus(directory, resumes, jobs, formats=("pdf", "docx"), seed=0):
+    os.makedirs(os.path.join(directory, "resumes"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "jobs"), exist_ok=True)
+    for file_name, data in iter_resume_files(resumes, formats, seed):
+        with open(os.path.join(directory, "resumes", file_name), "wb") as f:
+            f.write(data)
+    for index in range(jobs):
+        with open(os.path.join(directory, "jobs", f"job_{index:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write(make_job_description(index, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--resumes", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx"], choices=sorted(ENCODERS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_corpus(args.directory, args.resumes, args.jobs, args.formats, args.seed)
+    print(f"wrote {args.resumes} resumes and {args.jobs} job descriptions to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
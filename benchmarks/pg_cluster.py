@@ -0,0 +1,122 @@
+"""
+Throwaway local Postgres cluster for benchmarks.
+
+Runs initdb into a temporary directory and starts a server listening only on
+a Unix socket in that directory, so no Docker, port or existing database is
+needed. The Postgres binaries are found on PATH, in PG_BIN or in the usual
+Debian/Homebrew locations.
+
+    with TempCluster() as cluster:
+        cluster.configure_app()   # point db.py at it
+        ...
+"""
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+
+import psycopg
+
+DATABASE = "talentmatch_bench"
+USER = "bench"
+
+# Settings for a disposable cluster: durability off, enough memory for 100k-row runs
+SERVER_SETTINGS = {
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    "shared_buffers": "256MB",
+    "max_connections": "50",
+    "listen_addresses": "",
+}
+
+
+def find_pg_bin():
+    candidates = [os.getenv("PG_BIN")] if os.getenv("PG_BIN") else []
+    on_path = shutil.which("initdb")
+    if on_path:
+        candidates.append(os.path.dirname(on_path))
+    candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True)
+    candidates += sorted(glob.glob("/opt/homebrew/opt/postgresql*/bin") + glob.glob("/usr/local/opt/postgresql*/bin"),
+                         reverse=True)
+    for directory in candidates:
+        if os.path.exists(os.path.join(directory, "initdb")):
+            return directory
+    raise RuntimeError("Postgres binaries not found; install PostgreSQL or set PG_BIN to the directory with initdb")
+
+
+class TempCluster:
+    def __init__(self, pg_bin=None):
+        self.pg_bin = pg_bin or find_pg_bin()
+        self.directory = None
+
+    @property
+    def data_dir(self):
+        return os.path.join(self.directory, "data")
+
+    @property
+    def socket_dir(self):
+        return self.directory
+
+    def _run(self, program, *args):
+        subprocess.run([os.path.join(self.pg_bin, program), *args], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def start(self):
+        # Short path: Unix socket paths are limited to ~100 characters
+        self.directory = tempfile.mkdtemp(prefix="tm-pg-")
+        self._run("initdb", "-D", self.data_dir, "-U", USER, "-A", "trust", "-E", "UTF8", "--locale=C", "--no-sync")
+        options = " ".join(f"-c {name}={value!r}" if value == "" else f"-c {name}={value}"
+                           for name, value in SERVER_SETTINGS.items())
+        self._run("pg_ctl", "-D", self.data_dir, "-l", os.path.join(self.directory, "server.log"), "-w",
+                  "-o", f"{options} -k {self.socket_dir}", "start")
+        with psycopg.connect(self.conninfo("postgres"), autocommit=True) as conn:
+            conn.execute(f"CREATE DATABASE {DATABASE}")
+        return self
+
+    def stop(self):
+        if self.directory is None:
+            return
+        try:
+            self._run("pg_ctl", "-D", self.data_dir, "-m", "immediate", "-w", "stop")
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def conninfo(self, database=DATABASE):
+        return f"host={self.socket_dir} dbname={database} user={USER}"
+
+    def load_schema(self, partitions=None):
+        """Creates the app's tables by running the migrations, optionally hash-partitioning matches."""
+        import migrate
+
+        migrate.migrate(self.conninfo())
+        if partitions:
+            migrate.partition_matches(partitions, self.conninfo())
+
+    def configure_app(self):
+        """Points db.py's connection settings at this cluster (call before the first query)."""
+        import db
+
+        # Trust authentication ignores the password, but the conninfo string needs a value
+        db.DB_HOST, db.DB_NAME, db.DB_USER, db.DB_PASSWORD, db.DB_PORT = self.socket_dir, DATABASE, USER, USER, 5432
+        os.environ.update(DB_HOST=self.socket_dir, DB_NAME=DATABASE, DB_USER=USER, DB_PASSWORD=USER, DB_PORT="5432")
+
+    def truncate(self):
+        """Empties every app table, e.g. between benchmark scales."""
+        with psycopg.connect(self.conninfo(), autocommit=True) as conn:
+            # Partitions are emptied through their parent; migration bookkeeping stays
+            tables = [row[0] for row in conn.execute("""
+                SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+                  AND c.relname <> 'schema_migrations'
+            """).fetchall()]
+            if tables:
+                conn.execute(f"TRUNCATE {', '.join(tables)}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
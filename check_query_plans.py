@@ -0,0 +1,131 @@
+"""
+Checks that the app's hot queries are served by indexes.
+
+Each query is EXPLAINed (not executed) against the configured database and the
+plan must use the expected index. By default sequential scans are disabled
+while planning, so the check answers "can an index serve this query?" even on
+a small or empty database where the planner would rightly prefer a seq scan.
+Run with --as-is against production-sized data to check the plans the
+planner actually picks:
+
+    python check_query_plans.py
+    python check_query_plans.py --as-is --verbose
+
+Exits non-zero when any query misses its index, e.g. after a migration drops
+or changes one.
+"""
+import argparse
+import sys
+import uuid
+from datetime import datetime
+
+import db
+import dedup
+import jobs
+import resume_scanner
+import search_index
+
+RANK_PAGE_SIZE = 20
+
+
+def hot_queries(job_id):
+    """(name, sql, params, expected index) for each query on a hot path."""
+    unscored_sql, unscored_params = resume_scanner._unscored_query("count(*)", job_id, None)
+    search_sql, search_params = search_index.search_filter("python kafka")
+    return [
+        ("get_ranked_matches, first page", *resume_scanner._ranked_matches_query(job_id, RANK_PAGE_SIZE),
+         "idx_job_candidate_match_job_score"),
+        ("get_ranked_matches, later page",
+         *resume_scanner._ranked_matches_query(job_id, RANK_PAGE_SIZE, after=(50, uuid.uuid4())),
+         "idx_job_candidate_match_job_score"),
+        ("count_unscored_candidates", unscored_sql, unscored_params, "job_candidate_match_pkey"),
+        ("list_jobs", *jobs._list_jobs_query(RANK_PAGE_SIZE), "idx_job_descriptions_listing"),
+        ("list_jobs, later page", *jobs._list_jobs_query(RANK_PAGE_SIZE, after=(datetime.now(), uuid.uuid4())),
+         "idx_job_descriptions_listing"),
+        ("list_jobs, open positions", *jobs._list_jobs_query(RANK_PAGE_SIZE, fulfilled=False),
+         "idx_job_descriptions_fulfilled_listing"),
+        ("get_job_description", "SELECT job_description FROM job_descriptions WHERE job_id = %s", (job_id,),
+         "job_descriptions_pkey"),
+        ("keyword search", f"SELECT candidate_id FROM candidate_resumes WHERE {search_sql}", search_params,
+         "idx_candidate_resumes_tsv"),
+        ("resume upload duplicate check", "SELECT candidate_id FROM candidate_resumes WHERE content_hash = %s",
+         ("0" * 64,), "idx_candidate_resumes_content_hash"),
+        ("near-duplicate job lookup", dedup.NEAR_DUPLICATE_JOBS_SQL,
+         (dedup.simhash_bands(dedup.simhash("Senior Python engineer, Kafka and PostgreSQL")),),
+         "idx_job_descriptions_simhash_bands"),
+        ("match cache lookup",
+         "SELECT cache_key, match_score, match_summary FROM llm_match_cache WHERE cache_key = ANY(%s)",
+         (["0" * 64, "1" * 64],), "llm_match_cache_pkey"),
+        ("worker claims a queued run",
+         "SELECT run_id FROM match_runs WHERE status = 'queued' ORDER BY created_at FOR UPDATE SKIP LOCKED LIMIT 1",
+         (), "idx_match_runs_queued"),
+        ("worker claims a queued batch",
+         "SELECT run_id, batch_no FROM match_run_batches WHERE status = 'queued' ORDER BY created_at, batch_no "
+         "FOR UPDATE SKIP LOCKED LIMIT 1", (), "idx_match_run_batches_queued"),
+    ]
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _parent_index_names(cursor):
+    """Maps each partition's index to the index it was created from on the partitioned table."""
+    cursor.execute("""
+    SELECT c.relname, p.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE c.relkind = 'i';
+    """)
+    return dict(cursor.fetchall())
+
+
+def check_plans(as_is=False, verbose=False):
+    """
+    EXPLAINs every hot query and compares the indexes used with the expected one.
+
+    Returns:
+        list: (name, ok, indexes used, plan node types) per query
+    """
+    results = []
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT job_id FROM job_descriptions LIMIT 1")
+            row = cursor.fetchone()
+            job_id = row[0] if row else uuid.uuid4()
+            parents = _parent_index_names(cursor)
+            if not as_is:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, sql, params, expected_index in hot_queries(job_id):
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0][0]["Plan"]
+                nodes = list(_plan_nodes(plan))
+                indexes = [node["Index Name"] for node in nodes if "Index Name" in node]
+                used = {parents.get(index, index) for index in indexes}
+                results.append((name, expected_index in used, sorted(used), [node["Node Type"] for node in nodes]))
+                if verbose:
+                    print(f"-- {name}\n{sql.strip()}\n{plan}\n")
+        conn.rollback()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that hot queries use their indexes.")
+    parser.add_argument("--as-is", action="store_true", help="plan with the planner's default settings")
+    parser.add_argument("--verbose", action="store_true", help="print every query and its plan")
+    args = parser.parse_args()
+
+    failures = 0
+    for name, ok, indexes, node_types in check_plans(as_is=args.as_is, verbose=args.verbose):
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<34} {', '.join(indexes) or ', '.join(dict.fromkeys(node_types))}")
+    if failures:
+        sys.exit(f"{failures} hot quer{'y' if failures == 1 else 'ies'} not served by the expected index")
+
+
+if __name__ == "__main__":
+    main()
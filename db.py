@@ -0,0 +1,120 @@
+"""
+Shared data-access helpers.
+
+All database access goes through one process-wide psycopg connection pool so
+Streamlit reruns and concurrent sessions reuse open connections instead of
+paying a TCP + auth handshake per query.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from dotenv import load_dotenv
+from psycopg_pool import ConnectionPool
+
+# Load environment variables
+load_dotenv(".env")
+
+# Database credentials
+DB_HOST = os.getenv("DB_HOST")
+DB_NAME = os.getenv("DB_NAME")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PASSWORD")
+DB_PORT = os.getenv("DB_PORT")
+
+# Pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))  # seconds before idle connections are closed
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+
+def get_conn_string():
+    return (
+        f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT} "
+        f"connect_timeout={DB_CONNECT_TIMEOUT}"
+    )
+
+
+@st.cache_resource
+def get_pool():
+    """Creates the connection pool once per process."""
+    return ConnectionPool(
+        get_conn_string(),
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        max_idle=DB_POOL_MAX_IDLE,
+        # Validate connections on checkout so a restarted server doesn't surface as a query error
+        check=ConnectionPool.check_connection,
+        name="talentmatch",
+        open=True,
+    )
+
+
+class PoolMetrics:
+    """Tracks how long callers wait for a pooled connection and how many are checked out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def checked_out(self, wait_seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.total_wait += wait_seconds
+            self.max_wait = max(self.max_wait, wait_seconds)
+
+    def returned(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "avg_wait_ms": 1000 * self.total_wait / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": 1000 * self.max_wait,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+@contextmanager
+def connection():
+    """
+    Borrows a connection from the shared pool.
+
+    The transaction is committed when the block exits normally and rolled back
+    if it raises; the connection is then returned to the pool.
+    """
+    start = time.perf_counter()
+    with get_pool().connection() as conn:
+        pool_metrics.checked_out(time.perf_counter() - start)
+        try:
+            yield conn
+        finally:
+            pool_metrics.returned()
+
+
+def pool_stats():
+    """Pool usage statistics from psycopg_pool combined with our checkout wait times."""
+    stats = dict(get_pool().get_stats())
+    stats.update(pool_metrics.snapshot())
+    return stats
@@ -0,0 +1,253 @@
+"""
+Duplicate detection for resumes and job descriptions.
+
+Two fingerprints are stored with every row:
+
+- content_hash: SHA-256 of the whitespace- and case-normalized text. A unique
+  index on it rejects exact re-uploads.
+- simhash: a 64-bit SimHash of word shingles. Texts that differ only in a few
+  words (a re-exported PDF, a re-scraped posting with a new date) land within a
+  small Hamming distance. The hash is also split into six bands stored in an
+  indexed array; two hashes within distance 5 always share a band, so the GIN
+  index finds near-duplicate candidates without scanning the table.
+
+Near-duplicate resumes are kept but point at the earlier copy through
+duplicate_of, and candidate streams skip them. Existing rows are fingerprinted
+and collapsed with:
+
+    python dedup.py backfill
+"""
+import argparse
+import hashlib
+import os
+
+import numpy as np
+
+import db
+
+SHINGLE_SIZE = 3
+# Bit widths of the simhash bands; hashes within len(bands) - 1 bits share at least one band
+SIMHASH_BAND_WIDTHS = (11, 11, 11, 11, 10, 10)
+NEAR_DUPLICATE_DISTANCE = min(int(os.getenv("NEAR_DUPLICATE_DISTANCE", "5")), len(SIMHASH_BAND_WIDTHS) - 1)
+BACKFILL_BATCH_SIZE = int(os.getenv("DEDUP_BACKFILL_BATCH_SIZE", "500"))
+
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def normalize_text(text):
+    """Whitespace- and case-insensitive form of a text, used for duplicate detection."""
+    return " ".join((text or "").split()).lower()
+
+
+def content_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text):
+    """
+    64-bit SimHash of a text's word shingles, as a signed integer (fits a BIGINT column).
+
+    Returns None for empty text.
+    """
+    words = normalize_text(text).split()
+    if not words:
+        return None
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+         for shingle in shingles],
+        dtype=np.uint64,
+    )
+    # Each bit of the fingerprint is the majority vote of that bit across shingles
+    bits = (hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(hashes)
+    value = sum(1 << int(position) for position in np.flatnonzero(votes))
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def simhash_bands(value):
+    """Band keys for the indexed simhash_bands column; the band number is part of each key."""
+    if value is None:
+        return None
+    value &= (1 << 64) - 1
+    bands = []
+    for band, width in enumerate(SIMHASH_BAND_WIDTHS):
+        bands.append((band << 16) | (value & ((1 << width) - 1)))
+        value >>= width
+    return bands
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+def fingerprint(text):
+    """Returns (content_hash, simhash, simhash_bands) for a text."""
+    value = simhash(text)
+    return content_hash(text), value, simhash_bands(value)
+
+
+# Jobs sharing a simhash band, through the GIN index (check_query_plans runs the same SQL). The cast stops
+# psycopg from sending smallint[], which has no && operator with the integer[] column, when all keys are small.
+NEAR_DUPLICATE_JOBS_SQL = (
+    "SELECT job_id, simhash FROM job_descriptions WHERE simhash_bands && %s::integer[] ORDER BY created_at"
+)
+
+
+def find_near_duplicate_job(cursor, text):
+    """Returns the job_id of a stored job description nearly identical to text, or None."""
+    value = simhash(text)
+    if value is None:
+        return None
+    cursor.execute(NEAR_DUPLICATE_JOBS_SQL, (simhash_bands(value),))
+    for job_id, other in cursor.fetchall():
+        if hamming_distance(value, other) <= NEAR_DUPLICATE_DISTANCE:
+            return job_id
+    return None
+
+
+def mark_near_duplicate_resumes(cursor, candidate_ids):
+    """
+    Points each of candidate_ids at an earlier, nearly identical resume through duplicate_of.
+
+    Candidates are looked up through the simhash_bands GIN index and confirmed
+    by Hamming distance; the oldest original wins.
+
+    Returns:
+        int: number of resumes marked as duplicates
+    """
+    if not candidate_ids:
+        return 0
+    cursor.execute("""
+    SELECT n.candidate_id, n.simhash, o.candidate_id, o.simhash
+    FROM candidate_resumes n
+    JOIN candidate_resumes o
+      ON o.simhash_bands && n.simhash_bands
+     AND o.duplicate_of IS NULL
+     AND (o.created_at, o.candidate_id) < (n.created_at, n.candidate_id)
+    WHERE n.candidate_id = ANY(%s) AND n.duplicate_of IS NULL
+    ORDER BY n.created_at, n.candidate_id, o.created_at, o.candidate_id;
+    """, (list(candidate_ids),))
+
+    originals = {}
+    for candidate_id, value, other_id, other in cursor.fetchall():
+        if candidate_id in originals:
+            continue
+        if hamming_distance(value, other) <= NEAR_DUPLICATE_DISTANCE:
+            # An original that was itself just marked resolves to its own original
+            originals[candidate_id] = originals.get(other_id, other_id)
+
+    cursor.executemany(
+        "UPDATE candidate_resumes SET duplicate_of = %s WHERE candidate_id = %s",
+        [(original, candidate_id) for candidate_id, original in originals.items()],
+    )
+    return len(originals)
+
+
+def _fingerprint_rows(cursor, table, key, text_column):
+    """Fills content_hash/simhash for rows stored before fingerprints existed. Returns the row count."""
+    total = 0
+    while True:
+        cursor.execute(
+            f"SELECT {key}, {text_column} FROM {table} WHERE simhash IS NULL AND {text_column} <> '' LIMIT %s",
+            (BACKFILL_BATCH_SIZE,),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return total
+        updates = []
+        for row_id, text in rows:
+            value = simhash(text) or 0
+            # content_hash is left NULL here; duplicates are collapsed before it is set
+            updates.append((value, simhash_bands(value), row_id))
+        cursor.executemany(f"UPDATE {table} SET simhash = %s, simhash_bands = %s WHERE {key} = %s", updates)
+        total += len(rows)
+
+
+def _collapse_exact(cursor, table, key, text_column, repoint):
+    """
+    Sets content_hash on rows missing it, deleting later exact copies of an already
+    hashed or earlier row. repoint(cursor, duplicate_id, original_id) moves references.
+
+    Returns:
+        int: number of rows deleted
+    """
+    cursor.execute(f"SELECT {key}, content_hash FROM {table} WHERE content_hash IS NOT NULL")
+    originals = {hash_value: row_id for row_id, hash_value in cursor.fetchall()}
+    cursor.execute(f"SELECT {key}, {text_column} FROM {table} WHERE content_hash IS NULL ORDER BY created_at, {key}")
+    deleted = 0
+    for row_id, text in cursor.fetchall():
+        hash_value = content_hash(text)
+        original = originals.get(hash_value)
+        if original is None:
+            originals[hash_value] = row_id
+            cursor.execute(f"UPDATE {table} SET content_hash = %s WHERE {key} = %s", (hash_value, row_id))
+            continue
+        repoint(cursor, row_id, original)
+        cursor.execute(f"DELETE FROM {table} WHERE {key} = %s", (row_id,))
+        deleted += 1
+    return deleted
+
+
+def _repoint_resume(cursor, duplicate_id, original_id):
+    # Keep the original's match where both were scored for a job
+    cursor.execute("""
+    DELETE FROM job_candidate_match d
+    WHERE d.candidate_id = %(duplicate)s
+      AND EXISTS (SELECT 1 FROM job_candidate_match o WHERE o.job_id = d.job_id AND o.candidate_id = %(original)s);
+    """, {"duplicate": duplicate_id, "original": original_id})
+    cursor.execute("UPDATE job_candidate_match SET candidate_id = %s WHERE candidate_id = %s", (original_id, duplicate_id))
+    cursor.execute("UPDATE candidate_resumes SET duplicate_of = %s WHERE duplicate_of = %s", (original_id, duplicate_id))
+
+
+def _repoint_job(cursor, duplicate_id, original_id):
+    cursor.execute("""
+    DELETE FROM job_candidate_match d
+    WHERE d.job_id = %(duplicate)s
+      AND EXISTS (SELECT 1 FROM job_candidate_match o WHERE o.candidate_id = d.candidate_id AND o.job_id = %(original)s);
+    """, {"duplicate": duplicate_id, "original": original_id})
+    cursor.execute("UPDATE job_candidate_match SET job_id = %s WHERE job_id = %s", (original_id, duplicate_id))
+    # Runs are tied to their job's corpus version; the original job's runs stand in for them
+    cursor.execute("DELETE FROM match_runs WHERE job_id = %s", (duplicate_id,))
+
+
+def backfill():
+    """Fingerprints existing rows, deletes exact duplicates and marks near-duplicate resumes."""
+    report = {}
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            report["resumes deleted (exact duplicates)"] = _collapse_exact(
+                cursor, "candidate_resumes", "candidate_id", "resume_text", _repoint_resume
+            )
+            report["jobs deleted (exact duplicates)"] = _collapse_exact(
+                cursor, "job_descriptions", "job_id", "job_description", _repoint_job
+            )
+            conn.commit()
+            report["resumes fingerprinted"] = _fingerprint_rows(cursor, "candidate_resumes", "candidate_id", "resume_text")
+            report["jobs fingerprinted"] = _fingerprint_rows(cursor, "job_descriptions", "job_id", "job_description")
+            conn.commit()
+
+            marked = 0
+            cursor.execute("SELECT candidate_id FROM candidate_resumes WHERE duplicate_of IS NULL ORDER BY created_at, candidate_id")
+            candidate_ids = [row[0] for row in cursor.fetchall()]
+            for i in range(0, len(candidate_ids), BACKFILL_BATCH_SIZE):
+                marked += mark_near_duplicate_resumes(cursor, candidate_ids[i:i + BACKFILL_BATCH_SIZE])
+                conn.commit()
+            report["resumes marked as near-duplicates"] = marked
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume and job description deduplication.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("backfill", help="fingerprint existing rows and collapse duplicates")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        for label, count in backfill().items():
+            print(f"{label}: {count}")
+
+
+if __name__ == "__main__":
+    main()
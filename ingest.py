@@ -0,0 +1,225 @@
+"""
+Batch resume ingestion.
+
+Reads resumes from a directory or zip archive, extracts text in a process pool,
+drops duplicates by content hash and bulk-inserts the rest with COPY:
+
+    python ingest.py /path/to/resumes.zip --workers 8
+
+The Streamlit uploader uses the same pipeline through ingest_files().
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+import retrieval
+# The pool workers run text_extraction.extract_file, which imports neither db nor Streamlit.
+# db (and through it Streamlit) is imported only where rows are written, so re-importing
+# this module as __main__ in spawned workers (macOS/Windows) stays light as well.
+from text_extraction import EXTRACTORS, extract_file
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+
+
+def iter_source_files(path):
+    """Yields (file_name, file_bytes) for every supported resume in a directory tree or zip archive."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and os.path.splitext(info.filename)[1].lower() in EXTRACTORS:
+                    yield info.filename, archive.read(info)
+        return
+
+    for root, _, files in os.walk(path):
+        for file_name in sorted(files):
+            if os.path.splitext(file_name)[1].lower() in EXTRACTORS:
+                with open(os.path.join(root, file_name), "rb") as f:
+                    yield file_name, f.read()
+
+
+class IngestReport:
+    """Counts and wall-clock time per pipeline stage."""
+
+    STAGES = ("read", "extract", "dedup", "embed", "insert")
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(self.STAGES, 0.0)
+        self.files = 0
+        self.failed = []
+        self.duplicates = 0
+        self.near_duplicates = 0
+        self.inserted = 0
+
+    def timed(self, stage, start):
+        self.seconds[stage] += time.perf_counter() - start
+
+    def throughput(self):
+        """Files per second handled by each stage."""
+        return {stage: self.files / seconds if seconds else None for stage, seconds in self.seconds.items()}
+
+    def __str__(self):
+        lines = [
+            f"files: {self.files}  inserted: {self.inserted}  duplicates: {self.duplicates}  "
+            f"near-duplicates: {self.near_duplicates}  failed: {len(self.failed)}"
+        ]
+        for stage, rate in self.throughput().items():
+            rate_text = f"{rate:,.1f} files/s" if rate else "-"
+            lines.append(f"  {stage:<8} {self.seconds[stage]:8.2f}s  {rate_text}")
+        return "\n".join(lines)
+
+
+def bulk_insert_resumes(resumes):
+    """
+    Inserts (resume_text, content_hash, embedding) tuples with COPY.
+
+    Rows whose content hash is already stored are skipped; inserted rows that
+    nearly match an earlier resume are marked through duplicate_of.
+
+    Returns:
+        tuple: (rows inserted, of which near-duplicates)
+    """
+    import db
+    import dedup
+    import profiles
+    import search_index
+
+    created_at = datetime.now()
+    embedding_model = retrieval.embedding_id()
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS candidate_resumes_staging
+            (LIKE candidate_resumes INCLUDING DEFAULTS) ON COMMIT DROP;
+            """)
+            with cursor.copy("""
+            COPY candidate_resumes_staging
+            (candidate_id, resume_text, content_hash, simhash, simhash_bands, resume_embedding, embedding_model,
+             search_terms, profile, created_at)
+            FROM STDIN
+            """) as copy:
+                for resume_text, content_hash, embedding in resumes:
+                    simhash = dedup.simhash(resume_text)
+                    # Heuristic profile only; the LLM pass runs later via `profiles.py backfill --llm`
+                    copy.write_row((uuid4(), resume_text, content_hash, simhash, dedup.simhash_bands(simhash),
+                                    embedding, embedding_model, search_index.normalize_terms(resume_text),
+                                    profiles.profile_for_insert(resume_text, use_llm=False), created_at))
+
+            cursor.execute("""
+            INSERT INTO candidate_resumes
+            (candidate_id, resume_text, content_hash, simhash, simhash_bands, resume_embedding, embedding_model,
+             search_terms, profile, created_at)
+            SELECT candidate_id, resume_text, content_hash, simhash, simhash_bands, resume_embedding, embedding_model,
+                   search_terms, profile, created_at
+            FROM candidate_resumes_staging
+            ON CONFLICT (content_hash) DO NOTHING
+            RETURNING candidate_id;
+            """)
+            inserted = [row[0] for row in cursor.fetchall()]
+            near_duplicates = dedup.mark_near_duplicate_resumes(cursor, inserted)
+            conn.commit()
+            return len(inserted), near_duplicates
+
+
+def _extract_batch(batch, executor):
+    if executor is None:
+        return [extract_file(item) for item in batch]
+    return list(executor.map(extract_file, batch, chunksize=max(1, len(batch) // 32)))
+
+
+def ingest_files(files, workers=None, batch_size=None, report=None):
+    """
+    Runs the ingestion pipeline over an iterable of (file_name, file_bytes).
+
+    Files are processed `batch_size` at a time so memory stays bounded for large
+    dumps. Pass workers=1 to extract in-process (e.g. for a handful of uploads).
+
+    Returns:
+        IngestReport
+    """
+    # Duplicate detection is shared with single uploads and the dedup backfill
+    import dedup
+
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    workers = workers or os.cpu_count() or 1
+    report = report or IngestReport()
+    seen_hashes = set()
+    # Spawned rather than forked: the Streamlit uploader calls this from a threaded
+    # server, and a forked child would inherit its locks and open connections
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) \
+        if workers > 1 else None
+    files = iter(files)
+
+    try:
+        while True:
+            start = time.perf_counter()
+            batch = []
+            for item in files:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+            report.timed("read", start)
+            if not batch:
+                return report
+            report.files += len(batch)
+
+            start = time.perf_counter()
+            extracted = _extract_batch(batch, executor)
+            report.timed("extract", start)
+
+            start = time.perf_counter()
+            unique = []
+            for file_name, text, error in extracted:
+                if error or not text or not text.strip():
+                    report.failed.append((file_name, error or "no text extracted"))
+                    continue
+                content_hash = dedup.content_hash(text)
+                if content_hash in seen_hashes:
+                    report.duplicates += 1
+                    continue
+                seen_hashes.add(content_hash)
+                unique.append((text, content_hash))
+            report.timed("dedup", start)
+
+            start = time.perf_counter()
+            vectors = retrieval.embed_texts(text for text, _ in unique)
+            rows = [(text, content_hash, retrieval.to_bytes(vector)) for (text, content_hash), vector in zip(unique, vectors)]
+            report.timed("embed", start)
+
+            start = time.perf_counter()
+            inserted, near_duplicates = bulk_insert_resumes(rows) if rows else (0, 0)
+            report.inserted += inserted
+            report.near_duplicates += near_duplicates
+            # Rows skipped by ON CONFLICT were already stored by an earlier upload
+            report.duplicates += len(rows) - inserted
+            report.timed("insert", start)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load resumes (PDF/DOCX) from a directory or zip archive.")
+    parser.add_argument("path", help="directory or .zip file containing resumes")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        sys.exit(f"No such file or directory: {args.path}")
+
+    start = time.perf_counter()
+    report = ingest_files(iter_source_files(args.path), workers=args.workers, batch_size=args.batch_size)
+    print(report)
+    for file_name, error in report.failed:
+        print(f"  failed: {file_name}: {error}")
+    print(f"total: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
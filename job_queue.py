@@ -0,0 +1,349 @@
+"""
+Background match runs.
+
+Match runs are queued in the `match_runs` table and executed by worker
+processes, so a run survives browser tabs closing and Streamlit reruns.
+The first worker to claim a run splits its resumes into candidate_id ranges
+of MATCH_RUN_BATCH_SIZE (`match_run_batches`); every worker then claims
+batches with SELECT ... FOR UPDATE SKIP LOCKED, so adding worker processes
+speeds up a single large run as well as many small ones. Results are written
+to job_candidate_match as they go.
+Submitting the same job against an unchanged resume corpus returns the
+existing run instead of queueing the work twice.
+
+    python job_queue.py worker --processes 4
+    python job_queue.py submit <job_id> [--backend cascade]
+    python job_queue.py status <run_id>
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+
+import db
+import metrics
+import resume_scanner
+import scoring_backends
+
+RESULT_FLUSH_SIZE = int(os.getenv("MATCH_RUN_FLUSH_SIZE", "50"))
+RESULT_FLUSH_SECONDS = float(os.getenv("MATCH_RUN_FLUSH_SECONDS", "5"))
+POLL_INTERVAL = float(os.getenv("MATCH_RUN_POLL_INTERVAL", "2"))
+# Resumes per batch; each batch is claimed and scored by one worker
+MATCH_RUN_BATCH_SIZE = int(os.getenv("MATCH_RUN_BATCH_SIZE", "500"))
+# Batches whose worker hasn't reported progress for this long are handed to another worker
+STALE_RUN_SECONDS = int(os.getenv("MATCH_RUN_STALE_SECONDS", "600"))
+
+
+def get_corpus_version(job_id, backend_name=None):
+    """
+    Identifies what a run for this job would score: the resume corpus, the
+    job description's last change and the configuration of the scoring
+    backend (default SCORING_BACKEND).
+
+    Resumes are only appended, so the row count plus the newest created_at
+    changes whenever the corpus does.
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*), max(created_at) FROM candidate_resumes WHERE duplicate_of IS NULL")
+            count, newest = cursor.fetchone()
+            cursor.execute("SELECT COALESCE(updated_at, created_at) FROM job_descriptions WHERE job_id = %s", (job_id,))
+            row = cursor.fetchone()
+    newest = newest.isoformat() if newest else "-"
+    job_changed = row[0].isoformat() if row else "-"
+    return f"{count}:{newest}:{job_changed}:{scoring_backends.scoring_version(backend_name)}"
+
+
+def _find_run(cursor, job_id, corpus_version):
+    cursor.execute("""
+    SELECT run_id FROM match_runs
+    WHERE job_id = %s AND corpus_version = %s AND status IN ('queued', 'running', 'done')
+    ORDER BY created_at DESC
+    LIMIT 1;
+    """, (job_id, corpus_version))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def submit_match_run(job_id, backend_name=None):
+    """
+    Queues a match run for a job and returns its run_id.
+
+    The run is scored with backend_name ("cascade" or a backend name; default
+    SCORING_BACKEND) whichever worker executes it. If a run for the same job
+    and corpus version (see get_corpus_version) is already queued, running or
+    finished, its run_id is returned instead.
+    """
+    job_id = uuid.UUID(str(job_id))
+    backend_name = backend_name or scoring_backends.SCORING_BACKEND
+    corpus_version = get_corpus_version(job_id, backend_name)
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            run_id = _find_run(cursor, job_id, corpus_version)
+            if run_id:
+                return run_id
+            # The partial unique index on active runs settles races between concurrent submitters
+            cursor.execute("""
+            INSERT INTO match_runs (run_id, job_id, corpus_version, scoring_backend, status)
+            VALUES (%s, %s, %s, %s, 'queued')
+            ON CONFLICT DO NOTHING
+            RETURNING run_id;
+            """, (uuid.uuid4(), job_id, corpus_version, backend_name))
+            row = cursor.fetchone()
+            conn.commit()
+            return row[0] if row else _find_run(cursor, job_id, corpus_version)
+
+
+def get_run(run_id):
+    """Returns a run's status and progress as a dict, or None if it doesn't exist."""
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            SELECT run_id, job_id, scoring_backend, status, total, completed, failed, error, created_at, started_at, finished_at
+            FROM match_runs WHERE run_id = %s;
+            """, (run_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            columns = [column.name for column in cursor.description]
+            return dict(zip(columns, row))
+
+
+def requeue_stale_runs():
+    """Puts batches (and unsplit runs) abandoned by a crashed worker back in the queue."""
+    with db.connection() as conn:
+        cursor = conn.execute("""
+        UPDATE match_run_batches SET status = 'queued', worker = NULL
+        WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => %s);
+        """, (STALE_RUN_SECONDS,))
+        requeued = cursor.rowcount
+        # Runs claimed before batches existed
+        cursor = conn.execute("""
+        UPDATE match_runs r SET status = 'queued', worker = NULL
+        WHERE r.status = 'running' AND r.heartbeat_at < now() - make_interval(secs => %s)
+          AND NOT EXISTS (SELECT 1 FROM match_run_batches b WHERE b.run_id = r.run_id);
+        """, (STALE_RUN_SECONDS,))
+        return requeued + cursor.rowcount
+
+
+def claim_run(worker_name, batch_size=None):
+    """
+    Atomically claims the oldest queued run and splits its unscored resumes
+    into batches of batch_size for any worker to claim.
+
+    The split commits together with the claim, so a worker that dies halfway
+    leaves the run queued. A run with nothing to score is finished at once.
+
+    Returns:
+        tuple: (run_id, job_id, batch count), or None when no run is queued
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            UPDATE match_runs
+            SET status = 'running', worker = %s, started_at = now(), heartbeat_at = now()
+            WHERE run_id = (
+                SELECT run_id FROM match_runs
+                WHERE status = 'queued'
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING run_id, job_id;
+            """, (worker_name,))
+            row = cursor.fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            run_id, job_id = row
+            total = resume_scanner.count_unscored_candidates(job_id)
+            bounds = resume_scanner.unscored_batch_bounds(job_id, batch_size or MATCH_RUN_BATCH_SIZE)
+            cursor.executemany("""
+            INSERT INTO match_run_batches (run_id, batch_no, first_candidate_id, end_candidate_id)
+            VALUES (%s, %s, %s, %s);
+            """, [(run_id, batch_no, first, end) for batch_no, (first, end) in enumerate(bounds)])
+            if bounds:
+                cursor.execute("UPDATE match_runs SET total = %s WHERE run_id = %s", (total, run_id))
+            else:
+                cursor.execute("UPDATE match_runs SET total = 0, status = 'done', finished_at = now() WHERE run_id = %s",
+                               (run_id,))
+            conn.commit()
+            return run_id, job_id, len(bounds)
+
+
+def claim_batch(worker_name):
+    """
+    Atomically claims the oldest queued batch of any run.
+
+    Returns:
+        tuple: (run_id, job_id, scoring backend, batch_no, (first candidate_id, end candidate_id)), or None;
+        the backend is None for runs submitted without one
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            UPDATE match_run_batches b
+            SET status = 'running', worker = %s, heartbeat_at = now()
+            FROM match_runs r
+            WHERE r.run_id = b.run_id
+              AND (b.run_id, b.batch_no) = (
+                SELECT run_id, batch_no FROM match_run_batches
+                WHERE status = 'queued'
+                ORDER BY created_at, batch_no
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING b.run_id, r.job_id, r.scoring_backend, b.batch_no, b.first_candidate_id, b.end_candidate_id;
+            """, (worker_name,))
+            row = cursor.fetchone()
+            conn.commit()
+            if row is None:
+                return None
+            run_id, job_id, backend_name, batch_no, first, end = row
+            return run_id, job_id, backend_name, batch_no, (first, end)
+
+
+def _record_progress(run_id, batch_no, completed, failed):
+    """Adds a batch's newly analyzed resumes to its own and its run's counts."""
+    with db.connection() as conn:
+        conn.execute("""
+        UPDATE match_run_batches SET completed = completed + %s, failed = failed + %s, heartbeat_at = now()
+        WHERE run_id = %s AND batch_no = %s;
+        """, (completed, failed, run_id, batch_no))
+        conn.execute("""
+        UPDATE match_runs SET completed = completed + %s, failed = failed + %s, heartbeat_at = now()
+        WHERE run_id = %s;
+        """, (completed, failed, run_id))
+
+
+def finish_batch(run_id, batch_no, error=None):
+    """Marks a batch done (or failed) and finishes its run once no batch is left."""
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            # Serializes the last batches of a run, so exactly one of them sees the others finished
+            cursor.execute("SELECT 1 FROM match_runs WHERE run_id = %s FOR UPDATE", (run_id,))
+            cursor.execute("""
+            UPDATE match_run_batches SET status = %s, error = %s, heartbeat_at = now()
+            WHERE run_id = %s AND batch_no = %s;
+            """, ("failed" if error else "done", error, run_id, batch_no))
+            cursor.execute("""
+            UPDATE match_runs r
+            SET status = CASE WHEN f.error IS NULL THEN 'done' ELSE 'failed' END, error = f.error, finished_at = now()
+            FROM (SELECT min(error) AS error FROM match_run_batches WHERE run_id = %(run_id)s AND status = 'failed') f
+            WHERE r.run_id = %(run_id)s AND r.status = 'running'
+              AND NOT EXISTS (SELECT 1 FROM match_run_batches b
+                              WHERE b.run_id = %(run_id)s AND b.status IN ('queued', 'running'));
+            """, {"run_id": run_id})
+        conn.commit()
+
+
+def execute_batch(run_id, job_id, batch_no, candidate_range, backend_name=None):
+    """
+    Scores one batch's unscored resumes with the run's backend (default
+    SCORING_BACKEND), flushing results to job_candidate_match as they arrive.
+    """
+    job_description = resume_scanner.get_job_description(str(job_id))
+    if not job_description:
+        finish_batch(run_id, batch_no, error="Job description not found")
+        return
+
+    # Run-local metrics, so the batch's report counts only its own work
+    with metrics.run():
+        completed = failed = 0
+        pending = []
+        flushed_completed = flushed_failed = 0
+        last_flush = time.monotonic()
+
+        def flush():
+            nonlocal pending, last_flush, flushed_completed, flushed_failed
+            if pending and not resume_scanner.save_match_results(job_id, pending):
+                raise RuntimeError("Failed to save match results")
+            _record_progress(run_id, batch_no, completed - flushed_completed, failed - flushed_failed)
+            pending = []
+            flushed_completed, flushed_failed = completed, failed
+            last_flush = time.monotonic()
+
+        # Results are persisted as they arrive, so a requeued batch only scores what is still missing
+        candidates = metrics.timed_iter("fetch_candidates", resume_scanner.iter_unscored_candidates(
+            job_id, candidate_range=candidate_range))
+        for candidate_id, _, match_result, error in scoring_backends.score_with(
+            backend_name, candidates, job_description
+        ):
+            if error is not None:
+                failed += 1
+                print(f"Error analyzing candidate {candidate_id}: {str(error)}")
+            else:
+                completed += 1
+                pending.append({
+                    "candidate_id": candidate_id,
+                    "match_percentage": match_result.match_percentage,
+                    "summary": match_result.summary,
+                })
+            if len(pending) >= RESULT_FLUSH_SIZE or time.monotonic() - last_flush >= RESULT_FLUSH_SECONDS:
+                flush()
+        flush()
+        finish_batch(run_id, batch_no)
+        metrics.write_jsonl({"event": "match_run_batch", "run_id": run_id, "job_id": job_id, "batch_no": batch_no,
+                             "backend": backend_name or scoring_backends.SCORING_BACKEND, "completed": completed, "failed": failed, **metrics.summary()})
+
+
+def run_worker(poll_interval=POLL_INTERVAL, metrics_port=None):
+    """Claims and executes queued batches, splitting queued runs when none are left, until interrupted."""
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Match worker {worker_name} started")
+    if metrics.start_http_server(metrics_port):
+        print(f"Serving metrics on :{metrics_port or metrics.METRICS_PORT}/metrics")
+    while True:
+        requeue_stale_runs()
+        claimed = claim_batch(worker_name)
+        if claimed is None:
+            split = claim_run(worker_name)
+            if split is None:
+                time.sleep(poll_interval)
+            else:
+                print(f"Split match run {split[0]} for job {split[1]} into {split[2]} batches")
+            continue
+        run_id, job_id, backend_name, batch_no, candidate_range = claimed
+        print(f"Running batch {batch_no} of match run {run_id} for job {job_id}")
+        try:
+            execute_batch(run_id, job_id, batch_no, candidate_range, backend_name)
+        except Exception as e:
+            print(f"Batch {batch_no} of match run {run_id} failed: {str(e)}")
+            finish_batch(run_id, batch_no, error=str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background match-run queue.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    worker = subcommands.add_parser("worker", help="run worker processes")
+    worker.add_argument("--processes", type=int, default=1)
+    submit = subcommands.add_parser("submit", help="queue a match run for a job")
+    submit.add_argument("job_id")
+    submit.add_argument("--backend", help="scoring backend or cascade (default: SCORING_BACKEND)")
+    status = subcommands.add_parser("status", help="show a run's progress")
+    status.add_argument("run_id")
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        print(submit_match_run(args.job_id, args.backend))
+    elif args.command == "status":
+        print(get_run(uuid.UUID(args.run_id)))
+    elif args.processes == 1:
+        run_worker()
+    else:
+        # Each worker process has its own metrics registry, served on consecutive ports
+        processes = [
+            multiprocessing.Process(target=run_worker, daemon=True,
+                                    kwargs={"metrics_port": metrics.METRICS_PORT + i if metrics.METRICS_PORT else None})
+            for i in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
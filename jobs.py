@@ -0,0 +1,102 @@
+"""
+Job description listing and lookup.
+
+The jobs page lists postings a page at a time with keyset pagination on
+(created_at, job_id), reading only the short description_snippet stored at
+insert time. Full descriptions are fetched by id when a job is opened.
+This module stays free of the LLM stack so the jobs page loads quickly.
+"""
+import os
+import uuid
+
+import streamlit as st
+
+import db
+import metrics
+
+JOB_SNIPPET_CHARS = 200
+JOB_LIST_CACHE_TTL = int(os.getenv("JOB_LIST_CACHE_TTL", "60"))
+
+
+def make_snippet(job_description, max_chars=JOB_SNIPPET_CHARS):
+    """Whitespace-collapsed start of a job description, cut at a word boundary."""
+    text = " ".join((job_description or "")[:max_chars * 4].split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+# One page of the listing, also planned by check_query_plans. Rows stored before snippets existed fall back to
+# the first characters of the text.
+JOB_LIST_SQL = f"""
+SELECT job_id, created_at, position_fulfilled,
+       coalesce(description_snippet, left(job_description, {JOB_SNIPPET_CHARS}))
+FROM job_descriptions
+{{where}}
+ORDER BY created_at DESC, job_id DESC
+LIMIT %(limit)s
+"""
+
+
+def _list_jobs_query(limit, after=None, fulfilled=None):
+    conditions = []
+    params = {"limit": limit}
+    if fulfilled is not None:
+        conditions.append("position_fulfilled = %(fulfilled)s")
+        params["fulfilled"] = fulfilled
+    if after is not None:
+        conditions.append("(created_at, job_id) < (%(after_created_at)s, %(after_job_id)s)")
+        params["after_created_at"], params["after_job_id"] = after
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return JOB_LIST_SQL.format(where=where), params
+
+
+@st.cache_data(ttl=JOB_LIST_CACHE_TTL, show_spinner=False)
+def list_jobs(limit, after=None, fulfilled=None):
+    """
+    One page of jobs, newest first.
+
+    Args:
+        limit: page size
+        after: page_cursor of the last job on the previous page
+        fulfilled: True/False to show only filled/open positions, None for all
+
+    Returns:
+        list: dicts with job_id, created_at, position_fulfilled, snippet and page_cursor
+    """
+    with metrics.span("list_jobs"):
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(*_list_jobs_query(limit, after, fulfilled))
+                rows = cursor.fetchall()
+    return [
+        {
+            "job_id": job_id,
+            "created_at": created_at,
+            "position_fulfilled": position_fulfilled,
+            "snippet": make_snippet(snippet),
+            "page_cursor": (created_at, job_id),
+        }
+        for job_id, created_at, position_fulfilled, snippet in rows
+    ]
+
+
+def invalidate_job_list():
+    """Drops cached listing pages; call after adding or changing a job."""
+    list_jobs.clear()
+
+
+@metrics.span("get_job_description")
+def get_job_description(job_id):
+    """Fetch job description by job_id."""
+    try:
+        job_id = uuid.UUID(str(job_id))
+    except ValueError:
+        st.error("Invalid Job ID format. Please enter a valid UUID.")
+        return None
+
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT job_description FROM job_descriptions WHERE job_id = %s", (job_id,))
+            result = cursor.fetchone()
+            return result[0] if result else None
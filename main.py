@@ -1,9 +1,15 @@
 import streamlit as st
 import resume_upload_streamlit
-import resume_scanner, os
-from PIL import Image
+import os
+import db
+import metrics
+import time
+import heapq
 import streamlit as st
 
+# The LLM stack (resume_scanner, scoring_backends, job_queue, batch_match) is
+# imported by the pages that use it, so the home page renders without loading it
+
 st.set_page_config(
     page_title="TalentMatch AI",
     page_icon="🎯",
@@ -11,14 +17,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Static files are read once per process instead of on every rerun
+@st.cache_data(show_spinner=False)
+def read_static_file(file_path, mode="r"):
+    with open(file_path, mode) as f:
+        return f.read()
+
 def load_css(file_path):
-    with open(file_path, "r") as f:
-        css = f.read()
+    css = read_static_file(file_path)
     st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 load_css("styles/styles.css") 
 
-groq_api_key = os.environ['GROQ_API_KEY']
+groq_api_key = os.getenv('GROQ_API_KEY')
+
+# How often the candidates page polls a background match run
+MATCH_RUN_REFRESH_SECONDS = 2
+
+# Scoring engines selectable on the candidates page
+SCORING_BACKEND_LABELS = {
+    "groq": "AI analysis (Groq)",
+    "local": "Fast keyword match (offline)",
+    "cascade": "Tiered: quick screen, AI for borderline",
+}
+
+# Jobs shown per page on the jobs page, and its status filter
+JOBS_PAGE_SIZE = 20
+JOB_STATUS_FILTERS = {"All jobs": None, "Open positions": False, "Filled positions": True}
 
 # At the top of your main file
 if "initialized" not in st.session_state:
@@ -34,6 +59,65 @@ if "candidate_matches" not in st.session_state:
 if "job_id" not in st.session_state:
     st.session_state.job_id = None
 
+@st.cache_data(max_entries=100, show_spinner=False)
+def load_resume_text(candidate_id):
+    import resume_scanner
+
+    return resume_scanner.get_resume_text(candidate_id)
+
+
+@st.cache_data(max_entries=100, show_spinner=False)
+def load_job_description(job_id):
+    import jobs
+
+    return jobs.get_job_description(job_id)
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    """Serves Prometheus metrics on METRICS_PORT (once per process) when it is set."""
+    return metrics.start_http_server()
+
+start_metrics_server()
+
+def show_run_metrics(run_summary):
+    """Per-stage timings and counters recorded during one match run."""
+    with st.expander("⏱️ Run metrics"):
+        timings = {stage: values for stage, values in run_summary["stages"].items() if "total_s" in values}
+        st.table([
+            {"stage": stage, "calls": values["count"], "total (s)": round(values["total_s"], 3),
+             "mean (ms)": round(values["mean_ms"], 1)}
+            for stage, values in sorted(timings.items(), key=lambda item: -item[1]["total_s"])
+        ])
+        details = [f"{name}: {value:,}" for name, value in sorted(run_summary["counters"].items())]
+        details += [f"{name}: mean {values['mean']:,.0f}" for name, values in sorted(run_summary["stages"].items())
+                    if name not in timings]
+        if details:
+            st.caption(" · ".join(details))
+        show_cascade_tiers(run_summary)
+
+
+def show_cascade_tiers(run_summary):
+    """Per-tier breakdown of a cascade run: candidates scored, time, tokens and estimated cost."""
+    counters, stages = run_summary["counters"], run_summary["stages"]
+    if "cascade_fast_scored" not in counters:
+        return
+    st.markdown("**Scoring tiers**")
+    st.table([
+        {"tier": label, "candidates": counters.get(f"cascade_{tier}_scored", 0),
+         "time (s)": round(stages.get(f"cascade_{tier}", {}).get("total_s", 0.0), 2),
+         "tokens in": counters.get(f"cascade_{tier}_tokens_in", 0),
+         "tokens out": counters.get(f"cascade_{tier}_tokens_out", 0),
+         "est. cost ($)": round(counters.get(f"cascade_{tier}_cost_usd", 0.0), 4)}
+        for tier, label in (("fast", "Quick screen"), ("strong", "Escalated"))
+    ])
+
+def show_saved_matches(job_id, search_query=None):
+    """Switch the results view to the job's saved matches, ranked by the database."""
+    st.session_state.candidate_matches = None
+    st.session_state.show_saved_matches = True
+    st.session_state.match_search_query = search_query
+    st.session_state.match_page_cursors = [None]
+
 # Function to navigate pages
 def switch_page(page_name):
     if st.session_state.page != page_name:
@@ -42,7 +126,7 @@ def switch_page(page_name):
 
 
 def home_page():
-    logo_image = Image.open("assets/logo.png")
+    logo_image = read_static_file("assets/logo.png", "rb")
     col1, col2 = st.columns([1, 6])  # Adjust these values to get the right balance
 
     with col1:
@@ -98,6 +182,8 @@ def post_job_description_page():
         switch_page("main")
 
 def view_jobs_page():
+    import jobs
+
     st.markdown("<h1 class='main-header'>View All Jobs</h1>", unsafe_allow_html=True)
     
     st.markdown("""
@@ -106,16 +192,24 @@ def view_jobs_page():
         or select a job to find matching candidates.</p>
     </div>
     """, unsafe_allow_html=True)
-    
-    # Get all jobs from the database
+
+    # Filtering happens in Postgres, so changing it starts again from the first page
+    status_filter = st.selectbox("Show", list(JOB_STATUS_FILTERS), key="job_status_filter")
+    if "job_page_cursors" not in st.session_state or st.session_state.get("job_page_filter") != status_filter:
+        st.session_state.job_page_cursors = [None]
+        st.session_state.job_page_filter = status_filter
+    page_cursors = st.session_state.job_page_cursors
+
+    # Get one page of jobs from the database
     try:
-        all_jobs = resume_scanner.get_all_jobs()
+        page_jobs = jobs.list_jobs(JOBS_PAGE_SIZE, after=page_cursors[-1], fulfilled=JOB_STATUS_FILTERS[status_filter])
         
-        if not all_jobs or len(all_jobs) == 0:
+        if not page_jobs:
             st.warning("No jobs found in the database.")
         else:
             # Display jobs in a nice table
-            st.markdown("<h2 class='sub-header'>Available Jobs</h2>", unsafe_allow_html=True)
+            first_job = (len(page_cursors) - 1) * JOBS_PAGE_SIZE + 1
+            st.markdown(f"<h2 class='sub-header'>Available Jobs ({first_job}-{first_job + len(page_jobs) - 1})</h2>", unsafe_allow_html=True)
             
             # Create a container for the job cards
             st.markdown("<div class='job-card-container'>", unsafe_allow_html=True)
@@ -123,9 +217,9 @@ def view_jobs_page():
             # Split into columns for better layout
             cols = st.columns(2)
             
-            for i, (job_id, full_description) in enumerate(all_jobs):
-                # Generate a brief description (first ~50 words)
-                brief_description = " ".join(full_description.split()[:10]) + "..."
+            for i, job in enumerate(page_jobs):
+                job_id = job["job_id"]
+                status = "Filled" if job["position_fulfilled"] else "Open"
                 
                 # Alternate between columns
                 col_idx = i % 2
@@ -134,7 +228,8 @@ def view_jobs_page():
                     st.markdown(f"""
                     <div class="job-card">
                         <h3>Job ID: {job_id}</h3>
-                        <p>{brief_description}</p>
+                        <p><span class="highlight-text">{status}</span> · Posted {job["created_at"]:%Y-%m-%d}</p>
+                        <p>{job["snippet"]}</p>
                     </div>
                     """, unsafe_allow_html=True)
                     
@@ -142,7 +237,6 @@ def view_jobs_page():
                     button_cols = st.columns(2)
                     with button_cols[0]:
                         if st.button("View Details", key=f"view_full_{job_id}"):
-                            st.session_state.full_job_description = full_description
                             st.session_state.selected_job_id = job_id
                             st.rerun()
                     with button_cols[1]:
@@ -151,19 +245,54 @@ def view_jobs_page():
                             switch_page("view_candidates")
             
             st.markdown("</div>", unsafe_allow_html=True)
+
+            page_cols = st.columns(2)
+            with page_cols[0]:
+                if len(page_cursors) > 1 and st.button("⬅️ Previous", key="previous_jobs_page"):
+                    page_cursors.pop()
+                    st.rerun()
+            with page_cols[1]:
+                if len(page_jobs) == JOBS_PAGE_SIZE and st.button("Next ➡️", key="next_jobs_page"):
+                    page_cursors.append(page_jobs[-1]["page_cursor"])
+                    st.rerun()
             
-            # If a job is selected, display its full description
-            if hasattr(st.session_state, 'full_job_description') and hasattr(st.session_state, 'selected_job_id'):
-                st.markdown(f"<h2 class='sub-header'>Job Details for ID: {st.session_state.selected_job_id}</h2>", unsafe_allow_html=True)
+            # If a job is selected, fetch and display its full description
+            if st.session_state.get("selected_job_id"):
+                selected_job_id = st.session_state.selected_job_id
+                st.markdown(f"<h2 class='sub-header'>Job Details for ID: {selected_job_id}</h2>", unsafe_allow_html=True)
                 st.markdown(f"""
                 <div class="card full-job-description">
-                    {st.session_state.full_job_description}
+                    {load_job_description(selected_job_id)}
                 </div>
                 """, unsafe_allow_html=True)
                 
                 if st.button("Find Candidates for This Job", key="find_candidates_for_selected"):
-                    st.session_state.job_id = st.session_state.selected_job_id
+                    st.session_state.job_id = selected_job_id
                     switch_page("view_candidates")
+
+            # Match the resume pool against several jobs in one pass
+            st.markdown("<h2 class='sub-header'>Match Candidates for Several Jobs</h2>", unsafe_allow_html=True)
+            # Keep jobs picked on earlier pages selectable
+            batch_options = list(dict.fromkeys(
+                [job["job_id"] for job in page_jobs] + st.session_state.get("batch_job_ids", [])
+            ))
+            batch_job_ids = st.multiselect("Jobs to match", batch_options, key="batch_job_ids")
+            if st.button("🔍 Match Selected Jobs", key="batch_match_button", disabled=not batch_job_ids):
+                import batch_match
+
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+
+                def show_progress(pairs_done, pairs_total):
+                    progress_bar.progress(min(pairs_done / pairs_total, 1.0) if pairs_total else 1.0)
+                    status_text.text(f"Analyzed {pairs_done} of {pairs_total} candidate/job pairs...")
+
+                report = batch_match.match_jobs(batch_job_ids, groq_api_key=groq_api_key, on_progress=show_progress)
+                st.markdown(f"""
+                <div class="success-alert">
+                    Match results saved to database! {report}
+                </div>
+                """, unsafe_allow_html=True)
     
     except Exception as e:
         st.markdown(f"""
@@ -174,14 +303,17 @@ def view_jobs_page():
     
     # Back to Main Page
     if st.button("🏠 Back to Home Page", key="back_from_view_jobs"):
-        if hasattr(st.session_state, 'full_job_description'):
-            delattr(st.session_state, 'full_job_description')
-        if hasattr(st.session_state, 'selected_job_id'):
-            delattr(st.session_state, 'selected_job_id')
+        st.session_state.pop("selected_job_id", None)
         switch_page("main")
 
 
 def view_candidates_page():
+    import job_queue
+    import profiles
+    import resume_scanner
+    import scoring_backends
+    import search_index
+
     st.markdown("<h1 class='main-header'>Find Candidates for a Job</h1>", unsafe_allow_html=True)
     
     st.markdown("""
@@ -191,6 +323,23 @@ def view_candidates_page():
     </div>
     """, unsafe_allow_html=True)
 
+    with st.expander("🔎 Keyword search"):
+        keyword_query = st.text_input("Search resumes", key="keyword_search_input",
+                                      placeholder='"machine learning" AND (pytorch OR tensorflow)')
+        if keyword_query:
+            try:
+                hits = search_index.search_candidates(keyword_query, limit=25)
+            except Exception as e:
+                st.markdown(f"""
+                <div class="error-alert">
+                    Error searching resumes: {e}
+                </div>
+                """, unsafe_allow_html=True)
+                hits = []
+            st.caption(f"Top {len(hits)} matching resumes")
+            for candidate_id, resume_head, rank in hits:
+                st.markdown(f"**{profiles.extract_candidate_name(resume_head)}** · `{candidate_id}` · relevance {rank:.3f}")
+
     with st.form("job_form"):
         col1, col2, col3 = st.columns([2, 2, 1])
         with col1:
@@ -198,10 +347,25 @@ def view_candidates_page():
             job_id = st.text_input("Enter Job ID", key="job_id_input", 
                                    value=st.session_state.job_id if st.session_state.job_id else "",
                                    autocomplete="on")
+            search_query = st.text_input("Only resumes matching (optional)", key="search_query_input",
+                                         placeholder='python AND (django OR flask) -intern',
+                                         help="Keyword filter applied before scoring. Supports AND, OR, NOT, "
+                                              "-term, parentheses and \"quoted phrases\". Not applied to background runs.")
         with col2:
             num_candidates = st.slider("Top candidates to display", 1, 20, 5)
         with col3:
-            st.write("")  # Empty space for alignment
+            shortlist_size = st.number_input("Resumes to score with AI (0 = all)", min_value=0, value=50, step=10,
+                                             help="Pre-filters the pool by text similarity so only the closest resumes are sent to the LLM.")
+            backend_name = st.selectbox("Scoring engine", list(SCORING_BACKEND_LABELS),
+                                        format_func=SCORING_BACKEND_LABELS.get,
+                                        index=list(SCORING_BACKEND_LABELS).index(scoring_backends.SCORING_BACKEND)
+                                        if scoring_backends.SCORING_BACKEND in SCORING_BACKEND_LABELS else 0)
+            incremental = st.checkbox("Only score new resumes",
+                                      help="Reuse saved results for this job and score only resumes added or changed "
+                                           "since. New results are saved automatically.")
+            run_in_background = st.checkbox("Run in background",
+                                            help="Queue the run for the background workers. It keeps going if you leave "
+                                                 "the page and scores every resume.")
     
         submit_button = st.form_submit_button("🔍 Analyze Candidates", use_container_width=True)
 
@@ -209,6 +373,8 @@ def view_candidates_page():
     if submit_button and job_id:
         st.session_state.job_id = job_id
         st.session_state.num_candidates = num_candidates
+        st.session_state.show_saved_matches = False
+        st.session_state.run_metrics = None
         
         try:
             job_description = resume_scanner.get_job_description(job_id)
@@ -236,114 +402,248 @@ def view_candidates_page():
             </div>
             """, unsafe_allow_html=True)
             
-            # Get all candidates
-            try:
-                all_candidates = resume_scanner.get_all_candidates()
-                if not all_candidates:
-                    st.warning("No candidate resumes found.")
+            if run_in_background:
+                # Hand the run to the worker pool; identical submissions share one run
+                try:
+                    st.session_state.match_run_id = job_queue.submit_match_run(job_id, backend_name)
                     st.session_state.candidate_matches = None
-                    st.stop()
-            except Exception as e:
-                st.markdown(f"""
-                <div class="error-alert">
-                    Error fetching candidates: {e}
-                </div>
-                """, unsafe_allow_html=True)
-                st.session_state.candidate_matches = None
-                st.stop()
+                except Exception as e:
+                    st.markdown(f"""
+                    <div class="error-alert">
+                        Error queueing match run: {e}
+                    </div>
+                    """, unsafe_allow_html=True)
+            else:
+                # Run-local metrics, so other sessions scoring at the same time don't leak into this report
+                with metrics.run():
+                    # Get all candidates
+                    try:
+                        if shortlist_size:
+                            # In incremental mode only the shortlisted resumes without a current stored match are scored
+                            all_candidates = resume_scanner.get_shortlisted_candidates(
+                                job_description, max(shortlist_size, num_candidates), search_query=search_query,
+                                unscored_for_job=job_id if incremental else None
+                            )
+                            total_candidates = len(all_candidates)
+                        elif incremental:
+                            # Score only resumes without a current stored match; the rest come from the database
+                            total_candidates = resume_scanner.count_unscored_candidates(job_id, search_query=search_query)
+                            all_candidates = resume_scanner.iter_unscored_candidates(job_id, search_query=search_query)
+                        else:
+                            # Stream the pool from the database instead of loading every resume up front
+                            total_candidates = resume_scanner.count_candidates(search_query=search_query)
+                            all_candidates = resume_scanner.iter_candidates(search_query=search_query)
+                        if not total_candidates and not incremental:
+                            st.warning("No candidate resumes found.")
+                            st.session_state.candidate_matches = None
+                            st.stop()
+                    except Exception as e:
+                        st.markdown(f"""
+                        <div class="error-alert">
+                            Error fetching candidates: {e}
+                        </div>
+                        """, unsafe_allow_html=True)
+                        st.session_state.candidate_matches = None
+                        st.stop()
             
-            if all_candidates:
-                # Show progress
-                st.markdown("<p class='progress-label'>Analyzing candidates...</p>", unsafe_allow_html=True)
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+                    if total_candidates:
+                        # Show progress
+                        st.markdown("<p class='progress-label'>Analyzing candidates...</p>", unsafe_allow_html=True)
+                        progress_bar = st.progress(0)
+                        status_text = st.empty()
+                        leaderboard = st.empty()
+                        leaders = []  # min-heap of the best num_candidates (score, seq, name) seen so far
                 
-                # Process candidates and calculate match
-                candidate_matches = []
-                for i, (candidate_id, resume_text) in enumerate(all_candidates):
-                    status_text.text(f"Analyzing candidate {i+1} of {len(all_candidates)}...")
-                    progress_bar.progress((i+1) / len(all_candidates))
+                        # Process candidates concurrently; results arrive as each LLM call finishes
+                        candidate_matches = []
+                        all_candidates = metrics.timed_iter("fetch_candidates", all_candidates)
+                        scored_results = scoring_backends.score_with(backend_name, all_candidates, job_description,
+                                                                     groq_api_key=groq_api_key)
+                        for i, (candidate_id, resume_text, match_result, error) in enumerate(scored_results):
+                            status_text.text(f"Analyzed candidate {i+1} of {total_candidates}...")
+                            progress_bar.progress(min((i+1) / total_candidates, 1.0))
                     
-                    try:
-                        match_result = resume_scanner.summarize_candidate(resume_text, job_description, groq_api_key=groq_api_key)
-                        candidate_name = resume_upload_streamlit.extract_candidate_name(resume_text)
-        
-                        candidate_matches.append({
-                            "candidate_id": candidate_id,
-                            "candidate_name": candidate_name,
-                            "resume_text": resume_text,
-                            "match_percentage": match_result.match_percentage,
-                            "summary": match_result.summary
-                        })
-                    except Exception as e:
-                        print(f"Detailed error: {str(e)}")
-                        st.warning(f"Error analyzing candidate {candidate_id}: {str(e)}")
+                            if error is not None:
+                                print(f"Detailed error: {str(error)}")
+                                st.warning(f"Error analyzing candidate {candidate_id}: {str(error)}")
+                                continue
+
+                            with metrics.span("extract_candidate_name"):
+                                candidate_name = profiles.extract_candidate_name(resume_text)
+                            # Only keep display fields in the session; resume text is loaded on demand
+                            candidate_matches.append({
+                                "candidate_id": candidate_id,
+                                "candidate_name": candidate_name,
+                                "match_percentage": match_result.match_percentage,
+                                "summary": match_result.summary
+                            })
+                            leader = (match_result.match_percentage, i, candidate_name)
+                            if len(leaders) < num_candidates:
+                                heapq.heappush(leaders, leader)
+                            else:
+                                heapq.heappushpop(leaders, leader)
+                            if i % 10 == 0 or i + 1 == total_candidates:
+                                leaderboard.caption("Current leaders: " + ", ".join(
+                                    f"{name} ({score:.0f}%)" for score, _, name in sorted(leaders, reverse=True)))
                 
-                # Store candidate matches in session state
-                st.session_state.candidate_matches = candidate_matches
+                        # Counted within this run, so other sessions' work doesn't show up here
+                        counters = metrics.summary()["counters"]
+                        cache_hits = counters.get("match_cache_hits", 0)
+                        cache_misses = counters.get("match_cache_misses", 0)
+                        tokens_saved = counters.get("compaction_tokens_saved", 0)
+                        st.caption(f"Match cache: {cache_hits} hits, {cache_misses} misses (LLM calls) · "
+                                   f"Prompt compaction saved ~{tokens_saved:,} input tokens")
+
+                        # Store candidate matches in session state
+                        st.session_state.candidate_matches = candidate_matches
+
+                    if incremental:
+                        # Persist the new scores, then rank them together with the stored ones
+                        if total_candidates and candidate_matches:
+                            resume_scanner.save_match_results(job_id, candidate_matches)
+                        st.caption(f"Scored {total_candidates} new or changed resumes; reused stored results for the rest.")
+                        show_saved_matches(job_id, search_query=search_query)
+
+                    # Per-stage breakdown of this run, also appended to METRICS_JSONL_PATH when set
+                    run_summary = metrics.summary()
+                    metrics.write_jsonl({"event": "match_run", "job_id": job_id, "backend": backend_name, **run_summary})
+                    st.session_state.run_metrics = run_summary
+
+    # Follow a background match run until the workers finish it
+    poll_match_run = False
+    if st.session_state.get("match_run_id"):
+        run = job_queue.get_run(st.session_state.match_run_id)
+        if run is None:
+            del st.session_state.match_run_id
+        elif run["status"] in ("queued", "running"):
+            total = run["total"] or 0
+            analyzed = run["completed"] + run["failed"]
+            st.markdown("<p class='progress-label'>Background match run in progress...</p>", unsafe_allow_html=True)
+            st.progress(min(analyzed / total, 1.0) if total else 0.0)
+            st.caption(f"Run {run['run_id']} is {run['status']}: {analyzed} of {total or '?'} candidates analyzed")
+            # Results are saved as the workers go, so the current leaders can be read back cheaply
+            leaders = resume_scanner.get_ranked_matches(run["job_id"], 3)
+            if leaders:
+                st.caption("Current leaders: " + ", ".join(
+                    f"{match['candidate_name']} ({match['match_percentage']:.0f}%)" for match in leaders))
+            poll_match_run = True
+        elif run["status"] == "failed":
+            st.markdown(f"""
+            <div class="error-alert">
+                Background match run failed: {run['error']}
+            </div>
+            """, unsafe_allow_html=True)
+            del st.session_state.match_run_id
+        else:
+            st.session_state.job_id = str(run["job_id"])
+            show_saved_matches(run["job_id"])
+            del st.session_state.match_run_id
 
     # Display candidates if they've been processed
-    if st.session_state.candidate_matches and st.session_state.job_id:
+    if st.session_state.job_id and (st.session_state.candidate_matches or st.session_state.get("show_saved_matches")):
+        render_start = time.perf_counter()
         job_id = st.session_state.job_id
         candidate_matches = st.session_state.candidate_matches
         
-        # Sort by match percentage (descending)
-        sorted_matches = sorted(candidate_matches, key=lambda x: x["match_percentage"], reverse=True)
-        
         # Get number of candidates to display (default to 5 if not set)
         num_candidates = st.session_state.get("num_candidates", 5)
 
+        if st.session_state.get("show_saved_matches"):
+            # Saved results are ranked by Postgres, one keyset page at a time
+            page_cursors = st.session_state.match_page_cursors
+            top_matches = resume_scanner.get_ranked_matches(job_id, num_candidates, after=page_cursors[-1],
+                                                            search_query=st.session_state.get("match_search_query"))
+            rank_offset = (len(page_cursors) - 1) * num_candidates
+        else:
+            # Partial selection of the top N instead of sorting every match
+            top_matches = heapq.nlargest(num_candidates, candidate_matches, key=lambda x: x["match_percentage"])
+            rank_offset = 0
+
         # Display top candidates
-        st.markdown(f"<h2 class='sub-header'>Top {num_candidates} Candidates for Job ID: {job_id}</h2>", unsafe_allow_html=True)
+        if rank_offset:
+            st.markdown(f"<h2 class='sub-header'>Candidates {rank_offset + 1}-{rank_offset + len(top_matches)} for Job ID: {job_id}</h2>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"<h2 class='sub-header'>Top {num_candidates} Candidates for Job ID: {job_id}</h2>", unsafe_allow_html=True)
 
-        for i, match in enumerate(sorted_matches[:num_candidates]):
+        for i, match in enumerate(top_matches):
             # Determine match class based on percentage
             match_class = "match-high" if match['match_percentage'] >= 80 else "match-medium" if match['match_percentage'] >= 60 else "match-low"
             
-            with st.expander(f"Candidate {i+1}: {match['candidate_name']} - Match: {match['match_percentage']:.1f}%"):
+            with st.expander(f"Candidate {rank_offset + i + 1}: {match['candidate_name']} - Match: {match['match_percentage']:.1f}%"):
                 st.markdown(f"""
                 <div class="candidate-match {match_class}">
                     <h3><span class="highlight-text">Match Percentage:</span> {match['match_percentage']:.1f}%</h3>
                     <p><span class="highlight-text">Analysis Summary:</span> {match['summary']}</p>
                 </div>
                 """, unsafe_allow_html=True)
-                st.write("**Resume Text:**")
-                st.text_area("", match['resume_text'], height=150, key=f"resume_{i}")
-        
-        with st.form(key="save_results_form"):
-            st.write("Save these match results to the database?")
-            save_submit = st.form_submit_button("💾 Save Match Results", use_container_width=True)
+                if st.toggle("Show resume text", key=f"show_resume_{match['candidate_id']}"):
+                    st.text_area("", load_resume_text(match['candidate_id']), height=150, key=f"resume_{i}")
+
+        if st.session_state.get("show_saved_matches"):
+            page_cols = st.columns(2)
+            with page_cols[0]:
+                if len(page_cursors) > 1 and st.button("⬅️ Previous", key="previous_matches_page"):
+                    page_cursors.pop()
+                    st.rerun()
+            with page_cols[1]:
+                if len(top_matches) == num_candidates and st.button("Next ➡️", key="next_matches_page"):
+                    page_cursors.append(top_matches[-1]["page_cursor"])
+                    st.rerun()
+        else:
+            with st.form(key="save_results_form"):
+                st.write("Save these match results to the database?")
+                save_submit = st.form_submit_button("💾 Save Match Results", use_container_width=True)
             
-            if save_submit:
-                try:
-                    # Save the results back to the database
-                    saved = resume_scanner.save_match_results(job_id, candidate_matches)
+                if save_submit:
+                    try:
+                        # Save the results back to the database
+                        saved = resume_scanner.save_match_results(job_id, candidate_matches)
                     
-                    if saved:
-                        st.markdown("""
-                        <div class="success-alert">
-                            Match results saved to database!
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown("""
+                        if saved:
+                            st.markdown("""
+                            <div class="success-alert">
+                                Match results saved to database!
+                            </div>
+                            """, unsafe_allow_html=True)
+                        else:
+                            st.markdown("""
+                            <div class="error-alert">
+                                Failed to save match results to database.
+                            </div>
+                            """, unsafe_allow_html=True)
+                    except Exception as e:
+                        st.markdown(f"""
                         <div class="error-alert">
-                            Failed to save match results to database.
+                            Error saving to database: {str(e)}
                         </div>
                         """, unsafe_allow_html=True)
-                except Exception as e:
-                    st.markdown(f"""
-                    <div class="error-alert">
-                        Error saving to database: {str(e)}
-                    </div>
-                    """, unsafe_allow_html=True)
+
+        metrics.observe("render_results_seconds", time.perf_counter() - render_start)
+
+    if st.session_state.get("run_metrics"):
+        show_run_metrics(st.session_state.run_metrics)
 
     # Back to Main Page
     if st.button("🏠 Back to Home Page", key="back_from_view_candidates"):
+        st.session_state.run_metrics = None
         st.session_state.candidate_matches = None
         st.session_state.job_id = None
+        st.session_state.pop("match_run_id", None)
+        st.session_state.show_saved_matches = False
         switch_page("main")
 
+    # Refresh last so the page stays interactive while waiting on the workers
+    if poll_match_run:
+        time.sleep(MATCH_RUN_REFRESH_SECONDS)
+        st.rerun()
+
+# Connection pool usage, for diagnosing slow pages under load
+with st.sidebar.expander("Database pool"):
+    try:
+        st.json(db.pool_stats())
+    except Exception as e:
+        st.caption(f"Pool statistics unavailable: {e}")
+
 # Display the appropriate page based on session state
 if st.session_state.page == "main":
     home_page()
@@ -0,0 +1,246 @@
+"""
+Lightweight in-process metrics: counters, histograms and timing spans.
+
+    with metrics.span("llm_call"):
+        ...
+    metrics.increment("llm_retries")
+    metrics.observe("llm_prompt_tokens", 812, metrics.TOKEN_BUCKETS)
+
+span() also works as a function decorator.
+
+Everything is recorded in one process-wide registry. A match run also gets
+a registry of its own, so its report isn't mixed with other sessions or
+workers recording at the same time:
+
+    with metrics.run():
+        ...  # hand work to other threads with executor.submit(metrics.propagate(fn), ...)
+        report = metrics.summary()
+
+Inside a run, snapshot() and summary() read the run's registry.
+
+Metrics can be exported as Prometheus text (served on METRICS_PORT when set)
+and appended as JSON lines to METRICS_JSONL_PATH. Nothing here depends on
+Langfuse or any other tracing backend.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH")
+
+# Histogram bucket upper bounds; spans are in seconds, token counts in tokens
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        return {"count": self.count, "sum": self.sum, "max": self.max, "buckets": self.buckets,
+                "counts": list(self.counts)}
+
+
+class Registry:
+    """Thread-safe store of counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(buckets)
+            self.histograms[name].observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = Registry()
+_jsonl_lock = threading.Lock()
+# Registries of the runs enclosing the current context, outermost first
+_run_registries = contextvars.ContextVar("metrics_run_registries", default=())
+
+
+def increment(name, value=1):
+    registry.increment(name, value)
+    for run_registry in _run_registries.get():
+        run_registry.increment(name, value)
+
+
+def observe(name, value, buckets=SECONDS_BUCKETS):
+    registry.observe(name, value, buckets)
+    for run_registry in _run_registries.get():
+        run_registry.observe(name, value, buckets)
+
+
+@contextmanager
+def run():
+    """
+    Records everything measured in this context, and in work handed on with
+    propagate(), in a run-local Registry as well as the process-wide one.
+
+    Runs nest; an inner run's metrics count towards the outer run too.
+    """
+    run_registry = Registry()
+    token = _run_registries.set(_run_registries.get() + (run_registry,))
+    try:
+        yield run_registry
+    finally:
+        _run_registries.reset(token)
+
+
+def propagate(fn):
+    """Wraps fn to run in a copy of the current context, so metrics recorded on another thread count towards the run."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def snapshot():
+    """Snapshot of the innermost enclosing run's registry, or the process-wide one outside a run."""
+    run_registries = _run_registries.get()
+    return (run_registries[-1] if run_registries else registry).snapshot()
+
+
+@contextmanager
+def span(stage):
+    """Times the enclosed block into the `<stage>_seconds` histogram (errors are counted too)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        increment(f"{stage}_errors")
+        raise
+    finally:
+        observe(f"{stage}_seconds", time.perf_counter() - start)
+
+
+def timed_iter(stage, iterable):
+    """Yields from iterable, timing each fetch of the next item into `<stage>_seconds`."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        observe(f"{stage}_seconds", time.perf_counter() - start)
+        yield item
+
+
+def summary(before=None, after=None):
+    """
+    What was recorded between two snapshots, for a per-run report.
+
+    before defaults to nothing recorded and after to snapshot(), so inside
+    metrics.run() summary() reports the run so far.
+
+    Returns:
+        dict: {"counters": {name: delta}, "stages": {stage: {"count", "total_s", "mean_ms"}}}
+    """
+    before = before or {"counters": {}, "histograms": {}}
+    after = after or snapshot()
+    counters = {
+        name: value - before["counters"].get(name, 0)
+        for name, value in after["counters"].items()
+        if value != before["counters"].get(name, 0)
+    }
+    stages = {}
+    for name, histogram in after["histograms"].items():
+        previous = before["histograms"].get(name, {"count": 0, "sum": 0.0})
+        count = histogram["count"] - previous["count"]
+        if not count:
+            continue
+        total = histogram["sum"] - previous["sum"]
+        if name.endswith("_seconds"):
+            stages[name[:-len("_seconds")]] = {"count": count, "total_s": total, "mean_ms": 1000 * total / count}
+        else:
+            stages[name] = {"count": count, "total": total, "mean": total / count}
+    return {"counters": counters, "stages": stages}
+
+
+def prometheus_text(snapshot=None):
+    """Renders a snapshot in the Prometheus text exposition format."""
+    snapshot = snapshot or registry.snapshot()
+    lines = []
+    for name, value in sorted(snapshot["counters"].items()):
+        lines += [f"# TYPE talentmatch_{name}_total counter", f"talentmatch_{name}_total {value}"]
+    for name, histogram in sorted(snapshot["histograms"].items()):
+        lines.append(f"# TYPE talentmatch_{name} histogram")
+        cumulative = 0
+        for bound, count in zip(list(histogram["buckets"]) + ["+Inf"], histogram["counts"]):
+            cumulative += count
+            lines.append(f'talentmatch_{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f"talentmatch_{name}_sum {histogram['sum']}", f"talentmatch_{name}_count {histogram['count']}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_jsonl(record, path=None):
+    """Appends a record (e.g. a run summary) as one JSON line; no-op without a path."""
+    path = path or METRICS_JSONL_PATH
+    if not path:
+        return
+    line = json.dumps({"timestamp": time.time(), **record}, default=str)
+    with _jsonl_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def start_http_server(port=None):
+    """Serves /metrics on a background thread. Returns the server, or None when no port is configured."""
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    # Imported here: http.server pulls in ssl, which most processes never need
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
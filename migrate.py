@@ -0,0 +1,163 @@
+"""
+Versioned schema migrations.
+
+Migrations are the numbered SQL files in migrations/ (0001_baseline.sql,
+0002_...). Each pending file runs in its own transaction and is recorded in
+schema_migrations together with a checksum of its contents, so a database is
+brought up to date by applying whatever it hasn't seen yet:
+
+    python migrate.py              # apply pending migrations
+    python migrate.py status       # list applied, pending and edited migrations
+
+Never edit a migration that has been applied somewhere; add a new one.
+postgres_schema.sql is kept as a readable snapshot of the schema after all
+migrations.
+
+migrations/optional/ holds changes that only suit some deployments, applied
+by their own command:
+
+    python migrate.py partition-matches --partitions 16
+"""
+import argparse
+import hashlib
+import os
+import re
+
+import psycopg
+
+import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+PARTITION_MATCHES_PATH = os.path.join(MIGRATIONS_DIR, "optional", "partition_job_candidate_match.sql")
+# Held while migrating so two processes never apply the same migration
+MIGRATION_LOCK_ID = 7_305_201
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+class Migration:
+    def __init__(self, path):
+        self.path = path
+        self.version, self.name = _MIGRATION_FILE_RE.match(os.path.basename(path)).groups()
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    def __repr__(self):
+        return f"{self.version}_{self.name}"
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Migration files in version order."""
+    migrations = [Migration(os.path.join(directory, file_name))
+                  for file_name in sorted(os.listdir(directory)) if _MIGRATION_FILE_RE.match(file_name)]
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def _connect(conninfo=None):
+    return psycopg.connect(conninfo or db.get_conn_string())
+
+
+def _applied(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version CHAR(4) PRIMARY KEY,  -- Numeric prefix of the migration file
+        name VARCHAR(200) NOT NULL,  -- Rest of the file name
+        checksum CHAR(64) NOT NULL,  -- SHA-256 of the file when it was applied
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP  -- Timestamp of application
+    );
+    """)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def migrate(conninfo=None, target=None):
+    """
+    Applies pending migrations up to target (default: all).
+
+    Returns:
+        list: the migrations applied
+    """
+    applied_now = []
+    with _connect(conninfo) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+            try:
+                applied = _applied(cursor)
+                conn.commit()
+                for migration in load_migrations():
+                    if target and migration.version > target:
+                        break
+                    if migration.version in applied:
+                        continue
+                    print(f"applying {migration}")
+                    # The migration and its bookkeeping row commit together
+                    cursor.execute(migration.sql)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                        (migration.version, migration.name, migration.checksum),
+                    )
+                    conn.commit()
+                    applied_now.append(migration)
+            finally:
+                conn.rollback()
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+    return applied_now
+
+
+def status(conninfo=None):
+    """
+    Returns:
+        list: (migration, state) pairs; state is "applied", "pending" or "edited since applied"
+    """
+    with _connect(conninfo) as conn:
+        with conn.cursor() as cursor:
+            applied = _applied(cursor)
+    result = []
+    for migration in load_migrations():
+        if migration.version not in applied:
+            result.append((migration, "pending"))
+        elif applied[migration.version] != migration.checksum:
+            result.append((migration, "edited since applied"))
+        else:
+            result.append((migration, "applied"))
+    return result
+
+
+def partition_matches(partitions, conninfo=None):
+    """Hash-partitions job_candidate_match by job_id into `partitions` tables (see migrations/optional)."""
+    with open(PARTITION_MATCHES_PATH, encoding="utf-8") as f:
+        sql = f.read()
+    with _connect(conninfo) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT set_config('talentmatch.match_partitions', %s, true)", (str(partitions),))
+            cursor.execute(sql)
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    subcommands = parser.add_subparsers(dest="command")
+    up_parser = subcommands.add_parser("up", help="apply pending migrations (the default)")
+    up_parser.add_argument("--target", help="stop after this version, e.g. 0003")
+    subcommands.add_parser("status", help="list migrations and whether they are applied")
+    partition_parser = subcommands.add_parser("partition-matches", help="hash-partition job_candidate_match by job_id")
+    partition_parser.add_argument("--partitions", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for migration, state in status():
+            print(f"{migration}: {state}")
+    elif args.command == "partition-matches":
+        partition_matches(args.partitions)
+        print(f"job_candidate_match is hash-partitioned into {args.partitions} partitions")
+    else:
+        applied = migrate(target=getattr(args, "target", None))
+        print(f"applied {len(applied)} migration(s)" if applied else "database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+-- The original schema. Written idempotently so databases created from
+-- postgres_schema.sql before migrations existed can be brought under migrate.py.
+
+-- candidate_resumes defaults its key with uuid_generate_v4()
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+CREATE TABLE IF NOT EXISTS job_descriptions (
+    job_id SERIAL PRIMARY KEY,
+    job_description TEXT NOT NULL,
+    position_fulfilled BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS candidate_resumes (
+    candidate_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    resume_text TEXT NOT NULL,
+    percentage_match NUMERIC(5, 2) CHECK (percentage_match >= 0 AND percentage_match <= 100),
+    rating NUMERIC(3, 1) CHECK (rating >= 0 AND rating <= 5),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP,
+    status VARCHAR(20) CHECK (status IN ('New', 'In Review', 'Rejected', 'Hired'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_percentage_match ON candidate_resumes (percentage_match DESC);
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_rating ON candidate_resumes (rating DESC);
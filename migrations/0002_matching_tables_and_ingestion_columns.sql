@@ -0,0 +1,74 @@
+-- Tables and columns the app gained before migrations existed: the match,
+-- cache and run tables, and the dedup, search, embedding and profile columns
+-- filled at ingestion. Idempotent for databases that already have some of them.
+
+ALTER TABLE job_descriptions
+    ADD COLUMN IF NOT EXISTS description_snippet VARCHAR(300),
+    ADD COLUMN IF NOT EXISTS content_hash CHAR(64),
+    ADD COLUMN IF NOT EXISTS simhash BIGINT,
+    ADD COLUMN IF NOT EXISTS simhash_bands INTEGER[];
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_job_descriptions_content_hash ON job_descriptions (content_hash);
+CREATE INDEX IF NOT EXISTS idx_job_descriptions_listing ON job_descriptions (created_at DESC, job_id DESC);
+CREATE INDEX IF NOT EXISTS idx_job_descriptions_fulfilled_listing
+    ON job_descriptions (position_fulfilled, created_at DESC, job_id DESC);
+CREATE INDEX IF NOT EXISTS idx_job_descriptions_simhash_bands ON job_descriptions USING GIN (simhash_bands);
+
+ALTER TABLE candidate_resumes
+    ADD COLUMN IF NOT EXISTS content_hash CHAR(64),
+    ADD COLUMN IF NOT EXISTS simhash BIGINT,
+    ADD COLUMN IF NOT EXISTS simhash_bands INTEGER[],
+    ADD COLUMN IF NOT EXISTS duplicate_of UUID REFERENCES candidate_resumes (candidate_id) ON DELETE SET NULL,
+    ADD COLUMN IF NOT EXISTS resume_embedding BYTEA,
+    ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS search_terms TEXT,
+    ADD COLUMN IF NOT EXISTS profile JSONB;
+ALTER TABLE candidate_resumes
+    ADD COLUMN IF NOT EXISTS resume_tsv tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', resume_text || ' ' || coalesce(search_terms, ''))
+    ) STORED;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidate_resumes_content_hash ON candidate_resumes (content_hash);
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_created_at ON candidate_resumes (created_at);
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_tsv ON candidate_resumes USING GIN (resume_tsv);
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_simhash_bands ON candidate_resumes USING GIN (simhash_bands);
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_profile ON candidate_resumes USING GIN (profile jsonb_path_ops);
+
+CREATE TABLE IF NOT EXISTS job_candidate_match (
+    job_id UUID NOT NULL,
+    candidate_id UUID NOT NULL,
+    match_score NUMERIC(5, 2) NOT NULL CHECK (match_score >= 0 AND match_score <= 100),
+    match_summary TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job_id, candidate_id)
+);
+CREATE INDEX IF NOT EXISTS idx_job_candidate_match_job_score
+    ON job_candidate_match (job_id, match_score DESC, candidate_id DESC);
+
+CREATE TABLE IF NOT EXISTS llm_match_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model_name VARCHAR(100) NOT NULL,
+    prompt_version VARCHAR(20) NOT NULL,
+    match_score NUMERIC(5, 2) NOT NULL,
+    match_summary TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS match_runs (
+    run_id UUID PRIMARY KEY,
+    job_id UUID NOT NULL,
+    corpus_version VARCHAR(200) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    total INTEGER,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    worker VARCHAR(200),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_match_runs_active
+    ON match_runs (job_id, corpus_version) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_match_runs_queued ON match_runs (created_at) WHERE status = 'queued';
@@ -0,0 +1,14 @@
+-- job_descriptions.job_id was declared SERIAL while the app writes and looks up
+-- UUIDs (and every table referencing jobs stores UUIDs). Integer keys can't
+-- have matches or runs pointing at them, so existing jobs simply get new UUIDs.
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'job_descriptions' AND column_name = 'job_id') <> 'uuid' THEN
+        ALTER TABLE job_descriptions ALTER COLUMN job_id DROP DEFAULT;
+        ALTER TABLE job_descriptions ALTER COLUMN job_id TYPE UUID USING uuid_generate_v4();
+        DROP SEQUENCE IF EXISTS job_descriptions_job_id_seq;
+    END IF;
+END $$;
+
+ALTER TABLE job_descriptions ALTER COLUMN job_id SET DEFAULT uuid_generate_v4();
@@ -0,0 +1,49 @@
+-- Referential integrity for matches and runs, covering/cheaper indexes for the
+-- hot paths, and removal of indexes nothing reads.
+
+-- Rows left behind by deleted jobs or resumes would block the foreign keys
+DELETE FROM job_candidate_match m
+WHERE NOT EXISTS (SELECT 1 FROM job_descriptions j WHERE j.job_id = m.job_id)
+   OR NOT EXISTS (SELECT 1 FROM candidate_resumes c WHERE c.candidate_id = m.candidate_id);
+DELETE FROM match_runs r WHERE NOT EXISTS (SELECT 1 FROM job_descriptions j WHERE j.job_id = r.job_id);
+
+ALTER TABLE job_candidate_match
+    ADD CONSTRAINT job_candidate_match_job_id_fkey
+        FOREIGN KEY (job_id) REFERENCES job_descriptions (job_id) ON DELETE CASCADE,
+    ADD CONSTRAINT job_candidate_match_candidate_id_fkey
+        FOREIGN KEY (candidate_id) REFERENCES candidate_resumes (candidate_id) ON DELETE CASCADE;
+ALTER TABLE match_runs
+    ADD CONSTRAINT match_runs_job_id_fkey
+        FOREIGN KEY (job_id) REFERENCES job_descriptions (job_id) ON DELETE CASCADE;
+
+-- The "already scored?" anti-join also compares created_at; carrying it in the
+-- primary key index lets that check run as an index-only scan. Databases created
+-- by hand may have named the existing key differently, so it is looked up
+DO $$
+DECLARE
+    pkey_name TEXT;
+BEGIN
+    SELECT conname INTO pkey_name FROM pg_constraint
+    WHERE conrelid = 'job_candidate_match'::regclass AND contype = 'p';
+    IF pkey_name IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE job_candidate_match DROP CONSTRAINT %I', pkey_name);
+    END IF;
+END $$;
+ALTER TABLE job_candidate_match
+    ADD CONSTRAINT job_candidate_match_pkey PRIMARY KEY (job_id, candidate_id) INCLUDE (created_at);
+
+-- The foreign keys cascade from resumes; without this, deleting a resume scans every match
+CREATE INDEX IF NOT EXISTS idx_job_candidate_match_candidate ON job_candidate_match (candidate_id);
+
+-- percentage_match and rating are never written or read (scores live in job_candidate_match)
+DROP INDEX IF EXISTS idx_candidate_resumes_percentage_match;
+DROP INDEX IF EXISTS idx_candidate_resumes_rating;
+
+-- Resumes are appended in created_at order, so a BRIN index covers time-range
+-- scans at a fraction of the B-tree's size
+DROP INDEX IF EXISTS idx_candidate_resumes_created_at;
+CREATE INDEX IF NOT EXISTS idx_candidate_resumes_created_at_brin ON candidate_resumes USING BRIN (created_at);
+
+ANALYZE job_descriptions;
+ANALYZE candidate_resumes;
+ANALYZE job_candidate_match;
@@ -0,0 +1,21 @@
+-- Background match runs are split into candidate_id ranges that workers claim
+-- independently, so a single large run is scored by every worker
+
+CREATE TABLE IF NOT EXISTS match_run_batches (
+    run_id UUID NOT NULL REFERENCES match_runs (run_id) ON DELETE CASCADE,  -- Run the batch belongs to
+    batch_no INTEGER NOT NULL,  -- Position of the batch within the run
+    first_candidate_id UUID NOT NULL,  -- Start of the batch's candidate_id range (inclusive)
+    end_candidate_id UUID,  -- End of the range (exclusive); NULL for the run's last batch
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    completed INTEGER NOT NULL DEFAULT 0,  -- Resumes analyzed successfully
+    failed INTEGER NOT NULL DEFAULT 0,  -- Resumes that could not be analyzed
+    error TEXT,  -- Failure reason
+    worker VARCHAR(200),  -- Worker that claimed the batch
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- When the run was split into batches
+    heartbeat_at TIMESTAMP,  -- Last progress update from the worker
+    PRIMARY KEY (run_id, batch_no)
+);
+
+-- Queue scan for workers: oldest run's batches first
+CREATE INDEX IF NOT EXISTS idx_match_run_batches_queued
+    ON match_run_batches (created_at, batch_no) WHERE status = 'queued';
@@ -0,0 +1,5 @@
+-- Background match runs record the scoring engine chosen when they were
+-- submitted, so workers score with it instead of their own SCORING_BACKEND.
+-- Runs queued before this column existed keep NULL and use the worker's default.
+
+ALTER TABLE match_runs ADD COLUMN IF NOT EXISTS scoring_backend VARCHAR(50);
@@ -0,0 +1,46 @@
+-- Optional, for large deployments: hash-partitions job_candidate_match by
+-- job_id so each job's matches live in one smaller table and index. Apply with
+--
+--     python migrate.py partition-matches --partitions 16
+--
+-- which sets talentmatch.match_partitions for this script. Existing rows are
+-- copied into the new table, so run it during a quiet period.
+DO $$
+DECLARE
+    partitions INTEGER := nullif(current_setting('talentmatch.match_partitions', true), '')::INTEGER;
+BEGIN
+    IF partitions IS NULL OR partitions < 2 THEN
+        RAISE EXCEPTION 'set talentmatch.match_partitions to the number of partitions (2 or more)';
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'job_candidate_match'::regclass) THEN
+        RAISE NOTICE 'job_candidate_match is already partitioned';
+        RETURN;
+    END IF;
+
+    ALTER TABLE job_candidate_match RENAME TO job_candidate_match_unpartitioned;
+    ALTER TABLE job_candidate_match_unpartitioned
+        RENAME CONSTRAINT job_candidate_match_pkey TO job_candidate_match_unpartitioned_pkey;
+    ALTER INDEX idx_job_candidate_match_job_score RENAME TO idx_job_candidate_match_unpartitioned_job_score;
+    ALTER INDEX idx_job_candidate_match_candidate RENAME TO idx_job_candidate_match_unpartitioned_candidate;
+
+    CREATE TABLE job_candidate_match (
+        job_id UUID NOT NULL REFERENCES job_descriptions (job_id) ON DELETE CASCADE,
+        candidate_id UUID NOT NULL REFERENCES candidate_resumes (candidate_id) ON DELETE CASCADE,
+        match_score NUMERIC(5, 2) NOT NULL CHECK (match_score >= 0 AND match_score <= 100),
+        match_summary TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (job_id, candidate_id) INCLUDE (created_at)
+    ) PARTITION BY HASH (job_id);
+    FOR remainder IN 0..partitions - 1 LOOP
+        EXECUTE format('CREATE TABLE job_candidate_match_p%s PARTITION OF job_candidate_match '
+                       'FOR VALUES WITH (MODULUS %s, REMAINDER %s)', remainder, partitions, remainder);
+    END LOOP;
+    CREATE INDEX idx_job_candidate_match_job_score ON job_candidate_match (job_id, match_score DESC, candidate_id DESC);
+    CREATE INDEX idx_job_candidate_match_candidate ON job_candidate_match (candidate_id);
+
+    INSERT INTO job_candidate_match (job_id, candidate_id, match_score, match_summary, created_at)
+    SELECT job_id, candidate_id, match_score, match_summary, created_at FROM job_candidate_match_unpartitioned;
+    DROP TABLE job_candidate_match_unpartitioned;
+END $$;
+
+ANALYZE job_candidate_match;
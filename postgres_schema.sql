@@ -1,12 +1,28 @@
+-- Snapshot of the schema after all migrations in migrations/, for reference.
+-- Databases are created and upgraded with `python migrate.py`; schema changes
+-- go into a new migration file, with this snapshot updated to match.
+
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
 -- Create Job Descriptions Table
 CREATE TABLE job_descriptions (
-    job_id SERIAL PRIMARY KEY,  -- Auto-incrementing primary key (automatically indexed)
+    job_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),  -- UUID as primary key (automatically indexed)
     job_description TEXT NOT NULL,  -- Combined job description text
+    description_snippet VARCHAR(300),  -- Short preview shown on the jobs page, so listings never read the full text
     position_fulfilled BOOLEAN NOT NULL DEFAULT FALSE,  -- Is the position filled?
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Timestamp of creation
-    updated_at TIMESTAMP  -- Timestamp of last update
+    updated_at TIMESTAMP,  -- Timestamp of last update
+    content_hash CHAR(64),  -- SHA-256 of the normalized text, used to skip re-posted descriptions
+    simhash BIGINT,  -- 64-bit SimHash for near-duplicate detection, see dedup.py
+    simhash_bands INTEGER[]  -- simhash split into bands for indexed near-duplicate lookup
 );
 
+CREATE UNIQUE INDEX idx_job_descriptions_content_hash ON job_descriptions (content_hash);
+-- Serve the jobs page's keyset pagination, optionally filtered on position_fulfilled
+CREATE INDEX idx_job_descriptions_listing ON job_descriptions (created_at DESC, job_id DESC);
+CREATE INDEX idx_job_descriptions_fulfilled_listing ON job_descriptions (position_fulfilled, created_at DESC, job_id DESC);
+CREATE INDEX idx_job_descriptions_simhash_bands ON job_descriptions USING GIN (simhash_bands);
+
 -- Create Candidate Resumes Table
 CREATE TABLE candidate_resumes (
     candidate_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),  -- UUID as primary key (automatically indexed)
@@ -15,9 +31,97 @@ CREATE TABLE candidate_resumes (
     rating NUMERIC(3, 1) CHECK (rating >= 0 AND rating <= 5),  -- Rating (0-5)
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Timestamp of creation
     updated_at TIMESTAMP,  -- Timestamp of last update
-    status VARCHAR(20) CHECK (status IN ('New', 'In Review', 'Rejected', 'Hired'))  -- Candidate status
+    status VARCHAR(20) CHECK (status IN ('New', 'In Review', 'Rejected', 'Hired')),  -- Candidate status
+    content_hash CHAR(64),  -- SHA-256 of the normalized resume text, used to skip duplicate uploads
+    simhash BIGINT,  -- 64-bit SimHash for near-duplicate detection, see dedup.py
+    simhash_bands INTEGER[],  -- simhash split into bands for indexed near-duplicate lookup
+    duplicate_of UUID REFERENCES candidate_resumes (candidate_id) ON DELETE SET NULL,  -- Earlier resume this one nearly duplicates; skipped by match runs
+    resume_embedding BYTEA,  -- float32 embedding vector used to pre-filter candidates
+    embedding_model VARCHAR(100),  -- Embedding backend that produced resume_embedding
+    search_terms TEXT,  -- Normalized skill tokens (c++ -> cplusplus, ...) for keyword search
+    profile JSONB,  -- Structured profile (name, contact, skills, titles, experience, education) parsed at ingestion, see profiles.py
+    resume_tsv tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', resume_text || ' ' || coalesce(search_terms, ''))
+    ) STORED  -- Keyword search document, see search_index.py
 );
 
 -- Indexes for faster queries
-CREATE INDEX idx_candidate_resumes_percentage_match ON candidate_resumes (percentage_match DESC);
-CREATE INDEX idx_candidate_resumes_rating ON candidate_resumes (rating DESC);
\ No newline at end of file
+CREATE UNIQUE INDEX idx_candidate_resumes_content_hash ON candidate_resumes (content_hash);
+-- Rows arrive in created_at order, so BRIN serves time ranges at a fraction of a B-tree's size
+CREATE INDEX idx_candidate_resumes_created_at_brin ON candidate_resumes USING BRIN (created_at);
+CREATE INDEX idx_candidate_resumes_tsv ON candidate_resumes USING GIN (resume_tsv);
+CREATE INDEX idx_candidate_resumes_simhash_bands ON candidate_resumes USING GIN (simhash_bands);
+-- Containment filters on the profile, e.g. profile @> '{"skills": ["kafka"]}'
+CREATE INDEX idx_candidate_resumes_profile ON candidate_resumes USING GIN (profile jsonb_path_ops);
+
+
+-- Create Job Candidate Match Table
+CREATE TABLE job_candidate_match (
+    job_id UUID NOT NULL REFERENCES job_descriptions (job_id) ON DELETE CASCADE,  -- Job the candidate was matched against
+    candidate_id UUID NOT NULL REFERENCES candidate_resumes (candidate_id) ON DELETE CASCADE,  -- Matched candidate
+    match_score NUMERIC(5, 2) NOT NULL CHECK (match_score >= 0 AND match_score <= 100),  -- Match percentage (0-100)
+    match_summary TEXT,  -- LLM-generated match summary
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- When the match was scored
+    PRIMARY KEY (job_id, candidate_id) INCLUDE (created_at)  -- Also serves the "already scored?" anti-join, index-only
+);
+-- Large deployments can hash-partition this table by job_id: `python migrate.py partition-matches`
+
+-- Ranking a job's candidates by score (candidate_id breaks ties for keyset pagination, and
+-- makes the index covering for the ranking scan)
+CREATE INDEX idx_job_candidate_match_job_score ON job_candidate_match (job_id, match_score DESC, candidate_id DESC);
+-- Cascading deletes from candidate_resumes
+CREATE INDEX idx_job_candidate_match_candidate ON job_candidate_match (candidate_id);
+
+-- Create LLM Match Cache Table
+-- Keyed by a hash of (job description content, resume content, model, prompt version)
+CREATE TABLE llm_match_cache (
+    cache_key CHAR(64) PRIMARY KEY,  -- SHA-256 hex digest (automatically indexed)
+    model_name VARCHAR(100) NOT NULL,  -- Model that produced the result
+    prompt_version VARCHAR(20) NOT NULL,  -- Prompt template version
+    match_score NUMERIC(5, 2) NOT NULL,  -- Match percentage (0-100)
+    match_summary TEXT NOT NULL,  -- LLM-generated match summary
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP  -- Timestamp of creation
+);
+
+
+-- Create Match Runs Table (background match-run queue)
+CREATE TABLE match_runs (
+    run_id UUID PRIMARY KEY,  -- Run identifier (automatically indexed)
+    job_id UUID NOT NULL REFERENCES job_descriptions (job_id) ON DELETE CASCADE,  -- Job being matched
+    corpus_version VARCHAR(200) NOT NULL,  -- Resume corpus + scoring configuration the run covers
+    scoring_backend VARCHAR(50),  -- Scoring engine chosen on submit; NULL uses the worker's SCORING_BACKEND
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    total INTEGER,  -- Resumes to analyze
+    completed INTEGER NOT NULL DEFAULT 0,  -- Resumes analyzed successfully
+    failed INTEGER NOT NULL DEFAULT 0,  -- Resumes that could not be analyzed
+    error TEXT,  -- Failure reason
+    worker VARCHAR(200),  -- Worker that claimed the run and split it into batches
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Timestamp of submission
+    started_at TIMESTAMP,  -- Timestamp the run was claimed
+    heartbeat_at TIMESTAMP,  -- Last progress update from the worker
+    finished_at TIMESTAMP  -- Timestamp of completion
+);
+
+-- One active run per job and corpus version, so duplicate submissions coalesce
+CREATE UNIQUE INDEX idx_match_runs_active ON match_runs (job_id, corpus_version) WHERE status IN ('queued', 'running');
+-- Queue scan for workers
+CREATE INDEX idx_match_runs_queued ON match_runs (created_at) WHERE status = 'queued';
+
+-- Candidate ranges of a match run, claimed by workers independently
+CREATE TABLE match_run_batches (
+    run_id UUID NOT NULL REFERENCES match_runs (run_id) ON DELETE CASCADE,  -- Run the batch belongs to
+    batch_no INTEGER NOT NULL,  -- Position of the batch within the run
+    first_candidate_id UUID NOT NULL,  -- Start of the batch's candidate_id range (inclusive)
+    end_candidate_id UUID,  -- End of the range (exclusive); NULL for the run's last batch
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    completed INTEGER NOT NULL DEFAULT 0,  -- Resumes analyzed successfully
+    failed INTEGER NOT NULL DEFAULT 0,  -- Resumes that could not be analyzed
+    error TEXT,  -- Failure reason
+    worker VARCHAR(200),  -- Worker that claimed the batch
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- When the run was split into batches
+    heartbeat_at TIMESTAMP,  -- Last progress update from the worker
+    PRIMARY KEY (run_id, batch_no)
+);
+
+-- Queue scan for workers: oldest run's batches first
+CREATE INDEX idx_match_run_batches_queued ON match_run_batches (created_at, batch_no) WHERE status = 'queued';
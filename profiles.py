@@ -0,0 +1,458 @@
+"""
+Structured candidate profiles.
+
+Each resume is parsed once, when it is stored, into a small JSON profile kept
+in candidate_resumes.profile (JSONB, GIN-indexed):
+
+    {"version": 1, "source": "heuristic", "name": "Jane Doe",
+     "contact": {"emails": [...], "phones": [...], "links": [...]},
+     "skills": ["python", "postgresql", ...], "titles": ["Data Engineer"],
+     "years_of_experience": 7, "education": ["M.S. Computer Science, ..."],
+     "highlights": ["Built ...", ...]}
+
+The fields come from local heuristics (section headings, a skill vocabulary,
+date ranges). An optional LLM pass fills in whatever the heuristics missed.
+Match runs send matching_text(profile) to the scorer instead of the raw
+resume, and the UI takes the candidate's name from the profile.
+
+Resumes stored before profiles existed are parsed with:
+
+    python profiles.py backfill [--llm]
+"""
+import argparse
+import os
+import re
+from datetime import datetime
+
+from psycopg.types.json import Jsonb
+
+import db
+import search_index
+
+# Bumped when extraction changes so the backfill re-parses older profiles
+PROFILE_VERSION = 1
+# Run the LLM pass for every uploaded resume (bulk imports use the backfill instead)
+PROFILE_LLM_ENABLED = os.getenv("PROFILE_LLM_ENABLED", "false").lower() in ("1", "true", "yes")
+# Send the profile to the scorer instead of the raw resume
+MATCH_ON_PROFILE = os.getenv("MATCH_ON_PROFILE", "true").lower() not in ("0", "false", "no")
+# Characters of experience/project lines kept as highlights for matching
+PROFILE_HIGHLIGHT_CHARS = int(os.getenv("PROFILE_HIGHLIGHT_CHARS", "2500"))
+BACKFILL_BATCH_SIZE = 500
+
+# Section headings, normalized, mapped to the section they open
+SECTION_HEADINGS = {
+    "summary": "summary", "profile": "summary", "professional summary": "summary", "objective": "summary",
+    "about me": "summary",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment": "experience", "employment history": "experience", "work history": "experience",
+    "career history": "experience",
+    "projects": "projects", "personal projects": "projects", "key projects": "projects",
+    "education": "education", "academic background": "education", "qualifications": "education",
+    "education and training": "education",
+    "skills": "skills", "technical skills": "skills", "core skills": "skills", "key skills": "skills",
+    "technologies": "skills", "core competencies": "skills", "tools": "skills",
+    "certifications": "certifications", "certificates": "certifications", "awards": "other",
+    "languages": "other", "interests": "other", "hobbies": "other", "references": "other",
+    "publications": "other", "volunteering": "other",
+}
+HIGHLIGHT_SECTIONS = ("summary", "experience", "projects")
+
+# Skills recognised anywhere in the text, besides search_index.SKILL_ALIASES
+SKILL_VOCABULARY = (
+    "python", "java", "javascript", "typescript", "golang", "rust", "scala", "kotlin", "swift", "ruby", "php",
+    "r", "matlab", "sql", "bash", "html", "css", "sass",
+    "django", "flask", "fastapi", "spring", "spring boot", "rails", "laravel", "angular", "svelte", "graphql",
+    "rest", "grpc", "postgresql", "mysql", "sqlite", "oracle", "mongodb", "redis", "cassandra", "dynamodb",
+    "elasticsearch", "snowflake", "bigquery", "redshift", "kafka", "rabbitmq", "spark", "hadoop", "airflow",
+    "dbt", "pandas", "numpy", "scikit-learn", "pytorch", "tensorflow", "keras", "nlp", "computer vision",
+    "llm", "langchain", "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "ansible", "jenkins",
+    "github actions", "linux", "git", "tableau", "power bi", "excel", "figma", "jira", "agile", "scrum",
+    "microservices", "etl", "data warehousing", "statistics",
+)
+_SKILL_RE = re.compile(
+    r"(?<![\w.+#])(" + "|".join(re.escape(skill) for skill in sorted(SKILL_VOCABULARY, key=len, reverse=True))
+    + r")(?![\w+#])",
+    re.IGNORECASE,
+)
+# Words that are rarely skills in running prose; only taken from a skills section
+_AMBIGUOUS_SKILLS = {"r", "rest", "excel"}
+
+TITLE_WORDS = (
+    "engineer", "developer", "programmer", "architect", "scientist", "analyst", "manager", "consultant",
+    "designer", "administrator", "specialist", "director", "lead", "intern", "officer", "coordinator",
+    "researcher", "technician", "executive", "associate", "head of", "vp", "cto", "ceo",
+)
+_TITLE_RE = re.compile(r"\b(" + "|".join(TITLE_WORDS) + r")\b", re.IGNORECASE)
+_TITLE_SPLIT_RE = re.compile(r"\s+(?:at|@)\s+|\s+[|–—-]\s+|,|\(|\s{2,}|\t")
+_DEGREE_RE = re.compile(
+    r"\b(bachelor|master|ph\.?\s?d|doctorate|mba|b\.?\s?s\.?c?|m\.?\s?s\.?c?|b\.?\s?a|m\.?\s?a|b\.?\s?tech|m\.?\s?tech|"
+    r"b\.?\s?e|m\.?\s?e|b\.?\s?eng|m\.?\s?eng|associate degree|diploma)\b",
+    re.IGNORECASE,
+)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"(?<!\w)\+?\(?\d[\d\s().-]{7,}\d(?!\w)")
+_LINK_RE = re.compile(r"(?:https?://)?(?:www\.)?(?:linkedin\.com|github\.com|gitlab\.com)/[\w./-]+", re.IGNORECASE)
+_YEARS_RE = re.compile(r"(\d{1,2})\+?\s*(?:years|yrs)\b(?:\s+of)?(?:\s+\w+){0,3}?\s+experience", re.IGNORECASE)
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_DATE = r"(?:(" + "|".join(_MONTHS) + r")[a-z]*\.?\s+|(\d{1,2})/)?((?:19|20)\d{2})"
+_DATE_RANGE_RE = re.compile(
+    _DATE + r"\s*(?:-|–|—|to|until)\s*(?:" + _DATE + r"|(present|current|now|today))", re.IGNORECASE
+)
+_BULLET_RE = re.compile(r"^[\s•◦▪●*·>-]+")
+
+
+def _clean_line(line):
+    return " ".join(_BULLET_RE.sub("", line).split())
+
+
+def _heading(line):
+    """The section a line opens, or None when it isn't a heading."""
+    key = re.sub(r"[^a-z ]+", "", line.lower()).strip()
+    if len(line) > 40:
+        return None
+    return SECTION_HEADINGS.get(key)
+
+
+def split_sections(resume_text):
+    """
+    Splits a resume into sections by their headings.
+
+    Returns:
+        dict: {section: [lines]}; lines before the first heading are under "header"
+    """
+    sections = {"header": []}
+    current = "header"
+    for raw_line in (resume_text or "").splitlines():
+        line = _clean_line(raw_line)
+        if not line:
+            continue
+        section = _heading(line.rstrip(":"))
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return sections
+
+
+def extract_name(lines):
+    """The first short, name-like line at the top of a resume."""
+    for line in lines[:6]:
+        if _EMAIL_RE.search(line) or any(ch.isdigit() for ch in line) or ":" in line or _heading(line):
+            continue
+        words = line.replace(",", " ").split()
+        if not 1 < len(words) <= 4 or not all(word.replace(".", "").replace("-", "").replace("'", "").isalpha()
+                                              for word in words):
+            continue
+        if _TITLE_RE.search(line) or line.lower() in ("curriculum vitae", "resume"):
+            continue
+        return line.title() if line.isupper() or line.islower() else line
+    return None
+
+
+def extract_candidate_name(resume_text):
+    """Display name for a resume or matching_text: the first 1-3 words of its first line, upper-cased."""
+    # Get the first line of the resume which often contains the name
+    first_line = resume_text.strip().split('\n')[0]
+    # Split by common separators and take the first 1-3 words
+    words = first_line.split()
+    # Take first 1-3 words depending on what's available
+    if len(words) >= 3:
+        return ' '.join(words[:3]).upper()
+    elif len(words) >= 1:
+        return ' '.join(words[:len(words)]).upper()
+    else:
+        return "UNNAMED CANDIDATE"
+
+
+def extract_contact(resume_text):
+    phones = []
+    for match in _PHONE_RE.findall(resume_text):
+        digits = re.sub(r"\D", "", match)
+        # Date ranges such as 2019 - 2021 look like numbers too
+        if 10 <= len(digits) <= 15 and not _DATE_RANGE_RE.search(match):
+            phones.append(match.strip())
+    return {
+        "emails": list(dict.fromkeys(email.lower() for email in _EMAIL_RE.findall(resume_text)))[:3],
+        "phones": list(dict.fromkeys(phones))[:2],
+        "links": list(dict.fromkeys(link.rstrip("./") for link in _LINK_RE.findall(resume_text)))[:3],
+    }
+
+
+def extract_skills(resume_text, skill_lines=()):
+    """Known skills found in the text, plus short items listed under a skills heading."""
+    skills = [search_index.SKILL_ALIASES.get(alias.lower(), alias.lower())
+              for alias in search_index._ALIAS_RE.findall(resume_text)]
+    skills += [skill.lower() for skill in _SKILL_RE.findall(resume_text) if skill.lower() not in _AMBIGUOUS_SKILLS]
+    for line in skill_lines:
+        # "Languages: Python, Go" lists the skills after the label
+        items = line.split(":", 1)[-1]
+        for item in re.split(r"[,;|•/]|\s{2,}", items):
+            item = item.strip(" .").lower()
+            if item and len(item.split()) <= 3 and len(item) <= 30:
+                skills.append(search_index.SKILL_ALIASES.get(item, item))
+    return list(dict.fromkeys(skills))[:60]
+
+
+def extract_titles(lines):
+    titles = []
+    for line in lines:
+        if len(line.split()) > 12 or not _TITLE_RE.search(line):
+            continue
+        for part in _TITLE_SPLIT_RE.split(line):
+            part = part.strip(" .:")
+            # Dates and "5 years of ..." aren't part of a title
+            if part and _TITLE_RE.search(part) and len(part.split()) <= 6 and not any(ch.isdigit() for ch in part):
+                titles.append(part)
+                break
+    return list(dict.fromkeys(titles))[:5]
+
+
+def _month_index(month, number, year):
+    if month:
+        month_number = _MONTHS.index(month[:3].lower())
+    elif number and 1 <= int(number) <= 12:
+        month_number = int(number) - 1
+    else:
+        month_number = 0
+    return int(year) * 12 + month_number
+
+
+def extract_years_of_experience(resume_text, experience_lines=(), today=None):
+    """
+    Years of experience: an explicit "N+ years of experience", otherwise the
+    combined length of the date ranges in the experience section (overlapping
+    jobs count once).
+    """
+    stated = [int(years) for years in _YEARS_RE.findall(resume_text) if 0 < int(years) <= 50]
+    if stated:
+        return max(stated)
+
+    today = today or datetime.now()
+    intervals = []
+    for line in experience_lines:
+        for start_month, start_number, start_year, end_month, end_number, end_year, ongoing in _DATE_RANGE_RE.findall(line):
+            start = _month_index(start_month, start_number, start_year)
+            if ongoing:
+                end = today.year * 12 + today.month - 1
+            else:
+                end = _month_index(end_month, end_number, end_year) + (0 if end_month or end_number else 11)
+            if start <= end <= today.year * 12 + 12:
+                intervals.append((start, end + 1))
+    if not intervals:
+        return None
+    months = 0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    months += current_end - current_start
+    return round(months / 12, 1)
+
+
+def extract_education(sections):
+    lines = sections.get("education") or [line for lines in sections.values() for line in lines
+                                          if _DEGREE_RE.search(line)]
+    education = [line for line in lines if _DEGREE_RE.search(line) and len(line.split()) <= 25]
+    # Degree lines are often followed by the institution on the next line
+    return list(dict.fromkeys(education or [line for line in lines if len(line.split()) <= 12]))[:4]
+
+
+def extract_highlights(sections, max_chars=None):
+    """Experience, project and summary lines, in that order, up to max_chars."""
+    max_chars = max_chars or PROFILE_HIGHLIGHT_CHARS
+    lines = [line for section in HIGHLIGHT_SECTIONS for line in sections.get(section, [])]
+    if not lines:
+        # No recognisable headings: keep the body below the name and contact lines
+        lines = sections.get("header", [])[3:] or sections.get("header", [])
+    highlights = []
+    used = 0
+    for line in dict.fromkeys(lines):
+        if used + len(line) > max_chars:
+            break
+        highlights.append(line)
+        used += len(line) + 1
+    return highlights
+
+
+def build_profile(resume_text):
+    """Parses a resume into a profile dict with local heuristics only (no network calls)."""
+    sections = split_sections(resume_text)
+    all_lines = [line for lines in sections.values() for line in lines]
+    title_lines = sections.get("header", [])[:8] + sections.get("experience", []) + sections.get("summary", [])
+    return {
+        "version": PROFILE_VERSION,
+        "source": "heuristic",
+        "name": extract_name(sections.get("header") or all_lines),
+        "contact": extract_contact(resume_text or ""),
+        "skills": extract_skills(resume_text or "", sections.get("skills", [])),
+        "titles": extract_titles(title_lines),
+        "years_of_experience": extract_years_of_experience(resume_text or "", sections.get("experience") or all_lines),
+        "education": extract_education(sections),
+        "highlights": extract_highlights(sections),
+    }
+
+
+def enrich_with_llm(resume_text, profile, groq_api_key=None):
+    """
+    Fills fields the heuristics left empty with one LLM call.
+
+    Returns:
+        dict: the profile, with source "heuristic+llm"
+    """
+    # Only this optional pass needs the LLM stack
+    from langchain_core.output_parsers import PydanticOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_groq import ChatGroq
+    from pydantic import BaseModel, Field
+
+    import resume_scanner
+    import text_compaction
+
+    class ExtractedProfile(BaseModel):
+        name: str = Field(description="The candidate's full name, or an empty string")
+        skills: list[str] = Field(description="Technical and professional skills, lower case")
+        titles: list[str] = Field(description="Job titles the candidate has held, most recent first")
+        years_of_experience: float = Field(description="Total years of professional experience, 0 if unknown")
+        education: list[str] = Field(description="Degrees with field of study and institution")
+
+    parser = PydanticOutputParser(pydantic_object=ExtractedProfile)
+    prompt = ChatPromptTemplate.from_template("""
+    Extract the candidate's profile from this resume.
+
+    **Resume:**
+    {resume_text}
+
+    {format_instructions}
+    """).partial(format_instructions=parser.get_format_instructions())
+    model = ChatGroq(temperature=0, api_key=resume_scanner._resolve_api_key(groq_api_key),
+                     model_name=resume_scanner.MODEL_NAME)
+    message = (prompt | model).invoke(
+        {"resume_text": text_compaction.compact_resume(resume_text, resume_scanner.MODEL_NAME)},
+        config={"callbacks": resume_scanner.llm_callbacks()},
+    )
+    extracted = resume_scanner.parse_llm_output(parser, message)
+
+    profile = dict(profile)
+    profile["name"] = profile.get("name") or extracted.name.strip() or None
+    profile["skills"] = list(dict.fromkeys(profile.get("skills", []) + [s.lower() for s in extracted.skills]))[:60]
+    profile["titles"] = profile.get("titles") or extracted.titles[:5]
+    profile["years_of_experience"] = profile.get("years_of_experience") or extracted.years_of_experience or None
+    profile["education"] = profile.get("education") or extracted.education[:4]
+    profile["source"] = "heuristic+llm"
+    return profile
+
+
+def profile_for_insert(resume_text, use_llm=None):
+    """
+    Profile for a resume about to be stored, wrapped for a JSONB parameter.
+
+    The LLM pass runs when use_llm (default PROFILE_LLM_ENABLED) is set; if it
+    fails, the heuristic profile is stored on its own.
+    """
+    profile = build_profile(resume_text)
+    if PROFILE_LLM_ENABLED if use_llm is None else use_llm:
+        try:
+            profile = enrich_with_llm(resume_text, profile)
+        except Exception as e:
+            print(f"Profile LLM pass failed, keeping the heuristic profile: {e}")
+    return Jsonb(profile)
+
+
+def matching_text(profile):
+    """
+    Compact text sent to the scorer in place of the raw resume.
+
+    The name goes on the first line, as on a resume, so extract_candidate_name
+    works on this text too.
+    """
+    lines = [profile.get("name") or "Unnamed Candidate"]
+    if profile.get("titles"):
+        lines.append("Titles: " + "; ".join(profile["titles"]))
+    if profile.get("years_of_experience"):
+        lines.append(f"Years of experience: {profile['years_of_experience']:g}")
+    if profile.get("skills"):
+        lines.append("Skills: " + ", ".join(profile["skills"]))
+    if profile.get("education"):
+        lines.append("Education: " + "; ".join(profile["education"]))
+    if profile.get("highlights"):
+        lines += ["", "Experience highlights:"] + profile["highlights"]
+    return "\n".join(lines)
+
+
+def candidate_columns(table_alias=None):
+    """
+    SQL for the (resume_text, profile) columns that candidate_text() expects.
+
+    Resume text is only read for rows that can't be matched on their profile,
+    so profiled rows never load the full text.
+    """
+    prefix = f"{table_alias}." if table_alias else ""
+    if not MATCH_ON_PROFILE:
+        return f"{prefix}resume_text, NULL::jsonb"
+    return (f"CASE WHEN jsonb_array_length(coalesce({prefix}profile->'highlights', '[]')) = 0 "
+            f"THEN {prefix}resume_text END, {prefix}profile")
+
+
+def candidate_text(resume_text, profile):
+    """Scorer input for a candidate_columns() row; the raw resume until it has a usable profile."""
+    if profile and profile.get("highlights") and MATCH_ON_PROFILE:
+        return matching_text(profile)
+    return resume_text
+
+
+def backfill(use_llm=False):
+    """
+    Profiles resumes stored without a current profile. Returns the number updated.
+
+    Rows are paged by candidate_id, so each resume is visited once per call:
+    one whose LLM pass fails keeps its heuristic profile and isn't retried
+    until the next backfill.
+    """
+    total = llm_failures = 0
+    last_id = None
+    # With the LLM pass, heuristic-only profiles are redone too
+    stale = "OR profile->>'source' = 'heuristic'" if use_llm else ""
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            while True:
+                keyset = "AND candidate_id > %(last_id)s" if last_id else ""
+                cursor.execute(f"""
+                SELECT candidate_id, resume_text FROM candidate_resumes
+                WHERE (profile IS NULL OR (profile->>'version')::int < %(version)s {stale}) {keyset}
+                ORDER BY candidate_id
+                LIMIT %(limit)s;
+                """, {"version": PROFILE_VERSION, "last_id": last_id, "limit": BACKFILL_BATCH_SIZE})
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                updates = [(profile_for_insert(resume_text, use_llm=use_llm), candidate_id)
+                           for candidate_id, resume_text in rows]
+                if use_llm:
+                    llm_failures += sum(profile.obj["source"] == "heuristic" for profile, _ in updates)
+                cursor.executemany("UPDATE candidate_resumes SET profile = %s WHERE candidate_id = %s", updates)
+                conn.commit()
+                total += len(rows)
+                last_id = rows[-1][0]
+    if llm_failures:
+        print(f"LLM pass failed for {llm_failures} resumes; they keep their heuristic profile")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structured candidate profiles.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subcommands.add_parser("backfill", help="profile resumes stored without one")
+    backfill_parser.add_argument("--llm", action="store_true", help="also run the LLM pass (one call per resume)")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        print(f"resumes profiled: {backfill(use_llm=args.llm)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,136 @@
+import argparse
 from datetime import datetime
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import hashlib
+import heapq
+import random
+import threading
+import time
 import uuid
 import streamlit as st
-import psycopg
 import os
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
-from langfuse.callback import CallbackHandler
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
-from langchain.output_parsers import PydanticOutputParser
+import retrieval
+import db
+import metrics
+import profiles
+# Re-exported: callers look job descriptions up through resume_scanner
+from jobs import get_job_description
+import search_index
+import text_compaction
 
 # Load environment variables
 load_dotenv(".env")
 
-# Database credentials
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_PORT = os.getenv("DB_PORT")
-
 # LLM Configuration
-groq_api_key = os.environ['GROQ_API_KEY']
-langfuse_handler = CallbackHandler(
-    secret_key=os.environ.get("LANGFUSE_SECRET_KEY"),
-    public_key=os.environ.get("LANGFUSE_PUBLIC_KEY"),
-    host=os.environ.get("LANGFUSE_HOST"),
-)
-langfuse_handler.auth_check()
+groq_api_key = os.getenv('GROQ_API_KEY')
+# Langfuse tracing is optional; metrics are recorded either way
+LANGFUSE_ENABLED = (os.getenv("LANGFUSE_ENABLED", "true").lower() not in ("0", "false", "no")
+                    and bool(os.getenv("LANGFUSE_SECRET_KEY")) and bool(os.getenv("LANGFUSE_PUBLIC_KEY")))
+_langfuse_handler = None
+_langfuse_initialized = False
+_langfuse_lock = threading.Lock()
+
+
+def _check_langfuse_auth(handler):
+    global _langfuse_handler
+    try:
+        handler.auth_check()
+    except Exception as e:
+        print(f"Langfuse disabled: {str(e)}")
+        _langfuse_handler = None
+
+
+def get_langfuse_handler():
+    """
+    The Langfuse callback, created on the first LLM call rather than at import.
+
+    Credentials are checked on a background thread so startup never waits on
+    the network; tracing is switched off if the check fails. Returns None when
+    Langfuse isn't configured.
+    """
+    global _langfuse_handler, _langfuse_initialized
+    if not LANGFUSE_ENABLED:
+        return None
+    with _langfuse_lock:
+        if not _langfuse_initialized:
+            _langfuse_initialized = True
+            try:
+                from langfuse.callback import CallbackHandler
+
+                _langfuse_handler = CallbackHandler(
+                    secret_key=os.environ.get("LANGFUSE_SECRET_KEY"),
+                    public_key=os.environ.get("LANGFUSE_PUBLIC_KEY"),
+                    host=os.environ.get("LANGFUSE_HOST"),
+                )
+            except Exception as e:
+                print(f"Langfuse disabled: {str(e)}")
+                return None
+            threading.Thread(target=_check_langfuse_auth, args=(_langfuse_handler,),
+                             name="langfuse-auth", daemon=True).start()
+        return _langfuse_handler
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Records prompt and completion tokens reported by the model into metrics."""
+
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        tokens_in, tokens_out = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        if tokens_in is None:
+            # Fall back to the message's usage metadata (set by most chat models)
+            for generations in response.generations:
+                for generation in generations:
+                    usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    tokens_in = (tokens_in or 0) + usage_metadata.get("input_tokens", 0)
+                    tokens_out = (tokens_out or 0) + usage_metadata.get("output_tokens", 0)
+        metrics.increment("llm_calls")
+        if tokens_in:
+            metrics.increment("llm_tokens_in", tokens_in)
+            metrics.observe("llm_prompt_tokens", tokens_in, metrics.TOKEN_BUCKETS)
+        if tokens_out:
+            metrics.increment("llm_tokens_out", tokens_out)
+            metrics.observe("llm_completion_tokens", tokens_out, metrics.TOKEN_BUCKETS)
+
+
+token_usage_callback = TokenUsageCallback()
+
+
+def llm_callbacks():
+    """Callbacks passed to every LLM call: token accounting, plus Langfuse tracing when configured."""
+    langfuse_handler = get_langfuse_handler()
+    return [token_usage_callback] + ([langfuse_handler] if langfuse_handler else [])
+
+# Scoring engine configuration
+SCORING_MAX_CONCURRENCY = int(os.getenv("SCORING_MAX_CONCURRENCY", "8"))
+SCORING_MAX_RETRIES = int(os.getenv("SCORING_MAX_RETRIES", "4"))
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "0")) or None
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "0")) or None
+
+# Match cache configuration. Bump PROMPT_VERSION whenever the prompt changes so
+# cached results from the old prompt are no longer served.
+MODEL_NAME = "llama-3.1-8b-instant"
+PROMPT_VERSION = "2"
+MATCH_CACHE_SIZE = int(os.getenv("MATCH_CACHE_SIZE", "10000"))
+MATCH_CACHE_LOOKUP_BATCH = 500
+
+# Groq list prices in USD per million (input, output) tokens, for cost estimates
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+# Tiered scoring: a cheap first pass scores everyone, and candidates whose
+# score falls inside CASCADE_BAND (low,high) or in the provisional top
+# CASCADE_TOP_N are rescored by the strong model
+CASCADE_BAND = tuple(float(bound) for bound in os.getenv("CASCADE_BAND", "40,75").split(","))
+CASCADE_TOP_N = int(os.getenv("CASCADE_TOP_N", "10"))
 
 
 class CandidateMatch(BaseModel):
@@ -35,16 +138,7 @@ class CandidateMatch(BaseModel):
     summary: str = Field(description="5-6 sentence summary of how well the candidate matches the job")
     match_percentage: float = Field(description="A percentage (0-100) indicating how well the candidate matches the job")
 
-def summarize_candidate(resume_text, job_description, groq_api_key=None):
-    if groq_api_key is None:
-        groq_api_key = os.environ['GROQ_API_KEY']
-        if not groq_api_key:
-            raise ValueError("GROQ API key not found")
-    # Create a parser for the Pydantic model
-    parser = PydanticOutputParser(pydantic_object=CandidateMatch)
-    
-    # Create a prompt template
-    prompt = ChatPromptTemplate.from_template("""
+MATCH_PROMPT = ChatPromptTemplate.from_template("""
     As a Talent Acquisition AI, analyze how well this candidate matches the given job description.
 
     **Candidate Resume:**  
@@ -58,84 +152,872 @@ def summarize_candidate(resume_text, job_description, groq_api_key=None):
 
     {format_instructions}
     """)
-    
-    # Set up the model
-    model = ChatGroq(
-        temperature=0.2, 
-        api_key=groq_api_key, 
-        model_name="llama-3.1-8b-instant"
-    )
-    
-    # Create the chain with the Pydantic parser
-    chain = prompt | model | parser
-    
-    # Invoke the chain
-    result = chain.invoke({
-        "resume_text": resume_text,
-        "job_description": job_description,
-        "format_instructions": parser.get_format_instructions()
-    }, config={"callbacks": [langfuse_handler]})
+
+
+class QuickMatch(BaseModel):
+    """Score-only output of the quick screening prompt."""
+    match_percentage: float = Field(description="A percentage (0-100) indicating how well the candidate matches the job")
+
+QUICK_MATCH_PROMPT = ChatPromptTemplate.from_template("""
+    Rate how well this candidate matches the job. Reply with the score only, no explanation.
+
+    **Candidate Resume:**  
+    {resume_text}
+
+    **Job Description:**  
+    {job_description}
+
+    {format_instructions}
+    """)
+
+# Summary stored for candidates that were only quick-screened
+QUICK_MATCH_SUMMARY = "Quick screen only: scored without a detailed analysis."
+
+
+class CandidateScorer:
+    """
+    Reusable prompt | model | parser chain for one model configuration.
+
+    Building the parser, format instructions and Groq client once (instead of
+    per candidate) lets every call reuse the same keep-alive HTTP connections.
+    Instances are safe to share between scoring threads.
+
+    With quick=True the chain uses QUICK_MATCH_PROMPT, which asks for the
+    score only; the few output tokens make it the cheap tier of a cascade.
+    """
+
+    def __init__(self, groq_api_key=None, model_name=MODEL_NAME, temperature=0.2, model=None, quick=False):
+        self.model_name = model_name
+        self.quick = quick
+        self.http_client = None
+        # Create a parser for the Pydantic model
+        self.parser = PydanticOutputParser(pydantic_object=QuickMatch if quick else CandidateMatch)
+
+        # Set up the model (a pre-built chat model can be passed in, e.g. for benchmarks)
+        if model is None:
+            # The Groq SDK is only needed once a real model is built
+            import httpx
+            from langchain_groq import ChatGroq
+
+            # Size the connection pool so every scoring thread can keep a connection alive
+            self.http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=SCORING_MAX_CONCURRENCY * 2,
+                                    max_keepalive_connections=SCORING_MAX_CONCURRENCY),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+            model = ChatGroq(
+                temperature=temperature, 
+                api_key=groq_api_key, 
+                model_name=model_name,
+                http_client=self.http_client,
+            )
+
+        # Create the chain; the Pydantic parser runs separately so parsing is timed on its own
+        prompt = (QUICK_MATCH_PROMPT if quick else MATCH_PROMPT).partial(
+            format_instructions=self.parser.get_format_instructions())
+        self.chain = prompt | model
+
+    def score(self, resume_text, job_description, compact=True):
+        # Trim whitespace, repeated lines and (for jobs) page boilerplate to fit the model's token budget
+        if compact:
+            with metrics.span("compact"):
+                resume_text = text_compaction.compact_resume(resume_text, self.model_name)
+                job_description = text_compaction.compact_job_description(job_description, self.model_name)
+
+        # Invoke the chain
+        with metrics.span("llm_call"):
+            message = self.chain.invoke({
+                "resume_text": resume_text,
+                "job_description": job_description,
+            }, config={"callbacks": llm_callbacks()})
+        result = parse_llm_output(self.parser, message)
+        if self.quick:
+            return CandidateMatch(summary=QUICK_MATCH_SUMMARY, match_percentage=result.match_percentage)
+        return result
+
+
+def parse_llm_output(parser, message):
+    """Runs an output parser on a model message, counting failures."""
+    with metrics.span("parse"):
+        try:
+            return parser.invoke(message)
+        except OutputParserException:
+            metrics.increment("parse_failures")
+            raise
+
+
+@st.cache_resource(show_spinner=False)
+def get_scorer(groq_api_key, model_name=MODEL_NAME, temperature=0.2, quick=False):
+    """One shared CandidateScorer per (API key, model, temperature, prompt) per process."""
+    return CandidateScorer(groq_api_key=groq_api_key, model_name=model_name, temperature=temperature, quick=quick)
+
+
+def _resolve_api_key(groq_api_key):
+    if groq_api_key is None:
+        groq_api_key = os.environ['GROQ_API_KEY']
+        if not groq_api_key:
+            raise ValueError("GROQ API key not found")
+    return groq_api_key
+
+
+def summarize_candidate(resume_text, job_description, groq_api_key=None, model=None, compact=True):
+    if model is not None:
+        scorer = CandidateScorer(model=model)
+    else:
+        scorer = get_scorer(_resolve_api_key(groq_api_key))
+    return scorer.score(resume_text, job_description, compact=compact)
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used for rate limiting."""
+    return max(1, len(text or "") // 4)
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter for requests and tokens per minute."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, window=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def acquire(self, tokens=1):
+        """Block until a request of `tokens` tokens fits in the current window."""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                over_requests = self.requests_per_minute and len(self._events) >= self.requests_per_minute
+                over_tokens = self.tokens_per_minute and self._tokens_in_window + tokens > self.tokens_per_minute
+                if not over_requests and not over_tokens:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                wait_for = self.window - (now - self._events[0][0])
+            time.sleep(max(wait_for, 0.01))
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name, requests_per_minute=None, tokens_per_minute=None):
+    """
+    The process-wide RateLimiter for a model's limits.
+
+    Groq enforces RPM/TPM per API key and model, so every session, batch and
+    worker thread in the process scoring with the same model draws from one
+    shared budget instead of each call getting a fresh one.
+    """
+    requests_per_minute = requests_per_minute or GROQ_REQUESTS_PER_MINUTE
+    tokens_per_minute = tokens_per_minute or GROQ_TOKENS_PER_MINUTE
+    key = (model_name, requests_per_minute, tokens_per_minute)
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _rate_limiters[key]
+
+
+def _is_rate_limit_error(error):
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status_code == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message
+
+
+def _retry_after_seconds(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _score_with_retry(score_fn, resume_text, job_description, rate_limiter, max_retries, tokens=None):
+    # Prompt inputs are compacted to the model's budget, so never reserve more than that
+    if tokens is None:
+        tokens = (min(estimate_tokens(resume_text), text_compaction.token_budget(MODEL_NAME, "resume"))
+                  + min(estimate_tokens(job_description), text_compaction.token_budget(MODEL_NAME, "job")))
+    attempt = 0
+    while True:
+        with metrics.span("rate_limit_wait"):
+            rate_limiter.acquire(tokens)
+        try:
+            return score_fn(resume_text, job_description)
+        except Exception as e:
+            if not _is_rate_limit_error(e) or attempt >= max_retries:
+                metrics.increment("score_failures")
+                raise
+            # Exponential backoff with jitter, honouring Retry-After when the API sends it
+            delay = _retry_after_seconds(e) or min(2 ** attempt, 30) + random.uniform(0, 1)
+            metrics.increment("llm_retries")
+            with metrics.span("retry_backoff"):
+                time.sleep(delay)
+            attempt += 1
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_candidates(candidates, job_description, groq_api_key=None, max_concurrency=None,
+                     requests_per_minute=None, tokens_per_minute=None, max_retries=None, score_fn=None,
+                     use_cache=True, backend=None):
+    """
+    Scores candidates against a job description concurrently.
+
+    Results are yielded as soon as each LLM call finishes (not in input order) so
+    callers can update progress while the batch is still running. At most
+    `max_concurrency` calls are in flight and `candidates` is consumed lazily.
+    Candidates whose (resume, job, model, prompt version) were scored before are
+    served from the match cache without calling the LLM.
+
+    Args:
+        candidates: iterable of (candidate_id, resume_text) tuples
+        job_description: job description text
+        score_fn: callable(resume_text, job_description) -> CandidateMatch;
+            defaults to the backend's scorer
+        use_cache: read/write the match cache (ignored when a custom score_fn is
+            given, since its results don't correspond to the cache key's model)
+        backend: a scoring_backends.ScoringBackend; defaults to the shared Groq scorer
+
+    Yields:
+        tuple: (candidate_id, resume_text, match_result, error) where exactly one
+        of match_result and error is set
+    """
+    max_concurrency = max_concurrency or SCORING_MAX_CONCURRENCY
+    max_retries = SCORING_MAX_RETRIES if max_retries is None else max_retries
+    model_name = limited_model = MODEL_NAME
+    rate_limited = True
+    cache = match_cache if use_cache and score_fn is None else None
+    if score_fn is None and backend is not None:
+        score_fn = backend.score
+        model_name = backend.model_name
+        limited_model = backend.billed_model or backend.model_name
+        rate_limited = backend.rate_limited
+        cache = cache if backend.cacheable else None
+    elif score_fn is None:
+        # Resolve the shared scorer here; Streamlit caches shouldn't be touched from worker threads
+        score_fn = get_scorer(_resolve_api_key(groq_api_key)).score
+    # Local backends don't call an API, so there's nothing to rate-limit
+    rate_limiter = get_rate_limiter(limited_model, requests_per_minute, tokens_per_minute) \
+        if rate_limited else RateLimiter()
+
+    def lookup(candidates):
+        # Check the cache a chunk at a time so the database tier costs one query per chunk
+        for chunk in _chunked(candidates, MATCH_CACHE_LOOKUP_BATCH):
+            if cache is None:
+                for candidate_id, resume_text in chunk:
+                    yield candidate_id, resume_text, None, None
+                continue
+            keys = [match_cache_key(resume_text, job_description, model_name) for _, resume_text in chunk]
+            with metrics.span("match_cache_lookup"):
+                cached = cache.get_many(keys)
+            hit_count = sum(key in cached for key in keys)
+            metrics.increment("match_cache_hits", hit_count)
+            metrics.increment("match_cache_misses", len(keys) - hit_count)
+            for (candidate_id, resume_text), key in zip(chunk, keys):
+                yield candidate_id, resume_text, key, cached.get(key)
+
+    pending = lookup(candidates)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="candidate-scorer")
+    in_flight = {}
+    hits = deque()
+    to_cache = {}
+
+    def fill():
+        """Submit cache misses until the pool is saturated. Returns False once input is exhausted."""
+        while len(in_flight) < max_concurrency and len(hits) < MATCH_CACHE_LOOKUP_BATCH:
+            item = next(pending, None)
+            if item is None:
+                return False
+            candidate_id, resume_text, key, cached_result = item
+            if cached_result is not None:
+                hits.append((candidate_id, resume_text, cached_result, None))
+                continue
+            future = executor.submit(metrics.propagate(_score_with_retry), score_fn, resume_text, job_description,
+                                     rate_limiter, max_retries)
+            in_flight[future] = (candidate_id, resume_text, key)
+        return True
+
+    try:
+        has_more = fill()
+        while in_flight or hits or has_more:
+            while hits:
+                yield hits.popleft()
+            if not in_flight:
+                has_more = has_more and fill()
+                continue
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate_id, resume_text, key = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield candidate_id, resume_text, None, e
+                    continue
+                if cache is not None:
+                    to_cache[key] = result
+                    if len(to_cache) >= MATCH_CACHE_LOOKUP_BATCH:
+                        cache.put_many(to_cache, model_name)
+                        to_cache = {}
+                yield candidate_id, resume_text, result, None
+            has_more = has_more and fill()
+    finally:
+        # Stop outstanding work if the caller abandons the generator (e.g. Streamlit rerun)
+        executor.shutdown(wait=False, cancel_futures=True)
+        if cache is not None and to_cache:
+            cache.put_many(to_cache, model_name)
+
+
+def estimate_cost(model_name, tokens_in, tokens_out):
+    """Estimated USD cost of a model's token usage (0 for models without a list price, e.g. local scorers)."""
+    price_in, price_out = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+
+
+def _record_cascade_tier(tier, backend, before, scored):
+    """Records a cascade tier's scored count, tokens and estimated cost since the `before` snapshot."""
+    counters = metrics.summary(before)["counters"]
+    tokens_in, tokens_out = counters.get("llm_tokens_in", 0), counters.get("llm_tokens_out", 0)
+    metrics.increment(f"cascade_{tier}_scored", scored)
+    metrics.increment(f"cascade_{tier}_tokens_in", tokens_in)
+    metrics.increment(f"cascade_{tier}_tokens_out", tokens_out)
+    metrics.increment(f"cascade_{tier}_cost_usd", estimate_cost(backend.billed_model, tokens_in, tokens_out))
+
+
+def score_candidates_cascade(candidates, job_description, fast_backend, strong_backend, band=None, top_n=None,
+                             **options):
+    """
+    Scores candidates in two tiers: a cheap first pass over everyone, then the
+    strong backend only for the candidates where its answer matters.
+
+    A candidate is escalated when its first-pass score falls inside `band`
+    (where the cheap tier is least reliable) or is among the first pass's top
+    `top_n` (whose summaries the recruiter actually reads). Everyone else keeps
+    the first-pass result, yielded as soon as it is final, so only the band and
+    the provisional leaders are held in memory. If the strong backend fails
+    for a candidate, its first-pass result is yielded instead.
+
+    Per-tier counts, scoring time, tokens and estimated cost are recorded in
+    metrics as cascade_fast_* and cascade_strong_*. Inside metrics.run() the
+    token counts are taken from the run's own registry, so concurrent runs
+    aren't billed to this one.
+
+    Args:
+        fast_backend, strong_backend: scoring_backends.ScoringBackend instances
+        band: (low, high) first-pass match percentages to escalate; defaults to CASCADE_BAND
+        top_n: provisional leaders to escalate; defaults to CASCADE_TOP_N
+        options: passed to score_candidates for both tiers
+
+    Yields:
+        tuple: (candidate_id, resume_text, match_result, error), as score_candidates
+    """
+    low, high = band or CASCADE_BAND
+    top_n = CASCADE_TOP_N if top_n is None else top_n
+    held = {}  # seq -> (candidate_id, resume_text, first-pass result) for candidates that may be escalated
+    leaders = []  # min-heap of (score, seq) for the provisional top_n
+
+    before = metrics.snapshot()
+    scored = 0
+    fast_results = score_candidates(candidates, job_description, backend=fast_backend, **options)
+    for seq, (candidate_id, resume_text, result, error) in enumerate(metrics.timed_iter("cascade_fast", fast_results)):
+        if error is not None:
+            yield candidate_id, resume_text, None, error
+            continue
+        scored += 1
+        held[seq] = (candidate_id, resume_text, result)
+        heapq.heappush(leaders, (result.match_percentage, seq))
+        if len(leaders) > top_n:
+            # Dropped out of the leaders: final unless it is in the band
+            score, dropped = heapq.heappop(leaders)
+            if not low <= score <= high:
+                candidate_id, resume_text, result = held.pop(dropped)
+                yield candidate_id, resume_text, result, None
+    _record_cascade_tier("fast", fast_backend, before, scored)
+
+    before = metrics.snapshot()
+    scored = 0
+    first_pass = {candidate_id: result for candidate_id, _, result in held.values()}
+    strong_results = score_candidates(((candidate_id, resume_text) for candidate_id, resume_text, _ in held.values()),
+                                      job_description, backend=strong_backend, **options)
+    for candidate_id, resume_text, result, error in metrics.timed_iter("cascade_strong", strong_results):
+        if error is not None:
+            print(f"Escalation failed for candidate {candidate_id}, keeping the first-pass score: {str(error)}")
+            metrics.increment("cascade_fallbacks")
+            result = first_pass[candidate_id]
+        else:
+            scored += 1
+        yield candidate_id, resume_text, result, None
+    _record_cascade_tier("strong", strong_backend, before, scored)
+
+
+def content_hash(text):
+    """SHA-256 hex digest of a text, used to key cached results on content."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def match_cache_key(resume_text, job_description, model_name=MODEL_NAME, prompt_version=PROMPT_VERSION):
+    """Cache key for a match result: job content, resume content, model and prompt version."""
+    parts = [content_hash(job_description), content_hash(resume_text), model_name, prompt_version]
+    return hashlib.sha256(":".join(parts).encode("utf-8")).hexdigest()
+
+
+class MatchCache:
+    """
+    Read-through cache for LLM match results.
+
+    A bounded in-process LRU sits in front of the `llm_match_cache` Postgres
+    table, so results survive restarts and are shared between app processes.
+    """
+
+    def __init__(self, max_size=MATCH_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys):
+        """Returns {key: CandidateMatch} for the keys found in memory or in Postgres."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self._counters["memory_hits"] += len(found)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        db_found = {}
+        if missing:
+            try:
+                db_found = self._fetch(missing)
+            except Exception as e:
+                print(f"Match cache lookup failed: {str(e)}")
+
+        with self._lock:
+            for key, result in db_found.items():
+                self._remember(key, result)
+            self._counters["db_hits"] += len(db_found)
+            self._counters["misses"] += len(missing) - len(db_found)
+        found.update(db_found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, results, model_name=MODEL_NAME):
+        """Stores {key: CandidateMatch} in memory and persists it to Postgres."""
+        with self._lock:
+            for key, result in results.items():
+                self._remember(key, result)
+        try:
+            self._store(results, model_name)
+        except Exception as e:
+            print(f"Match cache write failed: {str(e)}")
+
+    def put(self, key, result):
+        self.put_many({key: result})
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["hits"] = stats["memory_hits"] + stats["db_hits"]
+        stats["size"] = len(self._entries)
+        return stats
+
+    def clear(self):
+        """Clears the in-process tier and counters (the Postgres table is left intact)."""
+        with self._lock:
+            self._entries.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+
+    def _fetch(self, keys):
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT cache_key, match_score, match_summary FROM llm_match_cache WHERE cache_key = ANY(%s)",
+                    (keys,),
+                )
+                return {
+                    key: CandidateMatch(summary=summary, match_percentage=float(score))
+                    for key, score, summary in cursor.fetchall()
+                }
+
+    def _store(self, results, model_name):
+        created_at = datetime.now()
+
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.executemany(
+                    """
+                    INSERT INTO llm_match_cache
+                    (cache_key, model_name, prompt_version, match_score, match_summary, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        match_score = EXCLUDED.match_score,
+                        match_summary = EXCLUDED.match_summary,
+                        created_at = EXCLUDED.created_at;
+                    """,
+                    [
+                        (key, model_name, PROMPT_VERSION, result.match_percentage, result.summary, created_at)
+                        for key, result in results.items()
+                    ],
+                )
+                conn.commit()
+
+
+match_cache = MatchCache()
+
+
+def cached_summarize_candidate(resume_text, job_description, groq_api_key=None):
+    """summarize_candidate behind the match cache; only calls the LLM on a miss."""
+    key = match_cache_key(resume_text, job_description)
+    result = match_cache.get(key)
+    if result is None:
+        result = summarize_candidate(resume_text, job_description, groq_api_key=groq_api_key)
+        match_cache.put(key, result)
     return result
 
+CANDIDATE_STREAM_ITERSIZE = int(os.getenv("CANDIDATE_STREAM_ITERSIZE", "500"))
+
+# Stream candidate resumes
+def iter_candidates(itersize=None, search_query=None):
+    """
+    Yields (candidate_id, resume_text) tuples using a server-side cursor.
+
+    Rows are fetched from Postgres `itersize` at a time, so memory use stays
+    flat regardless of how many resumes are stored. Resumes flagged as
+    near-duplicates of another are skipped. An optional keyword
+    search_query (see search_index) restricts the stream via the GIN index.
+    The text is the candidate's compact profile where one is stored (see
+    profiles.candidate_text).
+    """
+    condition, params = search_index.search_filter(search_query)
+    with db.connection() as conn:
+        # Named cursors are server-side in psycopg
+        with conn.cursor(name="candidate_stream") as cursor:
+            cursor.itersize = itersize or CANDIDATE_STREAM_ITERSIZE
+            cursor.execute(
+                f"SELECT candidate_id, {profiles.candidate_columns()} FROM candidate_resumes WHERE duplicate_of IS NULL"
+                + (f" AND {condition}" if condition else ""),
+                params,
+            )
+            yield from _candidate_texts(cursor)
+
+def _candidate_texts(rows):
+    for candidate_id, resume_text, profile in rows:
+        yield candidate_id, profiles.candidate_text(resume_text, profile)
+
+# Resumes with no match row for the job, or whose match is older than the resume or the job
+_UNSCORED_CANDIDATES_WHERE = """
+FROM candidate_resumes c
+WHERE c.duplicate_of IS NULL
+AND NOT EXISTS (
+    SELECT 1 FROM job_candidate_match m
+    WHERE m.job_id = %(job_id)s
+      AND m.candidate_id = c.candidate_id
+      AND m.created_at >= COALESCE(c.updated_at, c.created_at)
+      AND m.created_at >= (SELECT COALESCE(j.updated_at, j.created_at) FROM job_descriptions j WHERE j.job_id = %(job_id)s)
+)
+"""
+
+def _unscored_query(columns, job_id, search_query, candidate_range=None):
+    condition, params = search_index.search_filter(search_query, column="c.resume_tsv")
+    sql = f"SELECT {columns} " + _UNSCORED_CANDIDATES_WHERE + (f"AND {condition}" if condition else "")
+    if candidate_range:
+        range_start, range_end = candidate_range
+        sql += " AND c.candidate_id >= %(range_start)s" + (" AND c.candidate_id < %(range_end)s" if range_end else "")
+        params.update(range_start=range_start, range_end=range_end)
+    return sql, {"job_id": uuid.UUID(str(job_id)), **params}
+
+def iter_unscored_candidates(job_id, itersize=None, search_query=None, candidate_range=None):
+    """
+    Yields (candidate_id, resume_text) for resumes that still need scoring for a job.
+
+    That is resumes added since the job was last matched, plus those whose
+    stored match is stale because the resume or job changed afterwards. The
+    anti-join is served by the job_candidate_match primary key. candidate_range
+    (first candidate_id, end candidate_id or None) limits the stream to one
+    batch of a background run.
+    """
+    with db.connection() as conn:
+        with conn.cursor(name="unscored_candidate_stream") as cursor:
+            cursor.itersize = itersize or CANDIDATE_STREAM_ITERSIZE
+            cursor.execute(*_unscored_query(f"c.candidate_id, {profiles.candidate_columns('c')}", job_id, search_query,
+                                            candidate_range))
+            yield from _candidate_texts(cursor)
+
+def unscored_batch_bounds(job_id, batch_size):
+    """
+    Splits a job's unscored resumes into candidate_id ranges of batch_size resumes.
+
+    Returns:
+        list: (first candidate_id, end candidate_id or None) per batch; each
+        range includes its start and excludes its end
+    """
+    sql, params = _unscored_query("c.candidate_id, row_number() OVER (ORDER BY c.candidate_id) AS position", job_id, None)
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT candidate_id FROM ({sql}) ranked WHERE (position - 1) %% %(batch_size)s = 0 "
+                           "ORDER BY candidate_id", {**params, "batch_size": batch_size})
+            starts = [row[0] for row in cursor.fetchall()]
+    return list(zip(starts, starts[1:] + [None]))
+
+@metrics.span("count_candidates")
+def count_unscored_candidates(job_id, search_query=None):
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(*_unscored_query("count(*)", job_id, search_query))
+            return cursor.fetchone()[0]
+
 # Get all candidate resumes
 def get_all_candidates():
-    conn_string = f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT}"
-    
-    with psycopg.connect(conn_string) as conn:
+    return list(iter_candidates())
+
+@metrics.span("count_candidates")
+def count_candidates(search_query=None):
+    condition, params = search_index.search_filter(search_query)
+    with db.connection() as conn:
         with conn.cursor() as cursor:
-            query = """
-            SELECT candidate_id, resume_text
-            FROM candidate_resumes;
-            """
-            cursor.execute(query)
-            return cursor.fetchall()
-
-# Fetch job description
-def get_job_description(job_id):
-    """Fetch job description by job_id."""
-    conn_string = f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT}"
-    
-    try:
-        job_id = uuid.UUID(job_id)
-    except ValueError:
-        st.error("Invalid Job ID format. Please enter a valid UUID.")
-        return None
+            cursor.execute("SELECT count(*) FROM candidate_resumes WHERE duplicate_of IS NULL"
+                           + (f" AND {condition}" if condition else ""), params)
+            return cursor.fetchone()[0]
 
-    with psycopg.connect(conn_string) as conn:
+def get_resume_text(candidate_id):
+    """Fetch a single resume's text, e.g. when its details are opened in the UI."""
+    with db.connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT job_description FROM job_descriptions WHERE job_id = %s", (job_id,))
+            cursor.execute("SELECT resume_text FROM candidate_resumes WHERE candidate_id = %s", (candidate_id,))
             result = cursor.fetchone()
             return result[0] if result else None
 
+def backfill_resume_embeddings(batch_size=500):
+    """
+    Embeds resumes stored without a vector (or with one from a different embedding backend).
+
+    Uploads and ingest.py embed new resumes, so this is only needed for rows
+    stored before embeddings existed or after changing EMBEDDING_BACKEND:
+
+        python resume_scanner.py backfill-embeddings
+    """
+    current_id = retrieval.embedding_id()
+    total = 0
+
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            while True:
+                cursor.execute("""
+                SELECT candidate_id, resume_text
+                FROM candidate_resumes
+                WHERE resume_embedding IS NULL OR embedding_model IS DISTINCT FROM %s
+                LIMIT %s;
+                """, (current_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    return total
+                vectors = retrieval.embed_texts(resume_text for _, resume_text in rows)
+                cursor.executemany(
+                    "UPDATE candidate_resumes SET resume_embedding = %s, embedding_model = %s WHERE candidate_id = %s",
+                    [(retrieval.to_bytes(vector), current_id, candidate_id) for (candidate_id, _), vector in zip(rows, vectors)],
+                )
+                conn.commit()
+                total += len(rows)
+
+# Get the top-K resumes by embedding similarity to the job description
+@metrics.span("shortlist")
+def get_shortlisted_candidates(job_description, top_k, search_query=None, unscored_for_job=None):
+    """
+    Pre-filters the candidate pool so only the most similar resumes reach the LLM.
+
+    The stored vectors are streamed through a server-side cursor and ranked a
+    batch at a time, so memory stays flat however large the pool is; resume
+    text is fetched for the shortlist alone. A keyword search_query narrows the
+    pool first. Resumes without a vector from the current embedding backend
+    are skipped (see backfill_resume_embeddings). With unscored_for_job, only
+    shortlisted resumes that still need scoring for that job are returned, so
+    incremental runs rescore the shortlist rather than the whole pool.
+
+    Returns:
+        list: (candidate_id, resume_text) tuples, most similar first
+    """
+    condition, params = search_index.search_filter(search_query)
+    with db.connection() as conn:
+        with conn.cursor(name="embedding_stream") as stream:
+            stream.execute(
+                "SELECT candidate_id, resume_embedding FROM candidate_resumes "
+                "WHERE embedding_model = %(embedding_model)s AND duplicate_of IS NULL"
+                + (f" AND {condition}" if condition else ""),
+                {"embedding_model": retrieval.embedding_id(), **params},
+            )
+
+            def batches():
+                while True:
+                    rows = stream.fetchmany(CANDIDATE_STREAM_ITERSIZE)
+                    if not rows:
+                        return
+                    yield ([candidate_id for candidate_id, _ in rows],
+                           retrieval.matrix_from_bytes(embedding for _, embedding in rows))
+
+            shortlist, _ = retrieval.top_k_batched(retrieval.embed_text(job_description), batches(), top_k)
+        if not shortlist:
+            return []
+
+        with conn.cursor() as cursor:
+            if unscored_for_job:
+                sql, params = _unscored_query(f"c.candidate_id, {profiles.candidate_columns('c')}", unscored_for_job, None)
+                cursor.execute(sql + " AND c.candidate_id = ANY(%(shortlist)s)", {**params, "shortlist": shortlist})
+            else:
+                cursor.execute(
+                    f"SELECT candidate_id, {profiles.candidate_columns()} FROM candidate_resumes WHERE candidate_id = ANY(%s)",
+                    (shortlist,),
+                )
+            resume_texts = dict(_candidate_texts(cursor.fetchall()))
+            return [(candidate_id, resume_texts[candidate_id]) for candidate_id in shortlist if candidate_id in resume_texts]
+
+# Fetch several job descriptions
+def get_job_descriptions(job_ids):
+    """
+    Fetch several job descriptions in one query.
+
+    Returns:
+        dict: {job_id: job_description} in the order of job_ids (unknown ids are skipped)
+    """
+    job_ids = [uuid.UUID(str(job_id)) for job_id in job_ids]
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT job_id, job_description FROM job_descriptions WHERE job_id = ANY(%s)", (job_ids,))
+            found = dict(cursor.fetchall())
+    return {job_id: found[job_id] for job_id in job_ids if job_id in found}
+
 
-def save_match_results(job_id, candidate_matches):
-    conn=None
+# A job's stored matches, best first; the name comes from the stored profile, or else the head of the resume.
+# check_query_plans EXPLAINs this exact query.
+RANKED_MATCHES_SQL = """
+SELECT m.candidate_id, coalesce(c.profile->>'name', left(c.resume_text, 200)), m.match_score, m.match_summary
+FROM job_candidate_match m
+JOIN candidate_resumes c ON c.candidate_id = m.candidate_id
+WHERE m.job_id = %(job_id)s {conditions}
+ORDER BY m.match_score DESC, m.candidate_id DESC
+LIMIT %(limit)s
+"""
+
+def _ranked_matches_query(job_id, limit, after=None, search_query=None):
+    condition, params = search_index.search_filter(search_query, column="c.resume_tsv")
+    conditions = []
+    if after:
+        conditions.append("(m.match_score, m.candidate_id) < (%(after_score)s, %(after_id)s)")
+        params["after_score"], params["after_id"] = after
+    if condition:
+        conditions.append(condition)
+    sql = RANKED_MATCHES_SQL.format(conditions="".join(f"AND {clause} " for clause in conditions))
+    return sql, {"job_id": uuid.UUID(str(job_id)), "limit": limit, **params}
+
+@metrics.span("get_ranked_matches")
+def get_ranked_matches(job_id, limit, after=None, search_query=None):
+    """
+    Returns one page of a job's stored matches, best first.
+
+    Ranking happens in Postgres on the (job_id, match_score DESC, candidate_id
+    DESC) index, and pages are addressed by keyset rather than OFFSET, so the
+    cost doesn't grow with the pool size or page number.
+
+    Args:
+        job_id: job to rank candidates for
+        limit: page size
+        after: `page_cursor` of the last match on the previous page
+        search_query: keyword query the candidates' resumes must match
+
+    Returns:
+        list: dicts with candidate_id, candidate_name, match_percentage, summary
+        and page_cursor
+    """
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(*_ranked_matches_query(job_id, limit, after, search_query))
+            return [
+                {
+                    "candidate_id": candidate_id,
+                    "candidate_name": profiles.extract_candidate_name(resume_head),
+                    "match_percentage": float(match_score),
+                    "summary": match_summary,
+                    "page_cursor": (match_score, candidate_id),
+                }
+                for candidate_id, resume_head, match_score, match_summary in cursor.fetchall()
+            ]
+
+SAVE_MATCHES_BATCH_SIZE = int(os.getenv("SAVE_MATCHES_BATCH_SIZE", "5000"))
+
+@metrics.span("save_match_results")
+def save_match_results(job_id, candidate_matches, batch_size=None):
+    """
+    Upserts match results for a job in bulk.
+
+    Rows are streamed with COPY into a temporary staging table and merged into
+    job_candidate_match with one INSERT ... ON CONFLICT per batch, all inside a
+    single transaction.
+
+    Returns:
+        bool: True if the results were saved
+    """
+    batch_size = batch_size or SAVE_MATCHES_BATCH_SIZE
+    created_at = datetime.now()
+    # ON CONFLICT can't touch the same row twice in one statement, so keep the last result per candidate
+    rows = {match['candidate_id']: (match['match_percentage'], match['summary']) for match in candidate_matches}
     try:
-        # Connect to the database
-        conn_string = f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT}"
-        
-        with psycopg.connect(conn_string) as conn:
+        # Borrow a connection from the shared pool
+        with db.connection() as conn:
             with conn.cursor() as cursor:
-                # For each candidate match, insert a record
-                for match in candidate_matches:
-                    query = """
+                cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS job_candidate_match_staging
+                (LIKE job_candidate_match INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;
+                """)
+                for batch in _chunked(rows.items(), batch_size):
+                    with cursor.copy("""
+                    COPY job_candidate_match_staging (job_id, candidate_id, match_score, match_summary, created_at)
+                    FROM STDIN
+                    """) as copy:
+                        for candidate_id, (match_score, match_summary) in batch:
+                            copy.write_row((job_id, candidate_id, match_score, match_summary, created_at))
+
+                    cursor.execute("""
                     INSERT INTO job_candidate_match
                     (job_id, candidate_id, match_score, match_summary, created_at)
-                    VALUES (%s, %s, %s, %s, %s)
+                    SELECT job_id, candidate_id, match_score, match_summary, created_at
+                    FROM job_candidate_match_staging
                     ON CONFLICT (job_id, candidate_id)
                     DO UPDATE SET
                         match_score = EXCLUDED.match_score,
                         match_summary = EXCLUDED.match_summary,
                         created_at = EXCLUDED.created_at;
-                    """
-                    created_at = datetime.now()
-                    cursor.execute(query, (
-                        job_id, 
-                        match['candidate_id'],
-                        match['match_percentage'],
-                        match['summary'],
-                        created_at
-                    ))
+                    """)
+                    cursor.execute("TRUNCATE job_candidate_match_staging")
                 
                 # Commit the transaction
                 conn.commit()
@@ -143,36 +1025,17 @@ def save_match_results(job_id, candidate_matches):
     except Exception as e:
         print(f"Database error: {str(e)}")
         return False
-    
-def get_all_jobs():
-    """
-    Retrieves all job IDs and descriptions from the database.
-    
-    Returns:
-        list: A list of tuples containing (job_id, job_description)
-    """
-    conn = None
-    try:
-        # Connect to the database
-        conn_string = f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT}"
-        conn = psycopg.connect(conn_string)
-
-        # Create a cursor
-        cursor = conn.cursor()
-        # conn = get_db_connection()
-        # cursor = conn.cursor()
-        
-        # Query to get all jobs
-        cursor.execute("SELECT job_id, job_description FROM job_descriptions ORDER BY job_id DESC")
-        
-        # Fetch all results
-        all_jobs = cursor.fetchall()
-        
-        # Close connection
-        cursor.close()
-        conn.close()
-        
-        return all_jobs
-    except Exception as e:
-        print(f"Error fetching all jobs: {str(e)}")
-        raise e
\ No newline at end of file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candidate scoring maintenance commands.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("backfill-embeddings", help="embed resumes stored without a current embedding")
+    args = parser.parse_args()
+
+    if args.command == "backfill-embeddings":
+        print(f"resumes embedded: {backfill_resume_embeddings()}")
+
+
+if __name__ == "__main__":
+    main()
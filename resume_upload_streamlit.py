@@ -1,136 +1,118 @@
 import streamlit as st
-from pypdf import PdfReader
-import docx
-import psycopg
+from text_extraction import extract_text_from_pdf, extract_text_from_docx
 from uuid import uuid4
 from datetime import datetime
-from dotenv import load_dotenv
-import os
 import uuid
-import requests
-from bs4 import BeautifulSoup
-
-# Load environment variables
-load_dotenv(".env")
-
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_PORT = os.getenv("DB_PORT")
-
-# Function to extract text from PDF
-def extract_text_from_pdf(file):
-    pdf_reader = PdfReader(file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text()
-    return text
-
-# Function to extract text from DOCX
-def extract_text_from_docx(file):
-    doc = docx.Document(file)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
-
-def extract_candidate_name(resume_text):
-    # Get the first line of the resume which often contains the name
-    first_line = resume_text.strip().split('\n')[0]
-    # Split by common separators and take the first 1-3 words
-    words = first_line.split()
-    # Take first 1-3 words depending on what's available
-    if len(words) >= 3:
-        return ' '.join(words[:3]).upper()
-    elif len(words) >= 1:
-        return ' '.join(words[:len(words)]).upper()
-    else:
-        return "UNNAMED CANDIDATE"
+import search_index
+import db
+import jobs
+import os
+
+# numpy (retrieval, dedup), httpx/bs4 (scraper) and the ingestion pipeline are
+# imported inside the functions that use them to keep app startup fast
 
 # Function to insert resume into the database
 def insert_resume_into_db(resume_text):
-    conn = None
+    import dedup
+    import profiles
+    import retrieval
+
     try:
-        # Connect to the database
-        conn_string = f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT}"
-        
-        with psycopg.connect(conn_string) as conn:
+        # Borrow a connection from the shared pool
+        with db.connection() as conn:
             # Create a cursor
             with conn.cursor() as cursor:
             # Insert the resume text into the database
                 query = """
-                INSERT INTO candidate_resumes (candidate_id, resume_text, created_at)
-                VALUES (%s, %s, %s);
+                INSERT INTO candidate_resumes
+                (candidate_id, resume_text, content_hash, simhash, simhash_bands, resume_embedding, embedding_model,
+                 search_terms, profile, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (content_hash) DO NOTHING;
                 """
                 candidate_id = str(uuid4())  # Generate a unique UUID
                 created_at = datetime.now()  # Current timestamp
-                cursor.execute(query, (candidate_id, resume_text, created_at))
+                content_hash, simhash, simhash_bands = dedup.fingerprint(resume_text)
+                # Embed once at upload time so match runs can pre-filter without re-reading resumes
+                embedding = retrieval.to_bytes(retrieval.embed_text(resume_text))
+                # Parse the resume once here so match runs and the UI can use the compact profile
+                profile = profiles.profile_for_insert(resume_text)
+                cursor.execute(query, (candidate_id, resume_text, content_hash, simhash, simhash_bands,
+                                       embedding, retrieval.embedding_id(), search_index.normalize_terms(resume_text),
+                                       profile, created_at))
+                inserted = cursor.rowcount
+                # Near-duplicates are kept but flagged so match runs skip them
+                near_duplicate = inserted and dedup.mark_near_duplicate_resumes(cursor, [candidate_id])
 
                 # Commit the transaction
                 conn.commit()
-                st.success("Resume uploaded and stored successfully!")
+                if near_duplicate:
+                    st.warning("Resume stored, but it closely matches a resume already in the database, "
+                               "so it is flagged as a duplicate and skipped by match runs.")
+                elif inserted:
+                    st.success("Resume uploaded and stored successfully!")
+                else:
+                    st.warning("This resume is already stored in the database.")
 
     except Exception as e:
         st.error(f"Error: {e}")
-    finally:
-        # Close the database connection
-        if conn:
-            cursor.close()
-            conn.close()
 
 # Function to insert job description into the database
 def insert_job_description_into_db(job_description):
-    conn = None
-    try:
-        # Connect to the database
-        conn_string = f"host={DB_HOST} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} port={DB_PORT}"
-        conn = psycopg.connect(conn_string)
+    import dedup
 
-        # Create a cursor
-        cursor = conn.cursor()
+    try:
+        # Borrow a connection from the shared pool
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                content_hash, simhash, simhash_bands = dedup.fingerprint(job_description)
+                similar_job_id = dedup.find_near_duplicate_job(cursor, job_description)
 
-        # Insert the job description into the database
-        job_id = str(uuid.uuid4()) 
-        created_at = datetime.now()
-        st.write(f"Job description entered successfully. Generated Job ID: {job_id}")
+                # Insert the job description into the database
+                job_id = str(uuid.uuid4()) 
+                created_at = datetime.now()
 
-        query = """
-        INSERT INTO job_descriptions (job_id, job_description, position_fulfilled, created_at)
-        VALUES (%s, %s, %s, %s);
-        """
-        cursor.execute(query, (job_id, job_description, False, created_at))
+                query = """
+                INSERT INTO job_descriptions
+                (job_id, job_description, description_snippet, content_hash, simhash, simhash_bands,
+                 position_fulfilled, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (content_hash) DO NOTHING;
+                """
+                cursor.execute(query, (job_id, job_description, jobs.make_snippet(job_description), content_hash,
+                                       simhash, simhash_bands, False, created_at))
+                if not cursor.rowcount:
+                    # The same posting was stored before; point the user at it instead
+                    cursor.execute("SELECT job_id FROM job_descriptions WHERE content_hash = %s", (content_hash,))
+                    st.warning(f"This job description is already stored. Existing Job ID: {cursor.fetchone()[0]}")
+                    return
 
-        # Commit the transaction
-        conn.commit()
+                # Commit the transaction
+                conn.commit()
+                # The jobs page caches its listing; show the new job right away
+                jobs.invalidate_job_list()
 
-        st.success("Job description uploaded and stored in the database successfully!")
+                st.write(f"Job description entered successfully. Generated Job ID: {job_id}")
+                st.success("Job description uploaded and stored in the database successfully!")
+                if similar_job_id:
+                    st.info(f"A very similar job description is already stored (Job ID: {similar_job_id}).")
 
     except Exception as e:
         st.error(f"Error: {e}")
-    finally:
-        # Close the database connection
-        if conn:
-            cursor.close()
-            conn.close()
 
 # Function to scrape job description from a URL
 def scrape_job_description(url):
+    import scraper
+
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-            job_description = soup.get_text(separator="\n", strip=True)
-            
-            st.session_state.scraped_job_description = job_description
-            return job_description
-        else:
-            print(f"Failed to fetch page. Status code: {response.status_code}")
-            return None
+        # Pooled client with timeouts, an on-disk cache and main-content extraction
+        job_description = scraper.scrape(url)
+        st.session_state.scraped_job_description = job_description
+        return job_description
+    except scraper.ScrapeError as e:
+        print(str(e))
+        st.error(f"{e}. Try manually submitting.")
+        return None
     except Exception as e:
         st.error(f"Error scraping job description: {e} Try manually submitting.")
         return None
@@ -141,14 +123,16 @@ def main_page():
     if "resume_uploader_key" not in st.session_state:
         st.session_state.resume_uploader_key = str(uuid4())  # Store a unique key
 
-    uploaded_file = st.file_uploader(
-        "Upload resume (PDF/DOCX)",
+    uploaded_files = st.file_uploader(
+        "Upload resumes (PDF/DOCX)",
         type=["pdf", "docx"],
+        accept_multiple_files=True,
         key=st.session_state.resume_uploader_key
     )
 
-    # Process the file if available
-    if uploaded_file:
+    # Process the file if available; a single upload keeps the extracted text preview
+    if len(uploaded_files or []) == 1:
+        uploaded_file = uploaded_files[0]
         try:
             if uploaded_file.type == "application/pdf":
                 resume_text = extract_text_from_pdf(uploaded_file)
@@ -169,6 +153,25 @@ def main_page():
         if st.button("Save to Database"):
             insert_resume_into_db(resume_text)
 
+    # Several uploads go through the batch ingestion pipeline
+    elif uploaded_files:
+        st.write(f"{len(uploaded_files)} resumes selected.")
+        if st.button("Save All to Database"):
+            import ingest
+
+            try:
+                with st.spinner("Extracting and storing resumes..."):
+                    files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+                    report = ingest.ingest_files(files, workers=min(os.cpu_count() or 1, len(files)))
+                st.success(f"Stored {report.inserted} resumes ({report.duplicates} duplicates skipped).")
+                if report.near_duplicates:
+                    st.info(f"{report.near_duplicates} of them closely match resumes already stored and are "
+                            "flagged as duplicates, so match runs skip them.")
+                for file_name, error in report.failed:
+                    st.warning(f"Could not process {file_name}: {error}")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
 # Job description posting page
 def post_job_description_page():
     st.title("Post a Job Description")
@@ -199,4 +202,23 @@ def post_job_description_page():
         if "scraped_job_description" in st.session_state and st.session_state.scraped_job_description.strip():
             insert_job_description_into_db(st.session_state.scraped_job_description)
         else:
-            st.error("No job description found. Please scrape one first.")
\ No newline at end of file
+            st.error("No job description found. Please scrape one first.")
+
+    # Option to import many postings at once
+    st.subheader("Option 3: Import Several Job Postings")
+    urls = st.text_area("Enter Job Posting URLs (one per line)")
+    if st.button("Import Job Descriptions"):
+        urls = [url for url in urls.splitlines() if url.strip()]
+        if not urls:
+            st.error("Please enter at least one URL.")
+        else:
+            import scraper
+
+            with st.spinner(f"Fetching {len(urls)} job postings..."):
+                results = scraper.scrape_many(urls)
+            for url, job_description, error in results:
+                st.markdown(f"**{url}**")
+                if error:
+                    st.error(f"Error scraping job description: {error}")
+                else:
+                    insert_job_description_into_db(job_description)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Local, network-free text embeddings for pre-filtering candidates.
+
+Resumes are embedded once when they are stored and the job description is
+embedded at match time; cosine similarity then picks a shortlist so only the
+top-K resumes are sent to the LLM.
+
+The default backend is a hashed TF vectorizer (unigrams + bigrams, sublinear
+term frequency) that needs nothing but NumPy. Set EMBEDDING_BACKEND to
+"sentence-transformers" to use a local CPU model instead.
+"""
+import os
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hashing")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+you your we our they their i me my he she his her them us not but if than then so such into over
+""".split())
+
+
+def embedding_id():
+    """Identifies the vector space; vectors from different backends are not comparable."""
+    if EMBEDDING_BACKEND == "sentence-transformers":
+        return f"st:{EMBEDDING_MODEL}"
+    return f"hashing:{EMBEDDING_DIM}"
+
+
+def tokenize(text):
+    """Lowercased word tokens with stopwords removed (keeps tokens like c++, c#, node.js)."""
+    return [token for token in _TOKEN_RE.findall((text or "").lower()) if token not in _STOPWORDS]
+
+
+def _hashing_embed(text):
+    tokens = tokenize(text)
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature, count in features.items():
+        # crc32 is stable across processes, unlike hash()
+        bucket = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if bucket & 0x80000000 else -1.0
+        vector[bucket % EMBEDDING_DIM] += sign * (1.0 + np.log(count))
+    return vector
+
+
+@lru_cache(maxsize=1)
+def _sentence_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+
+
+def embed_texts(texts):
+    """Embeds texts into an (n, d) float32 matrix of L2-normalized rows."""
+    texts = list(texts)
+    if EMBEDDING_BACKEND == "sentence-transformers":
+        return _sentence_model().encode(texts, normalize_embeddings=True).astype(np.float32)
+
+    matrix = np.vstack([_hashing_embed(text) for text in texts]) if texts else np.zeros((0, EMBEDDING_DIM), np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_text(text):
+    return embed_texts([text])[0]
+
+
+def to_bytes(vector):
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def matrix_from_bytes(blobs):
+    """Stacks stored float32 vectors into a single contiguous matrix."""
+    blobs = list(blobs)
+    if not blobs:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), -1)
+
+
+def top_k(query_vector, matrix, k):
+    """
+    Returns (indices, scores) of the k rows most similar to query_vector,
+    best first. Rows are assumed normalized, so the dot product is the cosine.
+    """
+    if len(matrix) == 0 or k <= 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+    scores = matrix @ np.asarray(query_vector, dtype=np.float32)
+    k = min(k, len(scores))
+    indices = np.argpartition(-scores, k - 1)[:k]
+    indices = indices[np.argsort(-scores[indices])]
+    return indices, scores[indices]
+
+
+def top_k_batched(query_vector, batches, k):
+    """
+    top_k over a stream of (ids, matrix) batches, holding only one batch and
+    the best k seen so far in memory.
+
+    Returns:
+        tuple: (ids, scores) of the k most similar rows, best first
+    """
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    best_ids, best_scores = [], np.array([], dtype=np.float32)
+    for ids, matrix in batches:
+        indices, scores = top_k(query_vector, matrix, k)
+        best_ids += [ids[i] for i in indices]
+        best_scores = np.concatenate([best_scores, scores])
+        if len(best_ids) > k:
+            keep = np.argpartition(-best_scores, k - 1)[:k]
+            best_ids, best_scores = [best_ids[i] for i in keep], best_scores[keep]
+    order = np.argsort(-best_scores)
+    return [best_ids[i] for i in order], best_scores[order]
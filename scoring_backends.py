@@ -0,0 +1,328 @@
+"""
+Pluggable candidate scoring backends.
+
+Every backend turns (resume_text, job_description) into a CandidateMatch:
+
+- "groq": the LLM chain (the default, same as summarize_candidate)
+- "groq-quick": the same model with a score-only prompt, a cheaper LLM first pass
+- "local": a deterministic CPU scorer (key-term coverage + BM25) that runs in
+  about a millisecond, for offline use and first-pass ranking of large pools;
+  its IDF weights come from a sample of the stored resumes (see get_corpus_stats)
+- "fake": a stand-in LLM with configurable latency and error rates for load
+  tests and benchmarks
+
+Pass a backend to resume_scanner.score_candidates(backend=...). The default
+is chosen with the SCORING_BACKEND environment variable.
+
+"cascade" is a scoring mode rather than a backend: a fast tier (CASCADE_FAST_TIER,
+"local" or "groq-quick") scores every candidate and the larger CASCADE_MODEL
+rescores the borderline ones (see resume_scanner.score_candidates_cascade).
+score_with() runs either:
+
+    results = scoring_backends.score_with("cascade", candidates, job_description)
+"""
+import hashlib
+import heapq
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+import db
+import profiles
+import resume_scanner
+import retrieval
+from resume_scanner import CandidateMatch
+
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "groq")
+CASCADE_FAST_TIER = os.getenv("CASCADE_FAST_TIER", "local")
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", "llama-3.3-70b-versatile")
+# Resumes sampled for the local scorer's document frequencies, and how long a process reuses them
+CORPUS_STATS_SAMPLE = int(os.getenv("CORPUS_STATS_SAMPLE", "5000"))
+CORPUS_STATS_TTL = int(os.getenv("CORPUS_STATS_TTL", "3600"))
+
+
+class ScoringBackend:
+    """Base class for scoring backends."""
+    name = None
+    # Identifies the scorer in match cache keys
+    model_name = None
+    # Whether results are worth persisting in the match cache
+    cacheable = False
+    # Whether calls count against the Groq request/token limits
+    rate_limited = False
+    # The model whose token prices apply (see resume_scanner.MODEL_PRICES); None when scoring is free
+    billed_model = None
+
+    def score(self, resume_text, job_description):
+        raise NotImplementedError
+
+
+class GroqBackend(ScoringBackend):
+    """The LLM chain behind summarize_candidate."""
+    name = "groq"
+    cacheable = True
+    rate_limited = True
+
+    def __init__(self, groq_api_key=None, model_name=resume_scanner.MODEL_NAME, temperature=0.2):
+        self.model_name = model_name
+        self.billed_model = model_name
+        self._scorer = resume_scanner.get_scorer(resume_scanner._resolve_api_key(groq_api_key),
+                                                 model_name=model_name, temperature=temperature)
+
+    def score(self, resume_text, job_description):
+        return self._scorer.score(resume_text, job_description)
+
+
+class QuickGroqBackend(GroqBackend):
+    """The Groq model with a score-only prompt; summaries are a fixed placeholder."""
+    name = "groq-quick"
+
+    def __init__(self, groq_api_key=None, model_name=resume_scanner.MODEL_NAME, temperature=0.0):
+        # A distinct cache identity, so quick scores are never served in place of full analyses
+        self.model_name = f"{model_name}:quick"
+        self.billed_model = model_name
+        self._scorer = resume_scanner.get_scorer(resume_scanner._resolve_api_key(groq_api_key),
+                                                 model_name=model_name, temperature=temperature, quick=True)
+
+
+class CorpusStats:
+    """Document frequencies and average length of a resume corpus, for BM25 IDF weights."""
+
+    def __init__(self, texts=()):
+        self.documents = 0
+        self.total_length = 0
+        self.document_frequency = Counter()
+        for text in texts:
+            self.add(text)
+
+    def add(self, text):
+        tokens = retrieval.tokenize(text)
+        self.documents += 1
+        self.total_length += len(tokens)
+        self.document_frequency.update(set(tokens))
+
+    @property
+    def average_length(self):
+        return self.total_length / self.documents if self.documents else 400.0
+
+    def idf(self, term):
+        if not self.documents:
+            return 1.0
+        df = self.document_frequency.get(term, 0)
+        return math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+
+
+_corpus_stats = None
+_corpus_stats_loaded_at = 0.0
+_corpus_stats_lock = threading.Lock()
+
+
+def load_corpus_stats(sample_size=None):
+    """
+    CorpusStats over a sample of the stored resumes, as the scorer sees them
+    (the compact profile where one is stored).
+
+    BERNOULLI sampling reads about sample_size rows instead of the whole table,
+    and REPEATABLE keeps the sample, and so the scores, stable while the pool
+    is unchanged.
+    """
+    sample_size = sample_size or CORPUS_STATS_SAMPLE
+    total = resume_scanner.count_candidates()
+    percent = min(100.0, 100.0 * sample_size / total) if total else 100.0
+    stats = CorpusStats()
+    with db.connection() as conn:
+        with conn.cursor(name="corpus_stats_sample") as cursor:
+            cursor.itersize = resume_scanner.CANDIDATE_STREAM_ITERSIZE
+            cursor.execute(
+                f"SELECT candidate_id, {profiles.candidate_columns()} FROM candidate_resumes "
+                "TABLESAMPLE BERNOULLI (%s) REPEATABLE (0) WHERE duplicate_of IS NULL LIMIT %s",
+                (percent, sample_size),
+            )
+            for _, text in resume_scanner._candidate_texts(cursor):
+                stats.add(text)
+    return stats
+
+
+def get_corpus_stats():
+    """
+    The process's cached CorpusStats, reloaded after CORPUS_STATS_TTL seconds.
+
+    Falls back to empty statistics (IDF 1.0 for every term) when the database
+    can't be read, so local scoring keeps working offline.
+    """
+    global _corpus_stats, _corpus_stats_loaded_at
+    with _corpus_stats_lock:
+        if _corpus_stats is None or time.monotonic() - _corpus_stats_loaded_at > CORPUS_STATS_TTL:
+            try:
+                _corpus_stats = load_corpus_stats()
+                _corpus_stats_loaded_at = time.monotonic()
+            except Exception as e:
+                print(f"Error loading corpus statistics: {str(e)}")
+                return CorpusStats()
+        return _corpus_stats
+
+
+class LocalBackend(ScoringBackend):
+    """
+    Deterministic keyword scorer.
+
+    The job's key terms are its most frequent non-stopword tokens, weighted by
+    IDF over the stored resumes (get_corpus_stats() unless corpus_stats is
+    given). The match percentage blends how many of those terms the resume
+    covers with a BM25 score of the resume for those terms, normalized to 0-1.
+    """
+    name = "local"
+    model_name = "local-bm25-v2"
+    k1 = 1.2
+    b = 0.75
+    key_terms = 40
+
+    def __init__(self, corpus_stats=None):
+        self.corpus_stats = corpus_stats if corpus_stats is not None else get_corpus_stats()
+        self._job_terms = lru_cache(maxsize=64)(self._extract_job_terms)
+
+    def _extract_job_terms(self, job_description):
+        counts = Counter(token for token in retrieval.tokenize(job_description)
+                         if len(token) > 1 and not token.isdigit())
+        weighted = {term: count * self.corpus_stats.idf(term) for term, count in counts.items()}
+        top_terms = heapq.nlargest(self.key_terms, weighted, key=weighted.get)
+        return {term: self.corpus_stats.idf(term) for term in top_terms}
+
+    def score(self, resume_text, job_description):
+        terms = self._job_terms(job_description)
+        if not terms:
+            return CandidateMatch(summary="The job description has no usable keywords.", match_percentage=0.0)
+
+        tokens = retrieval.tokenize(resume_text)
+        tf = Counter(tokens)
+        length_norm = 1 - self.b + self.b * len(tokens) / self.corpus_stats.average_length
+        total_weight = sum(terms.values())
+
+        matched = [term for term in terms if tf[term]]
+        coverage = sum(terms[term] for term in matched) / total_weight
+        bm25 = sum(
+            idf * tf[term] * (self.k1 + 1) / (tf[term] + self.k1 * length_norm)
+            for term, idf in terms.items() if tf[term]
+        )
+        # Each term contributes at most idf * (k1 + 1), which bounds the score
+        bm25_normalized = bm25 / (total_weight * (self.k1 + 1))
+        match_percentage = round(100 * (0.6 * coverage + 0.4 * bm25_normalized), 1)
+
+        missing = [term for term in terms if not tf[term]]
+        summary = (
+            f"Keyword match: the resume covers {len(matched)} of {len(terms)} key job terms. "
+            f"Matched: {', '.join(matched[:10]) or 'none'}. "
+            f"Missing: {', '.join(missing[:10]) or 'none'}."
+        )
+        return CandidateMatch(summary=summary, match_percentage=min(match_percentage, 100.0))
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeBackend(ScoringBackend):
+    """Stand-in LLM: sleeps for a configurable latency and fails at configurable rates."""
+    name = "fake"
+    model_name = "fake"
+    rate_limited = True
+
+    def __init__(self, latency=0.5, jitter=0.1, error_rate=0.0, rate_limit_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+
+    def score(self, resume_text, job_description):
+        time.sleep(max(0.0, self._random.gauss(self.latency, self.jitter)))
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            raise FakeRateLimitError("429 Too Many Requests (simulated)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise RuntimeError("Simulated model error")
+        # Stable per resume/job so repeated runs rank the same way
+        digest = hashlib.sha256(f"{job_description}\0{resume_text}".encode("utf-8")).digest()
+        return CandidateMatch(summary="Simulated match summary.", match_percentage=round(digest[0] / 2.55, 1))
+
+
+BACKENDS = {
+    "groq": GroqBackend,
+    "groq-quick": QuickGroqBackend,
+    "local": LocalBackend,
+    "fake": FakeBackend,
+}
+
+
+def get_backend(name=None, **options):
+    """Creates a backend by name ("groq", "groq-quick", "local" or "fake"); defaults to SCORING_BACKEND."""
+    name = name or SCORING_BACKEND
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scoring backend {name!r}; choose from {', '.join(BACKENDS)} or cascade")
+    return backend_class(**options)
+
+
+def scoring_version(name=None):
+    """
+    Identifies the scores a backend (or the cascade) produces, so work done
+    under one configuration is never reused for another.
+    """
+    name = name or SCORING_BACKEND
+    if name == "cascade":
+        low, high = resume_scanner.CASCADE_BAND
+        return (f"cascade:{CASCADE_FAST_TIER}>{CASCADE_MODEL}:{low:g}-{high:g}:{resume_scanner.CASCADE_TOP_N}:"
+                f"{resume_scanner.PROMPT_VERSION}")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown scoring backend {name!r}; choose from {', '.join(BACKENDS)} or cascade")
+    return f"{name}:{BACKENDS[name].model_name or resume_scanner.MODEL_NAME}:{resume_scanner.PROMPT_VERSION}"
+
+
+def get_cascade_backends(groq_api_key=None, fast_tier=None, strong_model=None):
+    """
+    Returns:
+        tuple: (fast backend, strong backend) for resume_scanner.score_candidates_cascade
+    """
+    fast_tier = fast_tier or CASCADE_FAST_TIER
+    fast_backend = get_backend(fast_tier, groq_api_key=groq_api_key) if fast_tier.startswith("groq") \
+        else get_backend(fast_tier)
+    return fast_backend, GroqBackend(groq_api_key, model_name=strong_model or CASCADE_MODEL)
+
+
+def score_with(name, candidates, job_description, groq_api_key=None, **options):
+    """
+    Scores candidates with a backend or the cascade, chosen by name (default SCORING_BACKEND).
+
+    Yields:
+        tuple: (candidate_id, resume_text, match_result, error), as resume_scanner.score_candidates
+    """
+    name = name or SCORING_BACKEND
+    if name == "cascade":
+        fast_backend, strong_backend = get_cascade_backends(groq_api_key)
+        return resume_scanner.score_candidates_cascade(candidates, job_description, fast_backend, strong_backend,
+                                                       **options)
+    backend = get_backend(name, groq_api_key=groq_api_key) if name.startswith("groq") else get_backend(name)
+    return resume_scanner.score_candidates(candidates, job_description, backend=backend, **options)
+
+
+def first_pass_rank(candidates, job_description, top_k, backend=None):
+    """
+    Ranks a candidate stream with a fast backend, keeping only the best top_k.
+
+    Memory stays O(top_k) however large the stream, so this works as a first
+    pass over very large pools before LLM scoring.
+
+    Returns:
+        list: (match_percentage, candidate_id, resume_text) tuples, best first
+    """
+    backend = backend or LocalBackend()
+    scored = (
+        (backend.score(resume_text, job_description).match_percentage, candidate_id, resume_text)
+        for candidate_id, resume_text in candidates
+    )
+    return heapq.nlargest(top_k, scored, key=lambda item: item[0])
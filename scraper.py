@@ -0,0 +1,235 @@
+"""
+Job description scraper.
+
+Fetches job postings over one pooled HTTP client with strict timeouts and
+reduces each page to its main content. Extracted text is cached on disk per
+URL together with the response's ETag / Last-Modified, so a repeat fetch is
+either served straight from the cache (while fresh) or revalidated with a
+conditional request that usually comes back 304 Not Modified.
+
+Several URLs can be fetched at once with scrape_many(), which runs the
+requests concurrently while capping the connections per host:
+
+    python scraper.py https://example.com/jobs/1 https://example.com/jobs/2
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/119.0.0.0 Safari/537.36"
+)
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "10"))
+SCRAPER_MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "16"))
+SCRAPER_PER_HOST_LIMIT = int(os.getenv("SCRAPER_PER_HOST_LIMIT", "4"))
+SCRAPER_MAX_BYTES = int(os.getenv("SCRAPER_MAX_BYTES", str(5 * 1024 * 1024)))
+SCRAPER_CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", os.path.join(".cache", "scraper"))
+# Cached pages younger than this are returned without contacting the site
+SCRAPER_CACHE_TTL = int(os.getenv("SCRAPER_CACHE_TTL", "3600"))
+# Bumped when extraction changes so stale cached text isn't reused
+EXTRACTOR_VERSION = "1"
+
+# Elements that never hold the job description
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form"]
+_CONTENT_HINT_RE = re.compile(r"job[-_ ]?(description|details|posting|body)|description|posting", re.IGNORECASE)
+
+
+class ScrapeError(Exception):
+    pass
+
+
+_client = None
+_client_lock = threading.Lock()
+_host_locks = {}
+
+
+def get_client():
+    """Shared HTTP client; keep-alive connections are reused across scrapes."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                headers={"User-Agent": USER_AGENT},
+                timeout=httpx.Timeout(SCRAPER_TIMEOUT, connect=5.0),
+                limits=httpx.Limits(max_connections=SCRAPER_MAX_WORKERS * 2,
+                                    max_keepalive_connections=SCRAPER_MAX_WORKERS),
+                follow_redirects=True,
+            )
+        return _client
+
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc.lower()
+    with _client_lock:
+        if host not in _host_locks:
+            _host_locks[host] = threading.BoundedSemaphore(SCRAPER_PER_HOST_LIMIT)
+        return _host_locks[host]
+
+
+def _cache_path(url):
+    key = hashlib.sha256(f"{EXTRACTOR_VERSION}\0{url}".encode("utf-8")).hexdigest()
+    return os.path.join(SCRAPER_CACHE_DIR, key[:2], key + ".json")
+
+
+def _read_cache(url):
+    try:
+        with open(_cache_path(url), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(url, entry):
+    path = _cache_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def _job_posting_description(soup):
+    """Description from schema.org JobPosting JSON-LD, which most job boards embed."""
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = data.get("@graph", [data])
+        items = data if isinstance(data, list) else []
+        for item in items:
+            if isinstance(item, dict) and item.get("@type") == "JobPosting" and item.get("description"):
+                title = item.get("title")
+                description = BeautifulSoup(item["description"], HTML_PARSER).get_text(separator="\n", strip=True)
+                return f"{title}\n{description}" if title else description
+    return None
+
+
+def extract_main_text(html):
+    """
+    Reduces a job posting page to the text of its main content.
+
+    Uses the JobPosting structured data when present; otherwise drops
+    navigation and other boilerplate and keeps the largest main/article/
+    description-like block.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    structured = _job_posting_description(soup)
+    if structured:
+        return structured
+
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    candidates = soup.find_all(["main", "article"]) + soup.find_all(attrs={"role": "main"})
+    candidates += soup.find_all(attrs={"id": _CONTENT_HINT_RE}) + soup.find_all(attrs={"class": _CONTENT_HINT_RE})
+    texts = [candidate.get_text(separator="\n", strip=True) for candidate in candidates]
+    # Tiny blocks (e.g. a "description" label) are not the posting
+    texts = [text for text in texts if len(text) >= 200]
+    if texts:
+        return max(texts, key=len)
+    body = soup.body or soup
+    return body.get_text(separator="\n", strip=True)
+
+
+def _fetch(url):
+    """Fetches one URL and returns (text, from_cache)."""
+    cached = _read_cache(url)
+    if cached and time.time() - cached["fetched_at"] < SCRAPER_CACHE_TTL:
+        return cached["text"], True
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    with _host_semaphore(url):
+        with get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                cached["fetched_at"] = time.time()
+                _write_cache(url, cached)
+                return cached["text"], True
+            if response.status_code != 200:
+                raise ScrapeError(f"Failed to fetch page. Status code: {response.status_code}")
+            body = bytearray()
+            for chunk in response.iter_bytes():
+                body += chunk
+                if len(body) > SCRAPER_MAX_BYTES:
+                    raise ScrapeError(f"Page is larger than {SCRAPER_MAX_BYTES // (1024 * 1024)} MB")
+            html = bytes(body).decode(response.encoding or "utf-8", errors="replace")
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    text = extract_main_text(html)
+    if not text:
+        raise ScrapeError("No text found on the page")
+    _write_cache(url, {"url": url, "etag": etag, "last_modified": last_modified,
+                       "fetched_at": time.time(), "text": text})
+    return text, False
+
+
+def scrape(url):
+    """
+    Returns the main text of the job posting at url.
+
+    Raises:
+        ScrapeError: on a non-200 response, an oversized page or an empty page
+        httpx.HTTPError: on connection errors and timeouts
+    """
+    text, _ = _fetch(url)
+    return text
+
+
+def scrape_many(urls, max_workers=None):
+    """
+    Fetches several job postings concurrently, at most SCRAPER_PER_HOST_LIMIT per host.
+
+    Returns:
+        list: (url, text, error) tuples in the order of urls; text is None where error is set
+    """
+    urls = list(dict.fromkeys(url.strip() for url in urls if url.strip()))
+
+    def fetch_one(url):
+        try:
+            return url, scrape(url), None
+        except Exception as e:
+            return url, None, str(e) or type(e).__name__
+
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers or SCRAPER_MAX_WORKERS, len(urls)),
+                            thread_name_prefix="scraper") as executor:
+        return list(executor.map(fetch_one, urls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape job descriptions from URLs.")
+    parser.add_argument("urls", nargs="+")
+    args = parser.parse_args()
+
+    for url, text, error in scrape_many(args.urls):
+        if error:
+            print(f"{url}: failed: {error}")
+        else:
+            print(f"{url}: {len(text)} characters\n{text[:500]}\n")
+
+
+if __name__ == "__main__":
+    main()
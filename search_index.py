@@ -0,0 +1,170 @@
+"""
+Keyword search over resumes.
+
+Resumes are indexed in Postgres by a generated `resume_tsv` tsvector column
+with a GIN index. Skill names that the default text parser would mangle
+(c++, c#, node.js, ci/cd, ...) are normalized into a `search_terms` column at
+ingestion so they are searchable too.
+
+Queries use a small boolean syntax:
+
+    python AND kafka NOT intern
+    (java OR kotlin) "machine learning" -junior
+
+Adjacent terms are ANDed; quoted text is matched as a phrase.
+"""
+import re
+
+import db
+
+# Skill spellings mapped to one searchable token
+SKILL_ALIASES = {
+    "c++": "cplusplus",
+    "cpp": "cplusplus",
+    "c#": "csharp",
+    "f#": "fsharp",
+    ".net": "dotnet",
+    "asp.net": "aspdotnet",
+    "node.js": "nodejs",
+    "node": "nodejs",
+    "react.js": "reactjs",
+    "react": "reactjs",
+    "vue.js": "vuejs",
+    "next.js": "nextjs",
+    "k8s": "kubernetes",
+    "golang": "golang",
+    "postgres": "postgresql",
+    "ci/cd": "cicd",
+    "machine learning": "machinelearning",
+    "deep learning": "deeplearning",
+    "data science": "datascience",
+    "ml": "machinelearning",
+}
+
+_ALIAS_RE = re.compile(
+    r"(?<![\w.+#])(" + "|".join(re.escape(alias) for alias in sorted(SKILL_ALIASES, key=len, reverse=True)) + r")(?![\w+#])",
+    re.IGNORECASE,
+)
+_QUERY_TOKEN_RE = re.compile(r'"[^"]*"|\(|\)|-?[^\s()"]+')
+_LEXEME_RE = re.compile(r"[^a-z0-9]+")
+# Tokens after which an operand may follow without an implicit AND
+_OPENERS = ("(", "!(", "&", "|")
+
+
+def normalize_terms(text):
+    """Space-separated normalized skill tokens found in text, stored in candidate_resumes.search_terms."""
+    found = dict.fromkeys(SKILL_ALIASES[match.lower()] for match in _ALIAS_RE.findall(text or ""))
+    return " ".join(found)
+
+
+def _lexemes(term):
+    """Turns a query term into safe tsquery lexemes (aliases normalized, punctuation split)."""
+    term = term.lower()
+    if term in SKILL_ALIASES:
+        return [SKILL_ALIASES[term]]
+    return [part for part in _LEXEME_RE.split(term) if part]
+
+
+def parse_query(query):
+    """
+    Converts the boolean search syntax into a to_tsquery() expression.
+
+    Returns None if the query has no searchable terms.
+    """
+    parts = []
+    pending_operator = None
+    negate = False
+    depth = 0  # parentheses opened in parts and not yet closed
+
+    for token in _QUERY_TOKEN_RE.findall(query or ""):
+        upper = token.upper()
+        if upper in ("AND", "OR"):
+            pending_operator = "&" if upper == "AND" else "|"
+            continue
+        if upper == "NOT":
+            # NOT NOT cancels out
+            negate = not negate
+            continue
+        if token == ")":
+            # A ")" with nothing open is dropped
+            if not depth:
+                continue
+            if parts[-1] in ("(", "!("):
+                parts.pop()
+                depth -= 1
+            elif parts[-1] not in _OPENERS:
+                parts.append(")")
+                depth -= 1
+            continue
+
+        if token.startswith("-") and len(token) > 1:
+            negate, token = not negate, token[1:]
+        if token == "(":
+            operand = "("
+            depth += 1
+        else:
+            if token.startswith('"'):
+                lexemes = [lexeme for word in token.strip('"').split() for lexeme in _lexemes(word)]
+                operand = " <-> ".join(lexemes)
+            else:
+                lexemes = _lexemes(token)
+                operand = " & ".join(lexemes)
+            if not lexemes:
+                continue
+            if len(lexemes) > 1:
+                operand = f"({operand})"
+
+        if parts and parts[-1] not in _OPENERS:
+            parts.append(pending_operator or "&")
+        if negate:
+            operand = "!" + operand
+        parts.append(operand)
+        pending_operator = None
+        negate = False
+
+    # Drop dangling operators / parentheses and close the rest
+    while parts and parts[-1] in _OPENERS:
+        if parts.pop() in ("(", "!("):
+            depth -= 1
+    if not parts:
+        return None
+    return " ".join(parts) + ")" * depth
+
+
+def search_filter(query, column="resume_tsv"):
+    """
+    SQL condition restricting rows to resumes matching query.
+
+    The condition uses a named placeholder so it can be combined with other
+    named parameters.
+
+    Returns:
+        tuple: (sql, params); ("", {}) when the query is empty
+    """
+    tsquery = parse_query(query)
+    if tsquery is None:
+        return "", {}
+    return f"{column} @@ to_tsquery('english', %(search_query)s)", {"search_query": tsquery}
+
+
+def search_candidates(query, limit=50):
+    """
+    Ranked keyword search over all resumes.
+
+    Returns:
+        list: (candidate_id, resume_head, rank) tuples, best first; resume_head is the
+        profile's name when one is stored
+    """
+    tsquery = parse_query(query)
+    if tsquery is None:
+        return []
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            SELECT candidate_id, coalesce(profile->>'name', left(resume_text, 200)), ts_rank_cd(resume_tsv, query) AS rank
+            FROM candidate_resumes, to_tsquery('english', %s) AS query
+            WHERE resume_tsv @@ query AND duplicate_of IS NULL
+            ORDER BY rank DESC
+            LIMIT %s;
+            """, (tsquery, limit))
+            return cursor.fetchall()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg
+
+import db
+
+
+@pytest.fixture
+def database():
+    """Skips the test unless the DB_* settings reach a database."""
+    if not os.getenv("DB_HOST"):
+        pytest.skip("DB_HOST is not set")
+    try:
+        psycopg.connect(db.get_conn_string(), connect_timeout=3).close()
+    except psycopg.OperationalError as e:
+        pytest.skip(f"database unavailable: {e}")
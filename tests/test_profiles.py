@@ -0,0 +1,72 @@
+"""
+Tests for profiles.py that need a database; skipped unless the DB_* settings reach one.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import uuid
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import profiles
+
+
+class RetriedFailedResume(BaseException):
+    """Escapes profile_for_insert's `except Exception`, so a looping backfill fails the test instead of hanging."""
+
+
+RESUME = """Jane Doe
+jane@example.com
+
+Experience
+Data Engineer at Acme, 2019 - 2024
+Built Kafka and PostgreSQL pipelines in Python.
+"""
+
+
+@pytest.fixture
+def stored_resumes(database):
+    """Three unprofiled resumes, removed again after the test."""
+    candidate_ids = [uuid.uuid4() for _ in range(3)]
+    with db.connection() as conn:
+        conn.cursor().executemany(
+            "INSERT INTO candidate_resumes (candidate_id, resume_text, created_at) VALUES (%s, %s, %s)",
+            [(candidate_id, f"{RESUME}\nRef {candidate_id}", datetime.now()) for candidate_id in candidate_ids],
+        )
+        conn.commit()
+    yield candidate_ids
+    with db.connection() as conn:
+        conn.execute("DELETE FROM candidate_resumes WHERE candidate_id = ANY(%s)", (candidate_ids,))
+        conn.commit()
+
+
+def test_llm_backfill_visits_failing_rows_once(stored_resumes, monkeypatch):
+    with db.connection() as conn:
+        eligible = conn.execute(
+            "SELECT count(*) FROM candidate_resumes WHERE profile IS NULL OR (profile->>'version')::int < %s "
+            "OR profile->>'source' = 'heuristic'", (profiles.PROFILE_VERSION,)
+        ).fetchone()[0]
+    calls = []
+
+    def failing_llm(resume_text, profile, groq_api_key=None):
+        calls.append(resume_text)
+        if len(calls) > eligible:
+            raise RetriedFailedResume("backfill retried resumes whose LLM pass had failed")
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(profiles, "enrich_with_llm", failing_llm)
+    monkeypatch.setattr(profiles, "BACKFILL_BATCH_SIZE", 2)
+
+    updated = profiles.backfill(use_llm=True)
+
+    assert updated == eligible
+    assert len(calls) == eligible
+    with db.connection() as conn:
+        sources = conn.execute("SELECT profile->>'source' FROM candidate_resumes WHERE candidate_id = ANY(%s)",
+                               (stored_resumes,)).fetchall()
+    assert sources == [("heuristic",)] * 3
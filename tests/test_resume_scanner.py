@@ -0,0 +1,32 @@
+"""
+Tests for resume_scanner.py that need a database; skipped unless the DB_* settings reach one.
+
+    python -m pytest tests
+"""
+import math
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resume_scanner
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 7])
+def test_unscored_batch_bounds_cover_every_resume_once(database, batch_size):
+    job_id = uuid.uuid4()
+    unscored = [candidate_id for candidate_id, _ in resume_scanner.iter_unscored_candidates(job_id)]
+    if not unscored:
+        pytest.skip("no stored resumes")
+
+    bounds = resume_scanner.unscored_batch_bounds(job_id, batch_size)
+
+    assert len(bounds) == math.ceil(len(unscored) / batch_size)
+    assert bounds[-1][1] is None
+    batches = [[candidate_id for candidate_id, _ in resume_scanner.iter_unscored_candidates(
+        job_id, candidate_range=candidate_range)] for candidate_range in bounds]
+    assert all(len(batch) == batch_size for batch in batches[:-1])
+    assert sorted(sum(batches, [])) == sorted(unscored)
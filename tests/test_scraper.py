@@ -0,0 +1,225 @@
+"""
+Tests for scraper.py against a local HTTP stub server.
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper
+
+DESCRIPTION = "".join(
+    f"<p>Responsibility {i}: build and operate Python services on PostgreSQL and Kafka.</p>" for i in range(10)
+)
+PAGE = (
+    "<html><head><title>Careers</title><style>.x{color:red}</style></head><body>"
+    "<header><nav><a href='/'>Home</a><a href='/jobs'>All jobs</a></nav></header>"
+    f"<main><h1>Senior Engineer</h1><div class='job-description'>{DESCRIPTION}</div></main>"
+    "<footer><p>Privacy policy and cookie settings</p></footer><script>var tracking = 1;</script></body></html>"
+)
+JSON_LD = {
+    "@context": "https://schema.org",
+    "@type": "JobPosting",
+    "title": "Data Engineer",
+    "description": "<p>Design <b>streaming pipelines</b>.</p><ul><li>Kafka</li><li>Spark</li></ul>",
+}
+JSON_LD_PAGE = (
+    "<html><head><script type='application/ld+json'>" + json.dumps(JSON_LD) + "</script></head>"
+    "<body><nav>Jobs menu</nav><main><p>Rendered copy of the posting that should not be used.</p></main></body></html>"
+)
+ETAG = '"page-v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves fixed pages; records each request and the peak number of /slow requests handled at once."""
+    lock = threading.Lock()
+    requests = []
+    in_flight = 0
+    peak_in_flight = 0
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.requests.append((self.path, dict(self.headers)))
+        self.route()
+
+    def route(self):
+        if self.path.startswith("/etag"):
+            if self.headers.get("If-None-Match") == ETAG:
+                return self.reply(304, headers={"ETag": ETAG})
+            return self.reply(200, PAGE, headers={"ETag": ETAG})
+        if self.path.startswith("/last-modified"):
+            if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                return self.reply(304)
+            return self.reply(200, PAGE, headers={"Last-Modified": LAST_MODIFIED})
+        if self.path.startswith("/json-ld"):
+            return self.reply(200, JSON_LD_PAGE)
+        if self.path.startswith("/large"):
+            return self.reply(200, PAGE + "<p>" + "x" * 64 * 1024 + "</p>")
+        if self.path.startswith("/slow"):
+            # Counted only until the response starts, so a client can't free its slot before the count drops
+            with StubHandler.lock:
+                StubHandler.in_flight += 1
+                StubHandler.peak_in_flight = max(StubHandler.peak_in_flight, StubHandler.in_flight)
+            time.sleep(0.2)
+            with StubHandler.lock:
+                StubHandler.in_flight -= 1
+            return self.reply(200, PAGE)
+        return self.reply(404, "Not found")
+
+    def reply(self, status, body="", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_scraper(tmp_path, monkeypatch):
+    """Fresh cache directory, client and per-host limits for every test."""
+    monkeypatch.setattr(scraper, "SCRAPER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(scraper, "_client", None)
+    monkeypatch.setattr(scraper, "_host_locks", {})
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    StubHandler.requests = []
+    StubHandler.peak_in_flight = 0
+    yield
+    if scraper._client is not None:
+        scraper._client.close()
+
+
+def requests_to(path):
+    return [headers for request_path, headers in StubHandler.requests if request_path.startswith(path)]
+
+
+def test_fetch_returns_main_content(server):
+    text, from_cache = scraper._fetch(f"{server}/etag/1")
+
+    assert not from_cache
+    assert text.startswith("Senior Engineer")
+    assert "Responsibility 9" in text
+    for boilerplate in ("All jobs", "cookie settings", "tracking", "color:red"):
+        assert boilerplate not in text
+
+
+def test_cache_hit_within_ttl(server):
+    url = f"{server}/etag/2"
+    first = scraper.scrape(url)
+
+    text, from_cache = scraper._fetch(url)
+
+    assert from_cache
+    assert text == first
+    assert len(requests_to("/etag/2")) == 1
+
+
+def test_revalidates_with_etag(server, monkeypatch):
+    url = f"{server}/etag/3"
+    first = scraper.scrape(url)
+    monkeypatch.setattr(scraper, "SCRAPER_CACHE_TTL", 0)
+
+    text, from_cache = scraper._fetch(url)
+
+    assert from_cache
+    assert text == first
+    revalidation = requests_to("/etag/3")[1]
+    assert revalidation["If-None-Match"] == ETAG
+
+
+def test_revalidates_with_last_modified(server, monkeypatch):
+    url = f"{server}/last-modified/1"
+    first = scraper.scrape(url)
+    monkeypatch.setattr(scraper, "SCRAPER_CACHE_TTL", 0)
+
+    text, from_cache = scraper._fetch(url)
+
+    assert from_cache
+    assert text == first
+    revalidation = requests_to("/last-modified/1")[1]
+    assert revalidation["If-Modified-Since"] == LAST_MODIFIED
+    assert "If-None-Match" not in revalidation
+
+
+def test_response_size_cap(server, monkeypatch):
+    monkeypatch.setattr(scraper, "SCRAPER_MAX_BYTES", 16 * 1024)
+
+    with pytest.raises(scraper.ScrapeError, match="larger than"):
+        scraper.scrape(f"{server}/large")
+    assert not os.path.exists(scraper._cache_path(f"{server}/large"))
+
+
+def test_error_status(server):
+    with pytest.raises(scraper.ScrapeError, match="404"):
+        scraper.scrape(f"{server}/missing")
+
+
+def test_per_host_concurrency_limit(server, monkeypatch):
+    monkeypatch.setattr(scraper, "SCRAPER_PER_HOST_LIMIT", 2)
+    urls = [f"{server}/slow/{i}" for i in range(6)]
+
+    results = scraper.scrape_many(urls, max_workers=6)
+
+    assert [url for url, _, _ in results] == urls
+    assert all(error is None and text for _, text, error in results)
+    assert StubHandler.peak_in_flight == 2
+
+
+def test_scrape_many_reports_errors_in_order(server):
+    urls = [f"{server}/etag/4", f"{server}/missing", f"{server}/etag/4"]
+
+    results = scraper.scrape_many(urls)
+
+    assert [url for url, _, _ in results] == urls[:2]
+    assert results[0][2] is None
+    assert results[1][1] is None and "404" in results[1][2]
+
+
+def test_json_ld_job_posting(server):
+    text = scraper.scrape(f"{server}/json-ld")
+
+    assert text.splitlines()[0] == "Data Engineer"
+    assert "streaming pipelines" in text
+    assert "Kafka" in text and "Spark" in text
+    assert "Rendered copy" not in text
+    assert "<" not in text
+
+
+def test_extract_main_text_picks_largest_content_block():
+    filler = "".join(f"<p>Requirement {i}: five years of backend experience.</p>" for i in range(10))
+    html = (
+        "<html><body><nav>Menu</nav><div class='description'>Description</div>"
+        f"<article><h2>Platform Engineer</h2>{filler}</article><aside>Similar jobs</aside></body></html>"
+    )
+
+    text = scraper.extract_main_text(html)
+
+    assert text.startswith("Platform Engineer")
+    assert "Requirement 9" in text
+    assert "Menu" not in text and "Similar jobs" not in text
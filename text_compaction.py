@@ -0,0 +1,160 @@
+"""
+Prompt input compaction.
+
+Scraped job descriptions carry navigation, cookie banners and footers, and both
+resumes and jobs often repeat lines. Compacting them before prompting saves
+input tokens on every LLM call. Job descriptions are compacted once per job
+(memoized) rather than once per candidate.
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+
+import metrics
+
+# Per-model (resume, job description) input token budgets
+MODEL_TOKEN_BUDGETS = {
+    "llama-3.1-8b-instant": (3000, 1500),
+}
+DEFAULT_TOKEN_BUDGET = (4000, 2000)
+
+_BOILERPLATE_RE = re.compile(
+    r"\b(?:cookies?( (settings|preferences|policy))?|privacy (policy|notice|statement)|"
+    r"terms (of use|and conditions|of service)|all rights reserved|"
+    r"skip to (main )?content|sign (in|up)|log ?in|create (an )?account|subscribe|newsletter|follow us( on \w+)?|"
+    r"share (this|on)|back to (search|jobs|results)|similar jobs|job alerts?|accept all|manage preferences|"
+    r"powered by|equal opportunity employer|view all jobs)\b",
+    re.IGNORECASE,
+)
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+# Only lines this short are candidates for boilerplate; longer lines are content
+_BOILERPLATE_MAX_WORDS = 12
+
+
+def is_boilerplate(line):
+    """
+    True for short navigation/footer lines: boilerplate phrases make up at
+    least half of the line's letters and digits. A requirement that merely
+    mentions one ("Build SSO login flows") is kept.
+    """
+    if len(line.split()) > _BOILERPLATE_MAX_WORDS:
+        return False
+    letters = len(_NON_ALNUM_RE.sub("", line))
+    matched = sum(len(_NON_ALNUM_RE.sub("", match.group())) for match in _BOILERPLATE_RE.finditer(line))
+    return matched > 0 and 2 * matched >= letters
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """Token count from a local tokenizer (tiktoken if installed, else ~4 characters per token)."""
+    if not text:
+        return 0
+    tokenizer = _tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def token_budget(model_name, kind):
+    """Input token budget for a model; kind is "resume" or "job"."""
+    resume_budget, job_budget = MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+    if kind == "resume":
+        return int(os.getenv("RESUME_TOKEN_BUDGET", resume_budget))
+    return int(os.getenv("JOB_TOKEN_BUDGET", job_budget))
+
+
+def compact_text(text, max_tokens=None, strip_boilerplate=False):
+    """
+    Normalizes whitespace, drops repeated lines (and optionally boilerplate)
+    and truncates to max_tokens.
+    """
+    lines = []
+    seen = set()
+    for line in (text or "").splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        if strip_boilerplate and is_boilerplate(line):
+            continue
+        seen.add(key)
+        lines.append(line)
+
+    if not max_tokens:
+        return "\n".join(lines)
+
+    kept = []
+    used = 0
+    for line in lines:
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > max_tokens:
+            remaining = max_tokens - used
+            if remaining > 8:
+                # Keep the start of the line, approximating characters from tokens
+                kept.append(line[:remaining * 4].rsplit(" ", 1)[0])
+            break
+        kept.append(line)
+        used += line_tokens
+    return "\n".join(kept)
+
+
+class CompactionStats:
+    """
+    Thread-safe running totals of prompt tokens before and after compaction.
+
+    The tokens saved are also counted as the compaction_tokens_saved metric,
+    so a metrics.run() reports its own savings.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def add(self, tokens_before, tokens_after):
+        with self._lock:
+            self.tokens_before += tokens_before
+            self.tokens_after += tokens_after
+        metrics.increment("compaction_tokens_saved", tokens_before - tokens_after)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": self.tokens_before - self.tokens_after,
+            }
+
+
+compaction_stats = CompactionStats()
+
+
+@lru_cache(maxsize=256)
+def _compact_job(job_description, model_name):
+    compacted = compact_text(job_description, token_budget(model_name, "job"), strip_boilerplate=True)
+    return compacted, count_tokens(job_description), count_tokens(compacted)
+
+
+def compact_job_description(job_description, model_name):
+    """Compacts a job description; computed once per (job text, model) and memoized."""
+    compacted, tokens_before, tokens_after = _compact_job(job_description, model_name)
+    compaction_stats.add(tokens_before, tokens_after)
+    return compacted
+
+
+def compact_resume(resume_text, model_name):
+    """Compacts a resume (no boilerplate stripping: short lines such as names and skills matter)."""
+    compacted = compact_text(resume_text, token_budget(model_name, "resume"))
+    compaction_stats.add(count_tokens(resume_text), count_tokens(compacted))
+    return compacted
@@ -0,0 +1,113 @@
+import io
+import os
+
+# pypdf and python-docx are imported on first use so pages that never parse a
+# resume don't pay for them at startup
+
+# Limits for pathological uploads (e.g. 300-page scanned documents)
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(20 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "30"))
+MAX_RESUME_CHARS = int(os.getenv("MAX_RESUME_CHARS", "100000"))
+
+
+def _check_file_size(file, max_bytes):
+    """Rejects oversized files before parsing them."""
+    if not max_bytes:
+        return
+    size = getattr(file, "size", None)
+    if size is None and hasattr(file, "seek"):
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    elif size is None and isinstance(file, (str, os.PathLike)):
+        size = os.path.getsize(file)
+    if size is not None and size > max_bytes:
+        raise ValueError(f"File is too large ({size:,} bytes, limit {max_bytes:,})")
+
+
+def _is_image_only(page):
+    """
+    True when a page has no fonts and only image XObjects, i.e. a scanned page
+    without a text layer. Checking resources avoids running the content-stream
+    parser on pages that can't yield text.
+    """
+    resources = page.get("/Resources")
+    if resources is None:
+        return True
+    resources = resources.get_object()
+    if resources.get("/Font"):
+        return False
+    xobjects = resources.get("/XObject")
+    if xobjects:
+        for xobject in xobjects.get_object().values():
+            # Form XObjects can carry their own fonts and text
+            if xobject.get_object().get("/Subtype") != "/Image":
+                return False
+    return True
+
+
+def iter_pdf_pages(file, max_pages=None, skip_image_only=True):
+    """Yields the text of each PDF page lazily, stopping after max_pages."""
+    from pypdf import PdfReader
+
+    pdf_reader = PdfReader(file)
+    max_pages = MAX_PDF_PAGES if max_pages is None else max_pages
+    for page_number, page in enumerate(pdf_reader.pages):
+        if max_pages and page_number >= max_pages:
+            break
+        if skip_image_only and _is_image_only(page):
+            continue
+        yield page.extract_text() or ""
+
+
+def _join_capped(parts, separator, max_chars):
+    """Joins parts once, stopping as soon as max_chars is reached."""
+    collected = []
+    size = 0
+    for part in parts:
+        collected.append(part)
+        size += len(part) + len(separator)
+        if max_chars and size >= max_chars:
+            break
+    text = separator.join(collected)
+    return text[:max_chars] if max_chars else text
+
+
+# Function to extract text from PDF
+def extract_text_from_pdf(file, max_pages=None, max_chars=None, max_bytes=None, skip_image_only=True):
+    _check_file_size(file, MAX_RESUME_BYTES if max_bytes is None else max_bytes)
+    pages = iter_pdf_pages(file, max_pages=max_pages, skip_image_only=skip_image_only)
+    return _join_capped(pages, "\n", MAX_RESUME_CHARS if max_chars is None else max_chars)
+
+# Function to extract text from DOCX
+def extract_text_from_docx(file, max_chars=None, max_bytes=None):
+    _check_file_size(file, MAX_RESUME_BYTES if max_bytes is None else max_bytes)
+    import docx
+
+    doc = docx.Document(file)
+    paragraphs = (paragraph.text for paragraph in doc.paragraphs)
+    text = _join_capped(paragraphs, "\n", MAX_RESUME_CHARS if max_chars is None else max_chars)
+    return text + "\n" if text else text
+
+
+EXTRACTORS = {
+    ".pdf": extract_text_from_pdf,
+    ".docx": extract_text_from_docx,
+}
+
+
+def extract_file(item):
+    """
+    Process-pool worker for ingest.py: (file_name, file_bytes) -> (file_name, text, error).
+
+    It lives here rather than in ingest so workers import only this module,
+    which has no database or Streamlit dependencies.
+    """
+    file_name, data = item
+    extractor = EXTRACTORS.get(os.path.splitext(file_name)[1].lower())
+    if extractor is None:
+        return file_name, None, "unsupported file type"
+    try:
+        return file_name, extractor(io.BytesIO(data)), None
+    except Exception as e:
+        return file_name, None, str(e)